@@ -1,66 +1,414 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, send_from_directory
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, send_from_directory, abort, Response, stream_with_context, g, current_app
+from flask.cli import with_appcontext
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from functools import wraps
+import click
 from markupsafe import Markup
 import os
 import json
 import hashlib
 import uuid
+import base64
+import time
+import hmac
+from sqlalchemy import event, delete, update, or_
+from sqlalchemy.orm import load_only, selectinload
+from sqlalchemy.exc import IntegrityError
 from werkzeug.utils import secure_filename
-from google_drive_helper import GoogleDriveHelper
+from werkzeug.middleware.proxy_fix import ProxyFix
+from dashboard_cache import DashboardStatsCache
+import search_index
+import blob_store
+from position_index import PositionPrefixIndex
+import bulk_import
+import employee_export
+import query_stats
+from metrics import MetricsRegistry, TimedProxy
+from user_cache import UserIdentityCache, identity_from
+from drive_storage import FileParentCache, FolderResolver, LazyDriveHelper, load_drive_state, save_drive_state
+from upload_queue import PendingContent, UploadWorkerPool, retry_delay
+
+# Views and CLI commands are collected here and attached to the app by create_app()
+url_rules = []
+cli_commands = []
+
+def route(rule, **options):
+    """Register a view the same way as app.route; create_app() adds it to the app."""
+    def decorator(f):
+        url_rules.append((rule, f, options))
+        return f
+    return decorator
 
-app = Flask(__name__)
+def cli_command(command):
+    """Register a click command; create_app() adds it to the app's CLI."""
+    cli_commands.append(command)
+    return command
 
 # Add nl2br filter
-@app.template_filter('nl2br')
 def nl2br(value):
     if value:
         return Markup(value.replace('\n', '<br>'))
 
-# Load configuration from config.py
-try:
-    app.config.from_object('config')
-except ImportError:
-    # Fallback configuration if config.py doesn't exist
-    app.config['SECRET_KEY'] = 'your-secret-key'
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///employees.db'
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max upload size
-    app.config['GOOGLE_DRIVE_ENABLED'] = False
-    
-    # File upload configuration
-    app.config['UPLOAD_FOLDER'] = os.path.join(app.static_folder, 'uploads')
-    app.config['PROFILE_PICTURES_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], 'profile_pictures')
-    app.config['DOCUMENTS_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], 'documents')
-
-# Increase request body size limit for file uploads
-from werkzeug.middleware.proxy_fix import ProxyFix
-app.wsgi_app = ProxyFix(app.wsgi_app)
+# Request, upload and Google Drive metrics served at /metrics
+metrics = MetricsRegistry()
+metrics.describe('http_requests_total', 'counter', 'Requests handled, by endpoint, method and status')
+metrics.describe('http_request_duration_seconds', 'histogram', 'Request latency by endpoint')
+metrics.describe('http_requests_in_flight', 'gauge', 'Requests currently being handled, by endpoint')
+metrics.describe('upload_bytes_total', 'counter', 'Bytes of uploaded files saved, by kind')
+metrics.describe('uploads_total', 'counter', 'Uploaded files saved, by kind')
+metrics.describe('uploads_deduplicated_total', 'counter', 'Uploaded files that matched a stored blob, by kind')
+metrics.describe('upload_stage_duration_seconds', 'histogram', 'Time spent per upload in each stage (receive, hash, disk_write, drive_upload), by kind')
+metrics.describe('upload_stage_bytes_total', 'counter', 'Bytes passed through each upload stage, by kind')
+metrics.describe('drive_upload_jobs_total', 'counter', 'Google Drive upload job attempts, by kind and resulting job status')
+metrics.describe('drive_call_duration_seconds', 'histogram', 'Google Drive helper call latency by method')
+metrics.describe('drive_call_errors_total', 'counter', 'Google Drive helper calls that raised, by method')
+
+# GoogleDriveHelper methods that call the Drive API
+DRIVE_API_METHODS = ('create_folder', 'create_folder_if_not_exists', 'lookup_folder', 'folder_exists',
+                     'upload_file', 'upload_file_from_memory', 'is_file_in_folder', 'get_file_parents', 'make_file_public',
+                     'make_files_public_batch', 'get_files_metadata_batch', 'list_files_in_folder')
+
+# Google Drive helper, connected on first use (see init_storage)
+drive_helper = LazyDriveHelper()
+
+# Drive folder IDs shared by every helper of this process, backed by the drive_folder table
+# (configured by create_app)
+drive_folders = FolderResolver()
+
+# Parents of Drive files that aren't in the database, for uploaded_file authorization
+drive_file_parents = FileParentCache()
+
+db = SQLAlchemy()
 
-# Set up upload folders if not defined in config
-if 'UPLOAD_FOLDER' not in app.config:
-    app.config['UPLOAD_FOLDER'] = os.path.join(app.static_folder, 'uploads')
-    app.config['PROFILE_PICTURES_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], 'profile_pictures')
-    app.config['DOCUMENTS_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], 'documents')
+# Per-request query counts, DB time, slowest statement and repeated statements
+def start_query_stats():
+    g.query_stats = query_stats.start_collecting(current_app.config.get('QUERY_REPEAT_THRESHOLD', 5))
 
-# File type configuration
-app.config['ALLOWED_DOCUMENT_EXTENSIONS'] = {'pdf', 'doc', 'docx', 'jpg', 'jpeg', 'png'}
-app.config['ALLOWED_IMAGE_EXTENSIONS'] = {'jpg', 'jpeg', 'png', 'gif'}
+def report_query_stats(response):
+    stats = g.get('query_stats')
+    if stats is None:
+        return response
+    report = stats.as_dict()
+    if current_app.debug:
+        response.headers['X-Query-Count'] = str(report['queries'])
+        response.headers['X-Query-Time-Ms'] = str(report['db_time_ms'])
+        if report['repeated']:
+            response.headers['X-Query-Repeated'] = '; '.join(
+                f"{item['count']}x {item['statement'][:200]}" for item in report['repeated'])
+    elif report['queries']:
+        report.update(method=request.method, endpoint=request.endpoint, path=request.path, status=response.status_code)
+        if report['repeated']:
+            current_app.logger.warning(f"query_stats {json.dumps(report)}")
+        else:
+            current_app.logger.info(f"query_stats {json.dumps(report)}")
+    return response
+
+def stop_query_stats(exc):
+    stats = g.pop('query_stats', None)
+    if stats is not None:
+        query_stats.stop_collecting(stats)
+
+# Per-endpoint request counts, latency and in-flight requests
+def start_request_metrics():
+    g.metrics_endpoint = request.endpoint or 'unmatched'
+    g.metrics_started = time.perf_counter()
+    metrics.gauge_add('http_requests_in_flight', {'endpoint': g.metrics_endpoint})
+
+def record_request_metrics(response):
+    if 'metrics_started' in g:
+        record_request(response.status_code)
+    return response
+
+def finish_request_metrics(exc):
+    endpoint = g.pop('metrics_endpoint', None)
+    if endpoint is None:
+        return
+    # Unhandled exceptions skip after_request
+    if 'metrics_started' in g:
+        record_request(500)
+    metrics.gauge_add('http_requests_in_flight', {'endpoint': endpoint}, -1)
+
+def record_request(status):
+    started = g.pop('metrics_started')
+    endpoint = g.metrics_endpoint
+    metrics.inc('http_requests_total', {'endpoint': endpoint, 'method': request.method, 'status': str(status)})
+    metrics.observe('http_request_duration_seconds', {'endpoint': endpoint}, time.perf_counter() - started)
+
+# Upload stages timed by blob_store.copy_stream(), as (stage name, stats key)
+UPLOAD_STAGES = (('receive', 'read_seconds'), ('hash', 'hash_seconds'), ('disk_write', 'write_seconds'))
+
+def record_upload(kind, stats, deduplicated=False):
+    # Count a saved upload, its size and the time spent in each stage in the upload metrics
+    if not current_app.config.get('METRICS_ENABLED', True):
+        return
+    metrics.inc('uploads_total', {'kind': kind})
+    if deduplicated:
+        metrics.inc('uploads_deduplicated_total', {'kind': kind})
+    else:
+        metrics.inc('upload_bytes_total', {'kind': kind}, stats['bytes'])
+    for stage, key in UPLOAD_STAGES:
+        if stage == 'hash' and not stats[key]:
+            continue
+        metrics.observe('upload_stage_duration_seconds', {'kind': kind, 'stage': stage}, stats[key])
+        metrics.inc('upload_stage_bytes_total', {'kind': kind, 'stage': stage}, stats['bytes'])
 
-# Initialize Google Drive helper
-drive_helper = None
-if app.config.get('GOOGLE_DRIVE_ENABLED', False):
+def drive_upload_buffer():
+    """
+    In-memory tee for an upload that the Drive upload workers of this process
+    can send without reading the saved copy back.
+    
+    Returns:
+        BoundedBuffer holding up to DRIVE_INLINE_UPLOAD_MAX_BYTES, or None when
+        Google Drive or the upload workers are disabled
+    """
+    if current_app.config.get('GOOGLE_DRIVE_ENABLED', False) and current_app.config.get('DRIVE_UPLOAD_WORKERS', 2) > 0:
+        return blob_store.BoundedBuffer(current_app.config.get('DRIVE_INLINE_UPLOAD_MAX_BYTES', 8 * 1024 * 1024))
+    return None
+
+def queue_drive_upload(employee, file_path, file_name, mime_type, document=None, buffer=None):
+    """
+    Queue a saved upload for copying to the employee's Google Drive folder.
+    
+    The job is added to the session, so it's committed together with the
+    upload's rows, and the Drive upload workers pick it up after the commit.
+    The local copy is served until the Drive copy is confirmed. Documents
+    whose content already has a Drive copy are linked to it right away.
+    
+    Args:
+        employee: Employee the upload belongs to (flushed, so it has an ID)
+        file_path: Local path of the saved upload
+        file_name: File name to use in Google Drive
+        mime_type: MIME type of the file
+        document: Document the file belongs to, or None for the profile picture
+        buffer: BoundedBuffer from drive_upload_buffer() that received the upload
+                while it was saved
+        
+    Returns:
+        DriveUploadJob, or None if nothing needs uploading
+    """
+    if not current_app.config.get('GOOGLE_DRIVE_ENABLED', False):
+        if document is not None:
+            document.sync_status = SYNC_LOCAL
+        else:
+            employee.profile_picture_sync_status = SYNC_LOCAL
+        return None
+    
+    # Documents with the same content share one Google Drive copy
+    if document is not None and document.blob is not None:
+        if document.blob.drive_file_id:
+            document.drive_file_id = document.blob.drive_file_id
+            document.sync_status = SYNC_SYNCED
+            return None
+        if active_blob_upload(document.blob_id).first():
+            # Linked when the upload already queued for this content finishes
+            document.sync_status = SYNC_PENDING
+            document.sync_attempts = 0
+            return None
+    
+    if document is not None:
+        document.sync_status = SYNC_PENDING
+        document.sync_attempts = 0
+    else:
+        employee.profile_picture_sync_status = SYNC_PENDING
+        employee.profile_picture_sync_attempts = 0
+    job = DriveUploadJob(
+        employee_id=employee.id,
+        document=document,
+        file_path=file_path,
+        file_name=file_name,
+        mime_type=mime_type,
+        status=JOB_PENDING,
+        attempts=0,
+        next_attempt_at=datetime.utcnow()
+    )
+    db.session.add(job)
+    db.session.flush()
+    content = buffer.getvalue() if buffer is not None else None
+    db.session.info.setdefault('new_upload_jobs', []).append((job.id, content))
+    return job
+
+def active_blob_upload(blob_id):
+    # Query for the waiting or running upload jobs of documents using this blob
+    return db.session.query(DriveUploadJob.id).join(Document, DriveUploadJob.document_id == Document.id).filter(
+        Document.blob_id == blob_id,
+        DriveUploadJob.status.in_([JOB_PENDING, JOB_RUNNING])
+    )
+
+def settle_blob_documents(blob_id, drive_file_id, sync_status):
+    # Pass an upload's outcome on to the other documents that were waiting for the same content
+    waiting = Document.query.filter(
+        Document.blob_id == blob_id,
+        Document.drive_file_id.is_(None),
+        Document.sync_status == SYNC_PENDING,
+        ~Document.id.in_(db.session.query(DriveUploadJob.document_id).filter(
+            DriveUploadJob.document_id.isnot(None),
+            DriveUploadJob.status.in_([JOB_PENDING, JOB_RUNNING])
+        ))
+    )
+    values = {'sync_status': sync_status}
+    if drive_file_id:
+        values['drive_file_id'] = drive_file_id
+    waiting.update(values, synchronize_session=False)
+
+def claim_drive_upload_job():
+    """
+    Atomically mark the next due upload job as running.
+    
+    Jobs left running longer than DRIVE_UPLOAD_LEASE seconds (e.g. by a worker
+    that died) are due again.
+    
+    Returns:
+        Job ID, or None if no job is due
+    """
+    now = datetime.utcnow()
+    lease_expired = now - timedelta(seconds=current_app.config.get('DRIVE_UPLOAD_LEASE', 600))
+    due = or_(
+        db.and_(DriveUploadJob.status == JOB_PENDING, DriveUploadJob.next_attempt_at <= now),
+        db.and_(DriveUploadJob.status == JOB_RUNNING, DriveUploadJob.locked_at < lease_expired),
+    )
     try:
-        credentials_file = app.config.get('GOOGLE_DRIVE_CREDENTIALS_FILE')
-        root_folder_name = app.config.get('GOOGLE_DRIVE_ROOT_FOLDER_NAME', 'Employee Management System')
-        drive_helper = GoogleDriveHelper(credentials_file, root_folder_name)
-        app.logger.info("Google Drive integration enabled")
-    except Exception as e:
-        app.logger.error(f"Failed to initialize Google Drive: {str(e)}")
-        app.config['GOOGLE_DRIVE_ENABLED'] = False
+        for (job_id,) in db.session.query(DriveUploadJob.id).filter(due).order_by(DriveUploadJob.next_attempt_at).limit(5):
+            # Another worker may claim the same job first; the WHERE clause makes only one succeed
+            result = db.session.execute(
+                update(DriveUploadJob)
+                .where(DriveUploadJob.id == job_id, due)
+                .values(status=JOB_RUNNING, locked_at=now, attempts=DriveUploadJob.attempts + 1)
+            )
+            if result.rowcount:
+                db.session.commit()
+                return job_id
+        db.session.rollback()
+        return None
+    finally:
+        db.session.remove()
 
-db = SQLAlchemy(app)
+def run_drive_upload_job(job_id, helper):
+    """
+    Upload one claimed job's file to Google Drive and record the outcome.
+    
+    Failures are retried with exponential backoff until DRIVE_UPLOAD_MAX_ATTEMPTS,
+    after which the job and its document or profile picture are marked failed.
+    
+    Args:
+        job_id: ID returned by claim_drive_upload_job()
+        helper: GoogleDriveHelper owned by the calling worker thread
+    """
+    config = current_app.config
+    content = pending_upload_content.pop(job_id)
+    try:
+        job = db.session.get(DriveUploadJob, job_id)
+        if job is None or job.status != JOB_RUNNING:
+            return
+        employee = db.session.get(Employee, job.employee_id)
+        document = job.document
+        if employee is None or (job.document_id is not None and document is None):
+            # Deleted while the job was waiting
+            job.status = JOB_DONE
+            db.session.commit()
+            return
+        kind = 'profile_picture' if document is None else 'document'
+        
+        try:
+            blob = document.blob if document is not None else None
+            if blob is not None and blob.drive_file_id:
+                drive_file_id = blob.drive_file_id
+            else:
+                folder_name = f"{employee.employee_id}_{employee.first_name}_{employee.last_name}"
+                for attempt in range(2):
+                    # Get or create the employee folder: drive_folders makes sure concurrent
+                    # jobs for the same employee end up with a single folder
+                    if not employee.drive_folder_id:
+                        employee.drive_folder_id = helper.create_folder_if_not_exists(
+                            folder_name, parent_id=helper.root_folder_id
+                        )
+                        if not employee.drive_folder_id:
+                            raise RuntimeError('could not create the employee folder')
+                        db.session.commit()
+                    
+                    # The employee folder is in the link-shared root folder, so the
+                    # file inherits public access without a permission call
+                    started = time.perf_counter()
+                    if content is not None:
+                        drive_file_id = helper.upload_file_from_memory(
+                            file_content=content,
+                            file_name=job.file_name,
+                            parent_folder_id=employee.drive_folder_id,
+                            mime_type=job.mime_type,
+                            make_public=False
+                        )
+                    else:
+                        drive_file_id = helper.upload_file(
+                            file_path=job.file_path,
+                            file_name=job.file_name,
+                            parent_folder_id=employee.drive_folder_id,
+                            mime_type=job.mime_type,
+                            make_public=False
+                        )
+                    if config.get('METRICS_ENABLED', True):
+                        metrics.observe('upload_stage_duration_seconds', {'kind': kind, 'stage': 'drive_upload'},
+                                        time.perf_counter() - started)
+                        if drive_file_id:
+                            size = len(content) if content is not None else os.path.getsize(job.file_path)
+                            metrics.inc('upload_stage_bytes_total', {'kind': kind, 'stage': 'drive_upload'}, size)
+                    if drive_file_id or attempt or helper.folder_exists(employee.drive_folder_id):
+                        break
+                    # The folder was deleted in Drive: forget it and upload to a new one
+                    helper.forget_folder(folder_name, helper.root_folder_id, employee.drive_folder_id)
+                    employee.drive_folder_id = None
+                if not drive_file_id:
+                    raise RuntimeError('Google Drive upload returned no file ID')
+                if blob is not None:
+                    blob.drive_file_id = drive_file_id
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(DriveUploadJob, job_id)
+            document = job.document
+            employee = db.session.get(Employee, job.employee_id)
+            job.last_error = str(e)[:500]
+            if job.attempts >= config.get('DRIVE_UPLOAD_MAX_ATTEMPTS', 8):
+                job.status = JOB_FAILED
+                sync_status = SYNC_FAILED
+            else:
+                job.status = JOB_PENDING
+                job.next_attempt_at = datetime.utcnow() + timedelta(seconds=retry_delay(
+                    job.attempts,
+                    config.get('DRIVE_UPLOAD_RETRY_BASE', 5),
+                    config.get('DRIVE_UPLOAD_RETRY_MAX', 3600)
+                ))
+                sync_status = SYNC_PENDING
+            if document is not None:
+                document.sync_status = sync_status
+                document.sync_attempts = job.attempts
+                if sync_status == SYNC_FAILED and document.blob_id:
+                    settle_blob_documents(document.blob_id, None, SYNC_FAILED)
+            elif employee is not None:
+                employee.profile_picture_sync_status = sync_status
+                employee.profile_picture_sync_attempts = job.attempts
+            db.session.commit()
+            if config.get('METRICS_ENABLED', True):
+                metrics.inc('drive_upload_jobs_total', {'kind': kind, 'result': job.status})
+            current_app.logger.warning(f"Drive upload job {job_id} attempt {job.attempts} failed: {str(e)}")
+            return
+        
+        job.status = JOB_DONE
+        job.last_error = None
+        if document is not None:
+            document.drive_file_id = drive_file_id
+            document.sync_status = SYNC_SYNCED
+            document.sync_attempts = job.attempts
+            if document.blob_id:
+                settle_blob_documents(document.blob_id, drive_file_id, SYNC_SYNCED)
+        elif employee.profile_picture and os.path.basename(employee.profile_picture) == job.file_name:
+            # Only if the picture wasn't replaced while this job was waiting
+            employee.drive_profile_pic_id = drive_file_id
+            employee.profile_picture_sync_status = SYNC_SYNCED
+            employee.profile_picture_sync_attempts = job.attempts
+        db.session.commit()
+        if config.get('METRICS_ENABLED', True):
+            metrics.inc('drive_upload_jobs_total', {'kind': kind, 'result': JOB_DONE})
+    finally:
+        db.session.remove()
 
 # Helper function to check if file extension is allowed
 def allowed_file(filename, allowed_extensions):
@@ -95,8 +443,8 @@ class User(db.Model):
     username = db.Column(db.String(50), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
-    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), nullable=True)
-    employee_code = db.Column(db.String(50), nullable=True)  # Store the employee ID code
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), nullable=True, index=True)
+    employee_code = db.Column(db.String(50), nullable=True, index=True)  # Store the employee ID code
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationship with Employee
@@ -114,7 +462,7 @@ class User(db.Model):
 # Education model
 class Education(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), nullable=False)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), nullable=False, index=True)
     institution = db.Column(db.String(100), nullable=False)
     degree = db.Column(db.String(100), nullable=False)
     field_of_study = db.Column(db.String(100), nullable=False)
@@ -129,7 +477,7 @@ class Education(db.Model):
 # Certification model
 class Certification(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), nullable=False)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     issuing_organization = db.Column(db.String(100), nullable=False)
     issue_date = db.Column(db.Date, nullable=False)
@@ -141,22 +489,56 @@ class Certification(db.Model):
     def __repr__(self):
         return f'<Certification {self.name} from {self.issuing_organization}>'
 
+# Google Drive copy state of a document or profile picture
+SYNC_LOCAL = 'local'      # Stored locally only (Google Drive disabled)
+SYNC_PENDING = 'pending'  # Waiting in the Drive upload queue; the local copy is served
+SYNC_SYNCED = 'synced'    # Drive copy confirmed
+SYNC_FAILED = 'failed'    # Gave up after DRIVE_UPLOAD_MAX_ATTEMPTS; the local copy is served
+
+# DriveUploadJob states
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+# Folder under DOCUMENTS_FOLDER holding document content by SHA-256 digest
+BLOB_FOLDER = 'blobs'
+
+# Stored document content, shared by every document with the same digest
+class FileBlob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    digest = db.Column(db.String(64), unique=True, nullable=False)  # SHA-256 hex digest
+    path = db.Column(db.String(255), nullable=False)  # Relative to DOCUMENTS_FOLDER
+    size = db.Column(db.Integer, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)  # Kept in sync by track_blob_references
+    drive_file_id = db.Column(db.String(255), nullable=True)  # Google Drive copy, shared by the documents
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<FileBlob {self.digest[:12]} ({self.ref_count} refs)>'
+
 # Document model for storing employee documents
 class Document(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), nullable=False)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id'), nullable=False, index=True)
     filename = db.Column(db.String(255), nullable=False)
     original_filename = db.Column(db.String(255), nullable=False)
     document_type = db.Column(db.String(50), nullable=False)  # certificate, experience_letter, offer_letter, etc.
     upload_date = db.Column(db.DateTime, default=datetime.utcnow)
-    drive_file_id = db.Column(db.String(255), nullable=True)  # Google Drive file ID
+    drive_file_id = db.Column(db.String(255), nullable=True, index=True)  # Google Drive file ID
+    blob_id = db.Column(db.Integer, db.ForeignKey('file_blob.id'), nullable=True, index=True)  # None for files saved before blobs
+    sync_status = db.Column(db.String(20), nullable=True)  # Google Drive copy state, see SYNC_*
+    sync_attempts = db.Column(db.Integer, nullable=False, default=0)
+    
+    blob = db.relationship('FileBlob')
     
     def __repr__(self):
         return f'<Document {self.document_type}: {self.original_filename}>'
     
     def get_url(self):
         """Get the URL for the document, either from Google Drive or local storage."""
-        if self.drive_file_id and drive_helper and drive_helper.is_enabled():
+        # The local copy is served until the Drive copy is confirmed (sync_status is empty for older rows)
+        if self.drive_file_id and self.sync_status in (None, SYNC_SYNCED) and drive_helper.available:
             # For Google Drive files, use the drive: prefix to indicate it's a Google Drive file
             return url_for('uploaded_file', filename=f'drive:{self.drive_file_id}')
         else:
@@ -164,6 +546,57 @@ class Document(db.Model):
             clean_filename = self.filename.replace('\\', '/')
             return url_for('uploaded_file', filename=f'documents/{clean_filename}')
 
+# Durable queue of uploads waiting to be copied to Google Drive, drained by drive_upload_workers
+class DriveUploadJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employee.id', ondelete='CASCADE'), nullable=False)
+    document_id = db.Column(db.Integer, db.ForeignKey('document.id', ondelete='CASCADE'), nullable=True)  # None for the profile picture
+    file_path = db.Column(db.String(500), nullable=False)
+    file_name = db.Column(db.String(255), nullable=False)
+    mime_type = db.Column(db.String(100), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # see JOB_*
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime, nullable=True)  # When a worker claimed it
+    last_error = db.Column(db.String(500), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Serves claim_drive_upload_job's "due jobs by status" lookup
+    __table_args__ = (
+        db.Index('ix_drive_upload_job_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+    
+    document = db.relationship('Document')
+    
+    def __repr__(self):
+        return f'<DriveUploadJob {self.id} {self.status} ({self.attempts} attempts)>'
+
+# Google Drive folders found or created by the upload workers, keyed by parent folder and name
+class DriveFolder(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    parent_id = db.Column(db.String(255), nullable=False, default='')  # '' for top-level folders
+    name = db.Column(db.String(255), nullable=False)
+    folder_id = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Also serves load_drive_folder's lookup
+    __table_args__ = (
+        db.UniqueConstraint('parent_id', 'name', name='uq_drive_folder_parent_id_name'),
+    )
+    
+    def __repr__(self):
+        return f'<DriveFolder {self.name} ({self.folder_id})>'
+
+# Department model - the list of departments and their maintained employee counts
+class Department(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    headcount = db.Column(db.Integer, nullable=False, default=0)  # Kept in sync by track_department_headcounts
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<Department {self.name}>'
+
 # Employee model - updated with new fields
 class Employee(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -172,18 +605,27 @@ class Employee(db.Model):
     last_name = db.Column(db.String(50), nullable=False)
     email = db.Column(db.String(100), unique=True, nullable=False)
     phone = db.Column(db.String(20), nullable=False)
-    department = db.Column(db.String(50), nullable=False)
-    position = db.Column(db.String(50), nullable=False)
+    department = db.Column(db.String(50), db.ForeignKey('department.name'), nullable=False)
+    position = db.Column(db.String(50), nullable=False, index=True)
     hire_date = db.Column(db.Date, nullable=False, default=datetime.utcnow)
     current_address = db.Column(db.String(200), nullable=False)  # Renamed from address
     permanent_address = db.Column(db.String(200), nullable=True)  # Added permanent address
     profile_picture = db.Column(db.String(255), nullable=True)  # Store filename of profile picture
-    drive_profile_pic_id = db.Column(db.String(255), nullable=True)  # Google Drive profile picture ID
+    drive_profile_pic_id = db.Column(db.String(255), nullable=True, index=True)  # Google Drive profile picture ID
+    profile_picture_sync_status = db.Column(db.String(20), nullable=True)  # Google Drive copy state, see SYNC_*
+    profile_picture_sync_attempts = db.Column(db.Integer, nullable=False, default=0)
     drive_folder_id = db.Column(db.String(255), nullable=True)  # Google Drive folder ID for this employee
     salary = db.Column(db.Float, default=0)
     notes = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Composite indexes backing keyset pagination of employee listings.
+    # The department index also serves department filters and the dashboard GROUP BY.
+    __table_args__ = (
+        db.Index('ix_employee_last_name_id', 'last_name', 'id'),
+        db.Index('ix_employee_department_last_name_id', 'department', 'last_name', 'id'),
+    )
+    
     # Relationships
     educations = db.relationship('Education', backref='employee', lazy=True, cascade="all, delete-orphan")
     certifications = db.relationship('Certification', backref='employee', lazy=True, cascade="all, delete-orphan")
@@ -191,7 +633,8 @@ class Employee(db.Model):
     
     def get_profile_picture_url(self):
         """Get the URL for the profile picture, either from Google Drive or local storage."""
-        if self.drive_profile_pic_id and drive_helper and drive_helper.is_enabled():
+        if (self.drive_profile_pic_id and self.profile_picture_sync_status in (None, SYNC_SYNCED)
+                and drive_helper.available):
             # For Google Drive files, use the drive: prefix to indicate it's a Google Drive file
             return url_for('uploaded_file', filename=f'drive:{self.drive_profile_pic_id}')
         elif self.profile_picture:
@@ -204,20 +647,507 @@ class Employee(db.Model):
     def __repr__(self):
         return f'<Employee {self.first_name} {self.last_name}>'
 
-# Create database tables and default admin user
-with app.app_context():
-    db.create_all()
+# Whether each engine's database has the FTS5 search index, checked once per process
+search_index_state = {}
+
+def search_index_ready():
+    # Searches fall back to LIKE queries until init_db has created the index
+    engine = db.engine
+    if engine not in search_index_state:
+        search_index_state[engine] = search_index.search_index_exists(engine)
+    return search_index_state[engine]
+
+@cli_command
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    """Rebuild the employee full-text search index from the employee table."""
+    indexed = search_index.rebuild_search_index(db.engine)
+    search_index_state[db.engine] = indexed is not None
+    if indexed is None:
+        print("FTS5 is not available for this database; search uses LIKE queries.")
+    else:
+        print(f"Search index rebuilt with {indexed} employees.")
+
+# Keep Department.headcount in step with employee inserts, deletes and department changes
+@event.listens_for(db.session, 'before_flush')
+def track_department_headcounts(session, flush_context, instances):
+    deltas = {}
+    for obj in session.new:
+        if isinstance(obj, Employee) and obj.department:
+            deltas[obj.department] = deltas.get(obj.department, 0) + 1
+    for obj in session.dirty:
+        if isinstance(obj, Employee):
+            history = db.inspect(obj).attrs.department.history
+            if history.has_changes():
+                for name in history.deleted:
+                    deltas[name] = deltas.get(name, 0) - 1
+                for name in history.added:
+                    deltas[name] = deltas.get(name, 0) + 1
+    for obj in session.deleted:
+        if isinstance(obj, Employee):
+            history = db.inspect(obj).attrs.department.history
+            name = history.deleted[0] if history.deleted else obj.department
+            deltas[name] = deltas.get(name, 0) - 1
     
-    # Create default admin user if it doesn't exist
-    admin = User.query.filter_by(username='admin').first()
-    if not admin:
-        admin = User(username='admin', is_admin=True)
-        admin.set_password('admin')
-        db.session.add(admin)
-        db.session.commit()
-        print("Default admin user created")
+    deltas = {name: delta for name, delta in deltas.items() if name and delta}
+    if not deltas:
+        return
+    
+    pending = {obj.name: obj for obj in session.new if isinstance(obj, Department)}
+    persistent = session.query(Department).filter(Department.name.in_(list(deltas))).all()
+    for department in persistent:
+        # Applied as "headcount = headcount + delta" so concurrent writers don't lose updates
+        department.headcount = Department.headcount + deltas[department.name]
+    for name, department in pending.items():
+        if name in deltas:
+            department.headcount = (department.headcount or 0) + deltas[name]
+
+def ensure_department(name):
+    """Get the department with this name, creating it if it doesn't exist yet."""
+    department = Department.query.filter_by(name=name).first()
+    if not department:
+        department = Department(name=name, headcount=0)
+        db.session.add(department)
+        db.session.flush()
+    return department
+
+# Keep FileBlob.ref_count equal to the number of documents pointing at each blob
+@event.listens_for(db.session, 'before_flush')
+def track_blob_references(session, flush_context, instances):
+    deltas = {}
+    for obj in session.new:
+        if isinstance(obj, Document) and obj.blob_id:
+            deltas[obj.blob_id] = deltas.get(obj.blob_id, 0) + 1
+    for obj in session.dirty:
+        if isinstance(obj, Document):
+            history = db.inspect(obj).attrs.blob_id.history
+            if history.has_changes():
+                for blob_id in history.deleted:
+                    deltas[blob_id] = deltas.get(blob_id, 0) - 1
+                for blob_id in history.added:
+                    deltas[blob_id] = deltas.get(blob_id, 0) + 1
+    for obj in session.deleted:
+        if isinstance(obj, Document):
+            history = db.inspect(obj).attrs.blob_id.history
+            blob_id = history.deleted[0] if history.deleted else obj.blob_id
+            deltas[blob_id] = deltas.get(blob_id, 0) - 1
+    
+    deltas = {blob_id: delta for blob_id, delta in deltas.items() if blob_id and delta}
+    if not deltas:
+        return
+    
+    blobs = {blob.id: blob for blob in session.query(FileBlob).filter(FileBlob.id.in_(list(deltas)))}
+    for blob_id, delta in deltas.items():
+        if delta > 0 and blob_id not in blobs:
+            # The last reference was dropped and the blob removed after this session found it
+            # (see remove_released_blobs): put the row back; the file follows in place_blob_files
+            blob = session.identity_map.get(session.identity_key(FileBlob, blob_id))
+            if blob is not None:
+                session.execute(FileBlob.__table__.insert().values(
+                    id=blob.id, digest=blob.digest, path=blob.path, size=blob.size, ref_count=0,
+                    drive_file_id=blob.drive_file_id, created_at=blob.created_at
+                ))
+                blobs[blob_id] = blob
+    
+    released = session.info.setdefault('released_blobs', {})
+    for blob in blobs.values():
+        # Applied as "ref_count = ref_count + delta" so concurrent uploads don't lose references
+        blob.ref_count = FileBlob.ref_count + deltas[blob.id]
+        if deltas[blob.id] < 0:
+            released[blob.id] = blob.path
+
+# Move uploaded blob files into place once the flush taking their reference has run.
+# A concurrent remove_released_blobs either ran before (and the file is written again)
+# or sees the new reference and keeps the blob.
+@event.listens_for(db.session, 'after_flush')
+def place_blob_files(session, flush_context):
+    for temp_path, directory, name in session.info.pop('blob_files', []):
+        blob_store.store(temp_path, directory, name)
+
+# Remove blobs that lost their last reference once the deletes are committed
+@event.listens_for(db.session, 'after_commit')
+def remove_released_blobs(session):
+    released = session.info.pop('released_blobs', None)
+    if not released:
+        return
+    documents_folder = current_app.config['DOCUMENTS_FOLDER']
+    with db.engine.begin() as connection:
+        for blob_id, path in released.items():
+            # A concurrent upload may have referenced the blob again, so only unreferenced rows go.
+            # The file is removed before this transaction commits, while the row is still locked.
+            result = connection.execute(delete(FileBlob).where(FileBlob.id == blob_id, FileBlob.ref_count <= 0))
+            if result.rowcount:
+                blob_store.discard(os.path.join(documents_folder, path))
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_released_blobs(session):
+    session.info.pop('released_blobs', None)
+    for temp_path, _, _ in session.info.pop('blob_files', []):
+        blob_store.discard(temp_path)
+
+# Persistent store behind drive_folders. Uses its own connection so a job's
+# session isn't committed along with the cache.
+def load_drive_folder(parent_id, name):
+    with db.engine.connect() as connection:
+        return connection.execute(
+            db.select(DriveFolder.folder_id).where(DriveFolder.parent_id == (parent_id or ''), DriveFolder.name == name)
+        ).scalar()
+
+def save_drive_folder(parent_id, name, folder_id):
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(DriveFolder.__table__.insert().values(
+                parent_id=parent_id or '', name=name, folder_id=folder_id, created_at=datetime.utcnow()
+            ))
+    except IntegrityError:
+        # Another process stored the folder first: use its ID
+        return load_drive_folder(parent_id, name)
+    return folder_id
+
+def forget_drive_folder(parent_id, name, folder_id=None):
+    statement = delete(DriveFolder).where(DriveFolder.parent_id == (parent_id or ''), DriveFolder.name == name)
+    if folder_id is not None:
+        statement = statement.where(DriveFolder.folder_id == folder_id)
+    with db.engine.begin() as connection:
+        connection.execute(statement)
+
+# Content of just-queued uploads, for the workers of this process, and the workers themselves
+# (configured by create_app)
+pending_upload_content = PendingContent()
+drive_upload_workers = UploadWorkerPool(claim_drive_upload_job, run_drive_upload_job, workers=0)
+
+# Hand committed upload jobs to the workers
+@event.listens_for(db.session, 'after_commit')
+def notify_upload_workers(session):
+    jobs = session.info.pop('new_upload_jobs', None)
+    if not jobs:
+        return
+    # Content is only worth keeping if a worker of this process may run the job
+    if drive_upload_workers.running:
+        for job_id, content in jobs:
+            pending_upload_content.put(job_id, content)
+    drive_upload_workers.notify()
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_upload_jobs(session):
+    session.info.pop('new_upload_jobs', None)
+
+def store_document_blob(upload, tee=None):
+    """
+    Save an uploaded document in the blob store, keyed by its SHA-256 digest.
+    
+    The upload is read once: each chunk is hashed, written to a temporary file
+    and passed to tee. If a blob with the same digest exists, it (and its Google
+    Drive copy) is reused. The file is moved into place by the next flush.
+    
+    Args:
+        upload: Uploaded file (werkzeug FileStorage)
+        tee: Object with a write() method that also receives the content (optional)
+        
+    Returns:
+        (FileBlob, True if this upload created it, blob_store.copy_stream() stats);
+        point a Document's blob_id at the blob to take a reference
+    """
+    blobs_folder = os.path.join(current_app.config['DOCUMENTS_FOLDER'], BLOB_FOLDER)
+    digest, temp_path, stats = blob_store.write_hashed(upload.stream, blobs_folder, tee)
+    
+    blob = FileBlob.query.filter_by(digest=digest).first()
+    created = blob is None
+    if created:
+        name = blob_store.blob_name(digest, secure_filename(upload.filename))
+        blob = FileBlob(digest=digest, path=f'{BLOB_FOLDER}/{name}', size=stats['bytes'], ref_count=0)
+        db.session.add(blob)
+    
+    # The file is moved into place by the flush that records the reference (see
+    # place_blob_files), which also restores it if it went missing from disk
+    db.session.info.setdefault('blob_files', []).append((temp_path, blobs_folder, os.path.basename(blob.path)))
+    if created:
+        db.session.flush()
+    return blob, created, stats
 
-@app.route('/login', methods=['GET', 'POST'])
+# Department counts for the admin dashboard, read from the maintained headcounts
+def load_department_counts():
+    return db.session.query(Department.name, Department.headcount).all()
+
+dashboard_cache = DashboardStatsCache(load_department_counts)
+
+# Typeahead index of positions, built from the employee table on first use
+position_index = PositionPrefixIndex(
+    lambda: [row[0] for row in db.session.query(Employee.position).distinct()]
+)
+
+# Logged-in user lookups, shared between requests for a few seconds
+user_identity_cache = UserIdentityCache()
+
+# Drop cached identities once changes to users or employees are committed
+@event.listens_for(db.session, 'after_flush')
+def collect_identity_changes(session, flush_context):
+    changed = session.info.setdefault('identity_changes', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            changed.add(('user', obj.id))
+        elif isinstance(obj, Employee):
+            changed.add(('employee', obj.id))
+
+@event.listens_for(db.session, 'after_commit')
+def invalidate_identity_cache(session):
+    for kind, key in session.info.pop('identity_changes', ()):
+        if kind == 'user':
+            user_identity_cache.invalidate_user(key)
+        else:
+            user_identity_cache.invalidate_employee(key)
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_identity_changes(session):
+    session.info.pop('identity_changes', None)
+
+def get_current_user():
+    """
+    Get the logged-in User, loaded at most once per request.
+    
+    Sessions created before user_id was stored in the session fall back to
+    a lookup by username.
+    
+    Returns:
+        User or None
+    """
+    if 'current_user' not in g:
+        user = None
+        if session.get('user_id'):
+            user = db.session.get(User, session['user_id'])
+        elif session.get('username'):
+            user = User.query.filter_by(username=session['username']).first()
+            if user:
+                session['user_id'] = user.id
+        g.current_user = user
+    return g.current_user
+
+def get_current_employee():
+    """Get the Employee linked to the logged-in user, loaded at most once per request."""
+    if 'current_employee' not in g:
+        user = get_current_user()
+        g.current_employee = db.session.get(Employee, user.employee_id) if user and user.employee_id else None
+    return g.current_employee
+
+def get_current_identity():
+    """
+    Get a read-only snapshot of the logged-in user and their employee profile.
+    
+    Meant for authorization checks on hot paths such as /uploads, where a
+    profile page requests several files at once. Snapshots are kept in a
+    short-lived process cache keyed by user id, so repeated requests skip
+    the database entirely.
+    
+    Returns:
+        CurrentIdentity or None
+    """
+    if 'current_identity' not in g:
+        identity = None
+        user_id = session.get('user_id')
+        if user_id:
+            identity = user_identity_cache.get(user_id)
+        if identity is None:
+            user = get_current_user()
+            if user:
+                identity = identity_from(user, get_current_employee())
+                user_identity_cache.set(identity)
+        g.current_identity = identity
+    return g.current_identity
+
+def get_department_names():
+    # Sorted department names for dropdowns, served from the dashboard cache
+    return dashboard_cache.get()['departments']
+
+def load_employee_profile(employee_id, or_404=False):
+    """
+    Load an employee together with their education, certification and document rows.
+    
+    The child collections are fetched with selectinload, so a profile always costs
+    four queries no matter how many rows each collection holds.
+    
+    Args:
+        employee_id: Primary key of the employee
+        or_404: Abort with 404 instead of returning None when the employee doesn't exist
+        
+    Returns:
+        Employee with educations, certifications and documents loaded, or None
+    """
+    employee = Employee.query.options(
+        selectinload(Employee.educations),
+        selectinload(Employee.certifications),
+        selectinload(Employee.documents)
+    ).filter_by(id=employee_id).first()
+    if employee is None and or_404:
+        abort(404)
+    return employee
+
+def parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+def posted_row_indexes(form, field_prefix):
+    # Row indexes present in the form; entries removed in the browser leave gaps
+    indexes = set()
+    for key in form:
+        if key.startswith(field_prefix) and key[len(field_prefix):].isdigit():
+            indexes.add(int(key[len(field_prefix):]))
+    return sorted(indexes)
+
+def parse_education_rows(form):
+    """
+    Read the education entries posted by the employee forms.
+    
+    Returns:
+        List of (education_id or None, field dict) tuples
+    """
+    rows = []
+    for i in posted_row_indexes(form, 'institution_'):
+        if form.get(f'institution_{i}'):
+            rows.append((form.get(f'education_id_{i}', type=int), {
+                'institution': form.get(f'institution_{i}'),
+                'degree': form.get(f'degree_{i}'),
+                'field_of_study': form.get(f'field_of_study_{i}'),
+                'start_date': parse_date(form.get(f'edu_start_date_{i}')),
+                'end_date': parse_date(form.get(f'edu_end_date_{i}')),
+                'description': form.get(f'edu_description_{i}', '')
+            }))
+    return rows
+
+def parse_certification_rows(form):
+    """
+    Read the certification entries posted by the employee forms.
+    
+    Returns:
+        List of (certification_id or None, field dict) tuples
+    """
+    rows = []
+    for i in posted_row_indexes(form, 'cert_name_'):
+        if form.get(f'cert_name_{i}'):
+            rows.append((form.get(f'certification_id_{i}', type=int), {
+                'name': form.get(f'cert_name_{i}'),
+                'issuing_organization': form.get(f'issuing_organization_{i}'),
+                'issue_date': parse_date(form.get(f'issue_date_{i}')),
+                'expiry_date': parse_date(form.get(f'expiry_date_{i}')),
+                'credential_id': form.get(f'credential_id_{i}', ''),
+                'credential_url': form.get(f'credential_url_{i}', '')
+            }))
+    return rows
+
+def sync_child_rows(collection, model, posted_rows):
+    """
+    Apply posted form rows to an employee's child collection.
+    
+    Rows are matched on their id: unmatched posted rows are inserted, matched rows
+    only have changed fields written, and existing rows missing from the form are
+    deleted. Saving an unchanged form therefore writes no child rows.
+    
+    Args:
+        collection: Loaded relationship list, e.g. employee.educations
+        model: Child model class used for new rows
+        posted_rows: Output of parse_education_rows or parse_certification_rows
+    """
+    existing = {row.id: row for row in collection}
+    kept = set()
+    for row_id, fields in posted_rows:
+        row = existing.get(row_id)
+        if row is None or row_id in kept:
+            collection.append(model(**fields))
+            continue
+        
+        kept.add(row_id)
+        for name, value in fields.items():
+            # Empty strings and NULLs render the same in the forms
+            if (getattr(row, name) or None) != (value or None):
+                setattr(row, name, value)
+    
+    for row_id, row in existing.items():
+        if row_id not in kept:
+            collection.remove(row)  # delete-orphan cascade deletes the row
+
+# Columns needed to render employee listings (skips notes and other wide columns)
+LISTING_COLUMNS = ('id', 'employee_id', 'first_name', 'last_name', 'email', 'department', 'position', 'hire_date')
+
+def encode_cursor(last_name, employee_id):
+    raw = json.dumps([last_name, employee_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        last_name, employee_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return str(last_name), int(employee_id)
+    except (ValueError, TypeError):
+        return None
+
+def get_page_size():
+    default = current_app.config.get('EMPLOYEES_PAGE_SIZE', 50)
+    maximum = current_app.config.get('EMPLOYEES_MAX_PAGE_SIZE', 500)
+    try:
+        page_size = int(request.args.get('per_page', default))
+    except ValueError:
+        page_size = default
+    return max(1, min(page_size, maximum))
+
+def paginate_employees(query):
+    """
+    Keyset-paginate an employee query on (last_name, id).
+    
+    Reads the 'after', 'before' and 'per_page' request arguments. Only the
+    listing columns are loaded, so each page costs one bounded index range scan.
+    
+    Args:
+        query: Employee query with any filters already applied
+        
+    Returns:
+        Tuple of (employees, next_cursor, prev_cursor, page_size)
+    """
+    page_size = get_page_size()
+    after = decode_cursor(request.args.get('after'))
+    before = decode_cursor(request.args.get('before'))
+    
+    query = query.options(load_only(*[getattr(Employee, column) for column in LISTING_COLUMNS]))
+    sort_key = db.tuple_(Employee.last_name, Employee.id)
+    
+    if before:
+        # Walk backwards from the cursor, then restore ascending order
+        rows = query.filter(sort_key < before).order_by(
+            Employee.last_name.desc(), Employee.id.desc()
+        ).limit(page_size + 1).all()
+        has_prev = len(rows) > page_size
+        has_next = True
+        employees = list(reversed(rows[:page_size]))
+    else:
+        if after:
+            query = query.filter(sort_key > after)
+        rows = query.order_by(Employee.last_name, Employee.id).limit(page_size + 1).all()
+        has_next = len(rows) > page_size
+        has_prev = after is not None
+        employees = rows[:page_size]
+    
+    next_cursor = encode_cursor(employees[-1].last_name, employees[-1].id) if employees and has_next else None
+    prev_cursor = encode_cursor(employees[0].last_name, employees[0].id) if employees and has_prev else None
+    return employees, next_cursor, prev_cursor, page_size
+
+def employee_page_json(employees, next_cursor, prev_cursor, page_size):
+    return jsonify({
+        'employees': [{
+            'id': employee.id,
+            'employee_id': employee.employee_id,
+            'first_name': employee.first_name,
+            'last_name': employee.last_name,
+            'email': employee.email,
+            'department': employee.department,
+            'position': employee.position,
+            'hire_date': employee.hire_date.isoformat() if employee.hire_date else None
+        } for employee in employees],
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor,
+        'per_page': page_size
+    })
+
+@route('/login', methods=['GET', 'POST'])
 def login():
     # If user is already logged in, redirect to index
     if 'logged_in' in session:
@@ -241,15 +1171,16 @@ def login():
     
     return render_template('login.html')
 
-@app.route('/logout')
+@route('/logout')
 def logout():
     session.pop('logged_in', None)
     session.pop('username', None)
     session.pop('is_admin', None)
+    session.pop('user_id', None)
     flash('You have been logged out', 'info')
     return redirect(url_for('login'))
 
-@app.route('/admin/create-user', methods=['GET', 'POST'])
+@route('/admin/create-user', methods=['GET', 'POST'])
 @login_required
 def create_user():
     # Check if user is admin
@@ -307,7 +1238,7 @@ def create_user():
     
     return render_template('create_user.html')
 
-@app.route('/')
+@route('/')
 @login_required
 def index():
     # Check if user is logged in
@@ -317,52 +1248,49 @@ def index():
     # Check if user is admin
     if session.get('is_admin', False):
         # Admin dashboard
-        # Get all unique departments
-        departments = db.session.query(Employee.department).distinct().all()
-        departments = [dept[0] for dept in departments]
-        
-        # Count employees per department and total
-        department_counts = {}
-        total_employees = 0
-        
-        for dept in departments:
-            count = Employee.query.filter_by(department=dept).count()
-            department_counts[dept] = count
-            total_employees += count
+        # Departments, per-department counts and total come from the cached aggregates
+        stats = dashboard_cache.get()
         
         return render_template('index.html', 
-                              departments=departments, 
-                              department_counts=department_counts,
-                              total_employees=total_employees)
+                              departments=stats['departments'], 
+                              department_counts=stats['department_counts'],
+                              total_employees=stats['total_employees'])
     else:
         # Employee dashboard
         # Get the current user
-        user = User.query.filter_by(username=session.get('username')).first()
+        identity = get_current_identity()
         
         # Check if user has an employee profile
-        if user and user.employee_id:
-            employee = db.session.get(Employee, user.employee_id)
+        if identity and identity.employee_pk:
+            employee = load_employee_profile(identity.employee_pk)
             if employee:
-                educations = Education.query.filter_by(employee_id=employee.id).all()
-                certifications = Certification.query.filter_by(employee_id=employee.id).all()
-                documents = Document.query.filter_by(employee_id=employee.id).all()
                 return render_template('employee_dashboard.html', 
                                       employee=employee, 
-                                      educations=educations, 
-                                      certifications=certifications,
-                                      documents=documents)
+                                      educations=employee.educations, 
+                                      certifications=employee.certifications,
+                                      documents=employee.documents)
         
         # Redirect to self-onboarding if no profile exists
         flash('Please complete your profile information', 'info')
         return redirect(url_for('self_onboarding'))
 
-@app.route('/department/<department>')
+@route('/department/<department>')
 @login_required
 def department_employees(department):
-    employees = Employee.query.filter_by(department=department).all()
-    return render_template('department_employees.html', department=department, employees=employees)
+    employees, next_cursor, prev_cursor, page_size = paginate_employees(Employee.query.filter_by(department=department))
+    if request.args.get('format') == 'json':
+        return employee_page_json(employees, next_cursor, prev_cursor, page_size)
+    
+    total_employees = dashboard_cache.get()['department_counts'].get(department, 0)
+    return render_template('department_employees.html', 
+                          department=department, 
+                          employees=employees,
+                          total_employees=total_employees,
+                          next_cursor=next_cursor,
+                          prev_cursor=prev_cursor,
+                          per_page=page_size)
 
-@app.route('/add-department', methods=['GET', 'POST'])
+@route('/add-department', methods=['GET', 'POST'])
 @admin_required
 def add_department():
     if request.method == 'POST':
@@ -373,69 +1301,68 @@ def add_department():
             return redirect(url_for('add_department'))
         
         # Check if department already exists
-        existing_departments = db.session.query(Employee.department).distinct().all()
-        existing_departments = [dept[0] for dept in existing_departments if dept[0]]
-        
-        if department_name in existing_departments:
+        if Department.query.filter_by(name=department_name).first():
             flash(f'Department "{department_name}" already exists', 'warning')
             return redirect(url_for('index'))
         
-        # Create a placeholder employee to establish the department
-        placeholder = Employee(
-            first_name="Department",
-            last_name="Placeholder",
-            email=f"{department_name.lower().replace(' ', '.')}@example.com",
-            phone="N/A",
-            department=department_name,
-            position="Department Head",
-            hire_date=datetime.now(timezone.utc),
-            salary=0,
-            current_address="N/A",
-            permanent_address="N/A",
-            notes="This is a placeholder record to establish the department. You can delete this record after adding real employees to this department."
-        )
-        
-        db.session.add(placeholder)
+        db.session.add(Department(name=department_name, headcount=0))
         db.session.commit()
+        dashboard_cache.invalidate()
         
         flash(f'Department "{department_name}" has been added successfully', 'success')
         return redirect(url_for('index'))
     
     return render_template('add_department.html')
 
-@app.route('/search')
+@route('/search')
 @login_required
 def search_employees():
     query = request.args.get('query', '')
     if not query:
         return redirect(url_for('index'))
     
-    # Search by name or position
-    employees = Employee.query.filter(
-        db.or_(
-            Employee.first_name.ilike(f'%{query}%'),
-            Employee.last_name.ilike(f'%{query}%'),
-            Employee.position.ilike(f'%{query}%')
+    if search_index_ready():
+        # Ranked full-text search over name, position, department, email and employee ID
+        employee_ids = search_index.search_employee_ids(
+            db.session.connection(), query, limit=current_app.config.get('SEARCH_RESULTS_LIMIT', 100)
         )
-    ).all()
+        rows = Employee.query.options(
+            load_only(*[getattr(Employee, column) for column in LISTING_COLUMNS])
+        ).filter(Employee.id.in_(employee_ids)).all() if employee_ids else []
+        ranking = {employee_id: rank for rank, employee_id in enumerate(employee_ids)}
+        employees = sorted(rows, key=lambda employee: ranking[employee.id])
+    else:
+        # Search by name or position
+        employees = Employee.query.filter(
+            db.or_(
+                Employee.first_name.ilike(f'%{query}%'),
+                Employee.last_name.ilike(f'%{query}%'),
+                Employee.position.ilike(f'%{query}%')
+            )
+        ).all()
     
     return render_template('search_results.html', employees=employees, query=query)
 
-@app.route('/positions')
+@route('/positions')
 @login_required
 def get_positions():
     query = request.args.get('q', '')
-    positions = db.session.query(Employee.position).distinct().filter(
-        Employee.position.ilike(f'%{query}%')
-    ).all()
-    return jsonify([position[0] for position in positions])
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 100)
+    except ValueError:
+        limit = 10
+    
+    response = jsonify(position_index.search(query, limit=limit))
+    # Let the browser reuse typeahead responses for repeated keystrokes
+    response.cache_control.private = True
+    response.cache_control.max_age = current_app.config.get('POSITIONS_CACHE_MAX_AGE', 60)
+    return response
 
-@app.route('/add', methods=['GET', 'POST'])
+@route('/add', methods=['GET', 'POST'])
 @admin_required
 def add_employee():
-    # Get all unique departments for the dropdown
-    departments = db.session.query(Employee.department).distinct().all()
-    departments = [dept[0] for dept in departments]
+    # Get all departments for the dropdown
+    departments = get_department_names()
     
     # Add default departments if none exist
     if not departments:
@@ -481,6 +1408,9 @@ def add_employee():
                 flash('Employee ID already exists!', 'danger')
                 return redirect(url_for('add_employee'))
         
+        # Create the department on first use (e.g. one of the defaults)
+        ensure_department(department)
+        
         # Create new employee
         new_employee = Employee(
             employee_id=employee_id,
@@ -501,81 +1431,32 @@ def add_employee():
         db.session.add(new_employee)
         db.session.commit()
         
-        # Process education information if provided
-        education_count = int(request.form.get('education_count', 0))
-        for i in range(education_count):
-            if request.form.get(f'institution_{i}'):
-                institution = request.form.get(f'institution_{i}')
-                degree = request.form.get(f'degree_{i}')
-                field_of_study = request.form.get(f'field_of_study_{i}')
-                start_date_str = request.form.get(f'edu_start_date_{i}')
-                end_date_str = request.form.get(f'edu_end_date_{i}')
-                description = request.form.get(f'edu_description_{i}', '')
-                
-                # Convert string dates to datetime objects
-                start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date() if start_date_str else None
-                end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str else None
-                
-                education = Education(
-                    employee_id=new_employee.id,
-                    institution=institution,
-                    degree=degree,
-                    field_of_study=field_of_study,
-                    start_date=start_date,
-                    end_date=end_date,
-                    description=description
-                )
-                db.session.add(education)
-        
-        # Process certification information if provided
-        cert_count = int(request.form.get('certification_count', 0))
-        for i in range(cert_count):
-            if request.form.get(f'cert_name_{i}'):
-                name = request.form.get(f'cert_name_{i}')
-                issuing_organization = request.form.get(f'issuing_organization_{i}')
-                issue_date_str = request.form.get(f'issue_date_{i}')
-                expiry_date_str = request.form.get(f'expiry_date_{i}')
-                credential_id = request.form.get(f'credential_id_{i}', '')
-                credential_url = request.form.get(f'credential_url_{i}', '')
-                
-                # Convert string dates to datetime objects
-                issue_date = datetime.strptime(issue_date_str, '%Y-%m-%d').date() if issue_date_str else None
-                expiry_date = datetime.strptime(expiry_date_str, '%Y-%m-%d').date() if expiry_date_str else None
-                
-                certification = Certification(
-                    employee_id=new_employee.id,
-                    name=name,
-                    issuing_organization=issuing_organization,
-                    issue_date=issue_date,
-                    expiry_date=expiry_date,
-                    credential_id=credential_id,
-                    credential_url=credential_url
-                )
-                db.session.add(certification)
+        # Process education and certification information if provided
+        sync_child_rows(new_employee.educations, Education, parse_education_rows(request.form))
+        sync_child_rows(new_employee.certifications, Certification, parse_certification_rows(request.form))
         
         db.session.commit()
+        dashboard_cache.invalidate()
+        position_index.add(position)
         
         flash('Employee added successfully!', 'success')
         return redirect(url_for('index'))
     
     return render_template('add_employee.html', departments=departments)
 
-@app.route('/employee/<int:id>')
+@route('/employee/<int:id>')
 @login_required
 def employee_details(id):
-    employee = Employee.query.get_or_404(id)
-    educations = Education.query.filter_by(employee_id=id).all()
-    certifications = Certification.query.filter_by(employee_id=id).all()
-    return render_template('employee_details.html', employee=employee, educations=educations, certifications=certifications)
+    employee = load_employee_profile(id, or_404=True)
+    return render_template('employee_details.html', employee=employee, educations=employee.educations, certifications=employee.certifications)
 
-@app.route('/employee/<int:id>/edit', methods=['GET', 'POST'])
+@route('/employee/<int:id>/edit', methods=['GET', 'POST'])
 @admin_required
 def edit_employee(id):
-    employee = Employee.query.get_or_404(id)
+    employee = load_employee_profile(id, or_404=True)
     
-    # Get all unique departments for the dropdown
-    departments = db.session.query(Employee.department).distinct().all()
-    departments = [dept[0] for dept in departments]
+    # Get all departments for the dropdown
+    departments = get_department_names()
     
     if request.method == 'POST':
         # Check if employee_id is being changed and if it already exists
@@ -591,7 +1472,7 @@ def edit_employee(id):
         employee.last_name = request.form['last_name']
         employee.email = request.form['email']
         employee.phone = request.form['phone']
-        employee.department = request.form['department']
+        employee.department = ensure_department(request.form['department']).name
         employee.position = request.form['position']
         employee.hire_date = datetime.strptime(request.form['hire_date'], '%Y-%m-%d').date()
         employee.current_address = request.form['current_address']
@@ -607,90 +1488,43 @@ def edit_employee(id):
         except ValueError:
             employee.salary = 0
         
-        # Update education information
-        # First, remove all existing education records for this employee
-        Education.query.filter_by(employee_id=employee.id).delete()
-        
-        # Then add the new education records
-        education_count = int(request.form.get('education_count', 0))
-        for i in range(education_count):
-            if request.form.get(f'institution_{i}'):
-                institution = request.form.get(f'institution_{i}')
-                degree = request.form.get(f'degree_{i}')
-                field_of_study = request.form.get(f'field_of_study_{i}')
-                start_date_str = request.form.get(f'edu_start_date_{i}')
-                end_date_str = request.form.get(f'edu_end_date_{i}')
-                description = request.form.get(f'edu_description_{i}', '')
-                
-                # Convert string dates to datetime objects
-                start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date() if start_date_str else None
-                end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str else None
-                
-                education = Education(
-                    employee_id=employee.id,
-                    institution=institution,
-                    degree=degree,
-                    field_of_study=field_of_study,
-                    start_date=start_date,
-                    end_date=end_date,
-                    description=description
-                )
-                db.session.add(education)
-        
-        # Update certification information
-        # First, remove all existing certification records for this employee
-        Certification.query.filter_by(employee_id=employee.id).delete()
-        
-        # Then add the new certification records
-        cert_count = int(request.form.get('certification_count', 0))
-        for i in range(cert_count):
-            if request.form.get(f'cert_name_{i}'):
-                name = request.form.get(f'cert_name_{i}')
-                issuing_organization = request.form.get(f'issuing_organization_{i}')
-                issue_date_str = request.form.get(f'issue_date_{i}')
-                expiry_date_str = request.form.get(f'expiry_date_{i}')
-                credential_id = request.form.get(f'credential_id_{i}', '')
-                credential_url = request.form.get(f'credential_url_{i}', '')
-                
-                # Convert string dates to datetime objects
-                issue_date = datetime.strptime(issue_date_str, '%Y-%m-%d').date() if issue_date_str else None
-                expiry_date = datetime.strptime(expiry_date_str, '%Y-%m-%d').date() if expiry_date_str else None
-                
-                certification = Certification(
-                    employee_id=employee.id,
-                    name=name,
-                    issuing_organization=issuing_organization,
-                    issue_date=issue_date,
-                    expiry_date=expiry_date,
-                    credential_id=credential_id,
-                    credential_url=credential_url
-                )
-                db.session.add(certification)
+        # Apply education and certification changes as inserts, updates and deletes
+        sync_child_rows(employee.educations, Education, parse_education_rows(request.form))
+        sync_child_rows(employee.certifications, Certification, parse_certification_rows(request.form))
         
         db.session.commit()
+        dashboard_cache.invalidate()
+        position_index.add(employee.position)
         flash('Employee updated successfully!', 'success')
         return redirect(url_for('employee_details', id=employee.id))
     
-    educations = Education.query.filter_by(employee_id=id).all()
-    certifications = Certification.query.filter_by(employee_id=id).all()
-    return render_template('edit_employee.html', employee=employee, departments=departments, educations=educations, certifications=certifications)
+    return render_template('edit_employee.html', employee=employee, departments=departments, educations=employee.educations, certifications=employee.certifications)
 
-@app.route('/employee/<int:id>/delete', methods=['POST'])
+@route('/employee/<int:id>/delete', methods=['POST'])
 @admin_required
 def delete_employee(id):
     employee = Employee.query.get_or_404(id)
     db.session.delete(employee)
     db.session.commit()
+    dashboard_cache.invalidate()
     flash('Employee deleted successfully!', 'success')
     return redirect(url_for('index'))
 
-@app.route('/all-employees')
+@route('/all-employees')
 @login_required
 def all_employees():
-    employees = Employee.query.all()
-    return render_template('all_employees.html', employees=employees)
+    employees, next_cursor, prev_cursor, page_size = paginate_employees(Employee.query)
+    if request.args.get('format') == 'json':
+        return employee_page_json(employees, next_cursor, prev_cursor, page_size)
+    
+    return render_template('all_employees.html', 
+                          employees=employees,
+                          total_employees=dashboard_cache.get()['total_employees'],
+                          next_cursor=next_cursor,
+                          prev_cursor=prev_cursor,
+                          per_page=page_size)
 
-@app.route('/self-onboarding', methods=['GET', 'POST'])
+@route('/self-onboarding', methods=['GET', 'POST'])
 @login_required
 def self_onboarding():
     # Check if user is an employee (not admin)
@@ -699,7 +1533,7 @@ def self_onboarding():
         return redirect(url_for('index'))
     
     # Get the current user
-    user = User.query.filter_by(username=session.get('username')).first()
+    user = get_current_user()
     
     if not user:
         flash('User not found. Please log in again.', 'danger')
@@ -707,14 +1541,10 @@ def self_onboarding():
     
     # Check if user already has an employee profile
     if user.employee_id:
-        employee = db.session.get(Employee, user.employee_id)
-        educations = Education.query.filter_by(employee_id=employee.id).all()
-        certifications = Certification.query.filter_by(employee_id=employee.id).all()
-        documents = Document.query.filter_by(employee_id=employee.id).all()
+        employee = load_employee_profile(user.employee_id)
         
-        # Get all unique departments for the dropdown
-        departments = db.session.query(Employee.department).distinct().all()
-        departments = [dept[0] for dept in departments]
+        # Get all departments for the dropdown
+        departments = get_department_names()
         
         if request.method == 'POST':
             # Update employee information
@@ -729,10 +1559,10 @@ def self_onboarding():
             # Handle profile picture upload
             if 'profile_picture' in request.files and request.files['profile_picture'].filename:
                 profile_pic = request.files['profile_picture']
-                if profile_pic and allowed_file(profile_pic.filename, app.config['ALLOWED_IMAGE_EXTENSIONS']):
+                if profile_pic and allowed_file(profile_pic.filename, current_app.config['ALLOWED_IMAGE_EXTENSIONS']):
                     try:
                         # Create employee folder if it doesn't exist
-                        employee_folder = os.path.join(app.config['PROFILE_PICTURES_FOLDER'], f"{employee.employee_id}_{employee.first_name}_{employee.last_name}")
+                        employee_folder = os.path.join(current_app.config['PROFILE_PICTURES_FOLDER'], f"{employee.employee_id}_{employee.first_name}_{employee.last_name}")
                         os.makedirs(employee_folder, exist_ok=True)
                         
                         # Generate unique filename
@@ -741,10 +1571,15 @@ def self_onboarding():
                         file_path = os.path.join(employee_folder, unique_filename)
                         
                         # Save the file in chunks to handle large files
-                        profile_pic.save(file_path)
+                        buffer = drive_upload_buffer()
+                        stats = blob_store.save_stream(profile_pic.stream, file_path, tee=buffer)
+                        record_upload('profile_picture', stats)
                         
                         # Update employee record with the new profile picture
                         employee.profile_picture = os.path.join(f"{employee.employee_id}_{employee.first_name}_{employee.last_name}", unique_filename)
+                        
+                        # Copy to Google Drive after the commit; the new picture is served locally until then
+                        queue_drive_upload(employee, file_path, unique_filename, profile_pic.content_type, buffer=buffer)
                     except Exception as e:
                         flash(f'Error uploading profile picture: {str(e)}', 'danger')
             
@@ -752,90 +1587,34 @@ def self_onboarding():
             for doc_type in ['certificate', 'experience_letter', 'offer_letter']:
                 if doc_type in request.files and request.files[doc_type].filename:
                     doc_file = request.files[doc_type]
-                    if doc_file and allowed_file(doc_file.filename, app.config['ALLOWED_DOCUMENT_EXTENSIONS']):
+                    if doc_file and allowed_file(doc_file.filename, current_app.config['ALLOWED_DOCUMENT_EXTENSIONS']):
                         try:
-                            # Create employee document folder if it doesn't exist
-                            employee_folder = os.path.join(app.config['DOCUMENTS_FOLDER'], f"{employee.employee_id}_{employee.first_name}_{employee.last_name}")
-                            os.makedirs(employee_folder, exist_ok=True)
-                            
-                            # Generate unique filename
+                            # Store the content once, however many times it's uploaded
                             filename = secure_filename(doc_file.filename)
-                            unique_filename = f"{doc_type}_{uuid.uuid4().hex}_{filename}"
-                            file_path = os.path.join(employee_folder, unique_filename)
-                            
-                            # Save the file in chunks to handle large files
-                            doc_file.save(file_path)
+                            buffer = drive_upload_buffer()
+                            blob, created, stats = store_document_blob(doc_file, tee=buffer)
+                            record_upload('document', stats, deduplicated=not created)
                             
                             # Create document record
                             document = Document(
                                 employee_id=employee.id,
-                                filename=os.path.join(f"{employee.employee_id}_{employee.first_name}_{employee.last_name}", unique_filename),
+                                filename=blob.path,
                                 original_filename=filename,
-                                document_type=doc_type
+                                document_type=doc_type,
+                                blob_id=blob.id,
+                                blob=blob
                             )
                             db.session.add(document)
+                            
+                            # Copy to Google Drive after the commit, unless the content is already there
+                            queue_drive_upload(employee, os.path.join(current_app.config['DOCUMENTS_FOLDER'], blob.path),
+                                               f"{doc_type}_{filename}", doc_file.content_type, document, buffer)
                         except Exception as e:
                             flash(f'Error uploading {doc_type}: {str(e)}', 'danger')
             
-            # Update education information
-            # First, remove all existing education records for this employee
-            Education.query.filter_by(employee_id=employee.id).delete()
-            
-            # Then add the new education records
-            education_count = int(request.form.get('education_count', 0))
-            for i in range(education_count):
-                if request.form.get(f'institution_{i}'):
-                    institution = request.form.get(f'institution_{i}')
-                    degree = request.form.get(f'degree_{i}')
-                    field_of_study = request.form.get(f'field_of_study_{i}')
-                    start_date_str = request.form.get(f'edu_start_date_{i}')
-                    end_date_str = request.form.get(f'edu_end_date_{i}')
-                    description = request.form.get(f'edu_description_{i}', '')
-                    
-                    # Convert string dates to datetime objects
-                    start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date() if start_date_str else None
-                    end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str else None
-                    
-                    education = Education(
-                        employee_id=employee.id,
-                        institution=institution,
-                        degree=degree,
-                        field_of_study=field_of_study,
-                        start_date=start_date,
-                        end_date=end_date,
-                        description=description
-                    )
-                    db.session.add(education)
-            
-            # Update certification information
-            # First, remove all existing certification records for this employee
-            Certification.query.filter_by(employee_id=employee.id).delete()
-            
-            # Then add the new certification records
-            cert_count = int(request.form.get('certification_count', 0))
-            for i in range(cert_count):
-                if request.form.get(f'cert_name_{i}'):
-                    name = request.form.get(f'cert_name_{i}')
-                    issuing_organization = request.form.get(f'issuing_organization_{i}')
-                    issue_date_str = request.form.get(f'issue_date_{i}')
-                    expiry_date_str = request.form.get(f'expiry_date_{i}')
-                    credential_id = request.form.get(f'credential_id_{i}', '')
-                    credential_url = request.form.get(f'credential_url_{i}', '')
-                    
-                    # Convert string dates to datetime objects
-                    issue_date = datetime.strptime(issue_date_str, '%Y-%m-%d').date() if issue_date_str else None
-                    expiry_date = datetime.strptime(expiry_date_str, '%Y-%m-%d').date() if expiry_date_str else None
-                    
-                    certification = Certification(
-                        employee_id=employee.id,
-                        name=name,
-                        issuing_organization=issuing_organization,
-                        issue_date=issue_date,
-                        expiry_date=expiry_date,
-                        credential_id=credential_id,
-                        credential_url=credential_url
-                    )
-                    db.session.add(certification)
+            # Apply education and certification changes as inserts, updates and deletes
+            sync_child_rows(employee.educations, Education, parse_education_rows(request.form))
+            sync_child_rows(employee.certifications, Certification, parse_certification_rows(request.form))
             
             db.session.commit()
             flash('Your profile has been updated successfully!', 'success')
@@ -844,9 +1623,9 @@ def self_onboarding():
         return render_template('self_onboarding.html', 
                               employee=employee, 
                               departments=departments, 
-                              educations=educations, 
-                              certifications=certifications,
-                              documents=documents)
+                              educations=employee.educations, 
+                              certifications=employee.certifications,
+                              documents=employee.documents)
     else:
         # User doesn't have an employee profile yet, create a basic one
         if request.method == 'POST':
@@ -857,7 +1636,7 @@ def self_onboarding():
                 last_name=request.form['last_name'],
                 email=request.form['email'],
                 phone=request.form['phone'],
-                department=request.form.get('department', 'Unassigned'),
+                department=ensure_department(request.form.get('department', 'Unassigned')).name,
                 position=request.form.get('position', 'New Hire'),
                 hire_date=datetime.now(timezone.utc).date(),
                 current_address=request.form['current_address'],
@@ -866,76 +1645,36 @@ def self_onboarding():
                 notes=''
             )
             
-            # Add to database
+            # Add to database. Everything below is committed at once, so a failure
+            # doesn't leave a half-created profile; the flush assigns the employee ID.
             db.session.add(new_employee)
-            db.session.commit()
+            db.session.flush()
             
             # Link employee to user
             user.employee_id = new_employee.id
-            db.session.commit()
             
             # Handle profile picture upload
             if 'profile_picture' in request.files and request.files['profile_picture'].filename:
                 profile_pic = request.files['profile_picture']
-                if profile_pic and allowed_file(profile_pic.filename, app.config['ALLOWED_IMAGE_EXTENSIONS']):
+                if profile_pic and allowed_file(profile_pic.filename, current_app.config['ALLOWED_IMAGE_EXTENSIONS']):
                     try:
                         # Generate unique filename
                         filename = secure_filename(profile_pic.filename)
                         unique_filename = f"{uuid.uuid4().hex}_{filename}"
                         
-                        # Check if Google Drive is enabled
-                        drive_file_id = None
-                        if app.config.get('GOOGLE_DRIVE_ENABLED', False) and drive_helper.is_enabled():
-                            # Create or get employee folder in Google Drive
-                            employee_folder_name = f"{new_employee.employee_id}_{new_employee.first_name}_{new_employee.last_name}"
-                            
-                            if not new_employee.drive_folder_id:
-                                employee_folder_id = drive_helper.create_folder(
-                                    folder_name=employee_folder_name, 
-                                    parent_id=drive_helper.root_folder_id
-                                )
-                                # Update employee record with folder ID
-                                new_employee.drive_folder_id = employee_folder_id
-                                db.session.commit()
-                            else:
-                                employee_folder_id = new_employee.drive_folder_id
-                            
-                            # Upload profile picture to Google Drive
-                            # Save file temporarily to disk
-                            temp_file_path = os.path.join(app.config['PROFILE_PICTURES_FOLDER'], 'temp', unique_filename)
-                            os.makedirs(os.path.dirname(temp_file_path), exist_ok=True)
-                            profile_pic.save(temp_file_path)
-                            
-                            # Upload to Google Drive
-                            drive_file_id = drive_helper.upload_file(
-                                file_path=temp_file_path,
-                                file_name=unique_filename,
-                                parent_folder_id=employee_folder_id,
-                                mime_type=profile_pic.content_type
-                            )
-                            
-                            # Make the file publicly accessible
-                            if drive_file_id:
-                                drive_helper.make_file_public(drive_file_id)
-                            
-                            # Remove temporary file
-                            try:
-                                os.remove(temp_file_path)
-                            except:
-                                pass
-                            
-                            # Update employee record with the Drive file ID
-                            new_employee.drive_profile_pic_id = drive_file_id
-                        
-                        # Also save locally as backup
-                        employee_folder = os.path.join(app.config['PROFILE_PICTURES_FOLDER'], f"{new_employee.employee_id}_{new_employee.first_name}_{new_employee.last_name}")
+                        # Save locally first, so the picture is served while Google Drive catches up
+                        employee_folder = os.path.join(current_app.config['PROFILE_PICTURES_FOLDER'], f"{new_employee.employee_id}_{new_employee.first_name}_{new_employee.last_name}")
                         os.makedirs(employee_folder, exist_ok=True)
                         file_path = os.path.join(employee_folder, unique_filename)
-                        profile_pic.save(file_path)
+                        buffer = drive_upload_buffer()
+                        stats = blob_store.save_stream(profile_pic.stream, file_path, tee=buffer)
+                        record_upload('profile_picture', stats)
                         
                         # Update employee record with the new profile picture
                         new_employee.profile_picture = os.path.join(f"{new_employee.employee_id}_{new_employee.first_name}_{new_employee.last_name}", unique_filename)
-                        db.session.commit()
+                        
+                        # Copy to Google Drive after the commit; the new picture is served locally until then
+                        queue_drive_upload(new_employee, file_path, unique_filename, profile_pic.content_type, buffer=buffer)
                     except Exception as e:
                         flash(f'Error uploading profile picture: {str(e)}', 'danger')
             
@@ -943,133 +1682,45 @@ def self_onboarding():
             for doc_type in ['certificate', 'experience_letter', 'offer_letter']:
                 if doc_type in request.files and request.files[doc_type].filename:
                     doc_file = request.files[doc_type]
-                    if doc_file and allowed_file(doc_file.filename, app.config['ALLOWED_DOCUMENT_EXTENSIONS']):
+                    if doc_file and allowed_file(doc_file.filename, current_app.config['ALLOWED_DOCUMENT_EXTENSIONS']):
                         try:
-                            # Generate unique filename
+                            # Save locally first, so the document is served while Google Drive catches up.
+                            # The content is stored once, however many times it's uploaded.
                             filename = secure_filename(doc_file.filename)
-                            unique_filename = f"{doc_type}_{uuid.uuid4().hex}_{filename}"
-                            
-                            # Check if Google Drive is enabled
-                            drive_file_id = None
-                            if app.config.get('GOOGLE_DRIVE_ENABLED', False) and drive_helper.is_enabled():
-                                # Create employee folder in Google Drive if it doesn't exist
-                                employee_folder_name = f"{new_employee.employee_id}_{new_employee.first_name}_{new_employee.last_name}"
-                                
-                                # Create or get employee folder in Google Drive
-                                if not new_employee.drive_folder_id:
-                                    employee_folder_id = drive_helper.create_folder(
-                                        folder_name=employee_folder_name, 
-                                        parent_id=drive_helper.root_folder_id
-                                    )
-                                    # Update employee record with folder ID
-                                    new_employee.drive_folder_id = employee_folder_id
-                                    db.session.commit()
-                                else:
-                                    employee_folder_id = new_employee.drive_folder_id
-                                
-                                # Upload file to Google Drive
-                                # Save file temporarily to disk
-                                temp_file_path = os.path.join(app.config['DOCUMENTS_FOLDER'], 'temp', unique_filename)
-                                os.makedirs(os.path.dirname(temp_file_path), exist_ok=True)
-                                doc_file.save(temp_file_path)
-                                
-                                # Upload to Google Drive
-                                drive_file_id = drive_helper.upload_file(
-                                    file_path=temp_file_path,
-                                    file_name=unique_filename,
-                                    parent_folder_id=employee_folder_id,
-                                    mime_type=doc_file.content_type
-                                )
-                                
-                                # Make the file publicly accessible
-                                if drive_file_id:
-                                    drive_helper.make_file_public(drive_file_id)
-                                
-                                # Remove temporary file
-                                try:
-                                    os.remove(temp_file_path)
-                                except:
-                                    pass
-                            
-                            # Also save locally as backup
-                            employee_folder = os.path.join(app.config['DOCUMENTS_FOLDER'], f"{new_employee.employee_id}_{new_employee.first_name}_{new_employee.last_name}")
-                            os.makedirs(employee_folder, exist_ok=True)
-                            file_path = os.path.join(employee_folder, unique_filename)
-                            doc_file.save(file_path)
+                            buffer = drive_upload_buffer()
+                            blob, created, stats = store_document_blob(doc_file, tee=buffer)
+                            file_path = os.path.join(current_app.config['DOCUMENTS_FOLDER'], blob.path)
+                            record_upload('document', stats, deduplicated=not created)
                             
                             # Create document record
                             document = Document(
                                 employee_id=new_employee.id,
-                                filename=os.path.join(f"{new_employee.employee_id}_{new_employee.first_name}_{new_employee.last_name}", unique_filename),
+                                filename=blob.path,
                                 original_filename=filename,
                                 document_type=doc_type,
-                                drive_file_id=drive_file_id
+                                blob_id=blob.id,
+                                blob=blob
                             )
                             db.session.add(document)
-                            db.session.commit()
+                            
+                            # Copy to Google Drive after the commit, unless the content is already there
+                            queue_drive_upload(new_employee, file_path, f"{doc_type}_{filename}", doc_file.content_type, document, buffer)
                         except Exception as e:
                             flash(f'Error uploading {doc_type}: {str(e)}', 'danger')
             
-            # Process education information if provided
-            education_count = int(request.form.get('education_count', 0))
-            for i in range(education_count):
-                if request.form.get(f'institution_{i}'):
-                    institution = request.form.get(f'institution_{i}')
-                    degree = request.form.get(f'degree_{i}')
-                    field_of_study = request.form.get(f'field_of_study_{i}')
-                    start_date_str = request.form.get(f'edu_start_date_{i}')
-                    end_date_str = request.form.get(f'edu_end_date_{i}')
-                    description = request.form.get(f'edu_description_{i}', '')
-                    
-                    # Convert string dates to datetime objects
-                    start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date() if start_date_str else None
-                    end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str else None
-                    
-                    education = Education(
-                        employee_id=new_employee.id,
-                        institution=institution,
-                        degree=degree,
-                        field_of_study=field_of_study,
-                        start_date=start_date,
-                        end_date=end_date,
-                        description=description
-                    )
-                    db.session.add(education)
-            
-            # Process certification information if provided
-            cert_count = int(request.form.get('certification_count', 0))
-            for i in range(cert_count):
-                if request.form.get(f'cert_name_{i}'):
-                    name = request.form.get(f'cert_name_{i}')
-                    issuing_organization = request.form.get(f'issuing_organization_{i}')
-                    issue_date_str = request.form.get(f'issue_date_{i}')
-                    expiry_date_str = request.form.get(f'expiry_date_{i}')
-                    credential_id = request.form.get(f'credential_id_{i}', '')
-                    credential_url = request.form.get(f'credential_url_{i}', '')
-                    
-                    # Convert string dates to datetime objects
-                    issue_date = datetime.strptime(issue_date_str, '%Y-%m-%d').date() if issue_date_str else None
-                    expiry_date = datetime.strptime(expiry_date_str, '%Y-%m-%d').date() if expiry_date_str else None
-                    
-                    certification = Certification(
-                        employee_id=new_employee.id,
-                        name=name,
-                        issuing_organization=issuing_organization,
-                        issue_date=issue_date,
-                        expiry_date=expiry_date,
-                        credential_id=credential_id,
-                        credential_url=credential_url
-                    )
-                    db.session.add(certification)
+            # Process education and certification information if provided
+            sync_child_rows(new_employee.educations, Education, parse_education_rows(request.form))
+            sync_child_rows(new_employee.certifications, Certification, parse_certification_rows(request.form))
             
             db.session.commit()
+            dashboard_cache.invalidate()
+            position_index.add(new_employee.position)
             
             flash('Your profile has been created successfully!', 'success')
             return redirect(url_for('self_onboarding'))
         
-        # Get all unique departments for the dropdown
-        departments = db.session.query(Employee.department).distinct().all()
-        departments = [dept[0] for dept in departments]
+        # Get all departments for the dropdown
+        departments = get_department_names()
         
         # Create a placeholder employee object to pre-fill the employee ID if available
         placeholder_employee = None
@@ -1089,9 +1740,116 @@ def self_onboarding():
                               certifications=[],
                               documents=[])
 
+def run_employee_import(stream, file_format, batch_size=None):
+    importer = bulk_import.EmployeeImporter(
+        db.session, db.metadata, batch_size=batch_size or current_app.config.get('IMPORT_BATCH_SIZE', 500)
+    )
+    report = importer.run(bulk_import.iter_records(stream, file_format))
+    if report.imported:
+        dashboard_cache.invalidate()
+        for position in report.positions:
+            position_index.add(position)
+    return report
+
+@route('/admin/import-employees', methods=['GET', 'POST'])
+@admin_required
+def import_employees():
+    if request.method == 'POST':
+        upload = request.files.get('import_file')
+        if not upload or not upload.filename:
+            flash('Please choose a CSV or JSON Lines file to import', 'danger')
+            return redirect(url_for('import_employees'))
+        
+        file_format = request.form.get('file_format') or bulk_import.detect_format(upload.filename)
+        report = run_employee_import(upload.stream, file_format)
+        current_app.logger.info(f"Employee import from {upload.filename}: {report.summary()}")
+        flash(report.summary(), 'success' if not report.errors else 'warning')
+        return render_template('import_employees.html', report=report)
+    
+    return render_template('import_employees.html', report=None)
+
+@cli_command
+@click.command('import-employees')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'jsonl']), help='File format (default: from extension)')
+@click.option('--batch-size', type=int, default=None, help='Rows per batch and transaction')
+@click.option('--errors', 'errors_path', type=click.Path(dir_okay=False), help='Write the per-row error report to this CSV file')
+@with_appcontext
+def import_employees_command(path, file_format, batch_size, errors_path):
+    """Bulk import employees from a CSV or JSON Lines file."""
+    with open(path, 'rb') as stream:
+        report = run_employee_import(stream, file_format or bulk_import.detect_format(path), batch_size)
+    
+    print(report.summary())
+    for line_no, message in report.errors[:20]:
+        print(f"  line {line_no}: {message}")
+    if len(report.errors) > 20:
+        print(f"  ... and {len(report.errors) - 20} more")
+    
+    if errors_path:
+        with open(errors_path, 'w', newline='') as f:
+            report.write_errors_csv(f)
+        print(f"Error report written to {errors_path}")
+
+@route('/admin/export-employees')
+@admin_required
+def export_employees():
+    file_format = request.args.get('format', 'csv')
+    columns = [column for column in request.args.get('columns', '').split(',') if column] or list(employee_export.DEFAULT_COLUMNS)
+    include = [name for name in request.args.get('include', '').split(',') if name]
+    
+    # Validate parameters before the response starts streaming
+    invalid = [column for column in columns if column not in employee_export.EXPORT_COLUMNS]
+    invalid += [name for name in include if name not in employee_export.CHILD_COLLECTIONS]
+    if file_format not in ('csv', 'jsonl'):
+        invalid.append(f'format={file_format}')
+    try:
+        hired_from = parse_date(request.args.get('hired_from'))
+        hired_to = parse_date(request.args.get('hired_to'))
+    except ValueError:
+        invalid.append('hired_from/hired_to must be YYYY-MM-DD')
+    if invalid:
+        return jsonify({'error': 'Invalid export parameters', 'invalid': invalid}), 400
+    
+    records = employee_export.iter_employee_records(
+        db.session, db.metadata,
+        columns=columns,
+        include=include,
+        department=request.args.get('department') or None,
+        hired_from=hired_from,
+        hired_to=hired_to,
+        batch_size=current_app.config.get('EXPORT_BATCH_SIZE', 1000)
+    )
+    if file_format == 'jsonl':
+        body, mimetype = employee_export.jsonl_lines(records), 'application/x-ndjson'
+    else:
+        body, mimetype = employee_export.csv_lines(records, columns, include), 'text/csv'
+    
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=employees.{file_format}'
+    return response
+
 # Route removed to avoid duplicate endpoint
 
-@app.route('/register', methods=['GET', 'POST'])
+@route('/admin/dashboard-stats')
+@admin_required
+def dashboard_stats():
+    # Cache hit/miss counters and rebuild timings for the admin dashboard
+    return jsonify(dashboard_cache.stats())
+
+@route('/metrics')
+def metrics_endpoint():
+    # Prometheus scrape endpoint: admins, or a bearer token matching METRICS_TOKEN
+    token = current_app.config.get('METRICS_TOKEN')
+    header = request.headers.get('Authorization', '')
+    token_ok = bool(token) and hmac.compare_digest(header, f'Bearer {token}')
+    if not token_ok and not session.get('is_admin', False):
+        abort(403)
+    if not current_app.config.get('METRICS_ENABLED', True):
+        abort(404)
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@route('/register', methods=['GET', 'POST'])
 def register():
     # If user is already logged in, redirect to index
     if 'logged_in' in session:
@@ -1124,17 +1882,55 @@ def register():
     
     return render_template('register.html')
 
+def can_view_drive_file(identity, file_id):
+    """
+    Check if a regular user may view a Google Drive file.
+    
+    Files the database knows about (documents and profile pictures) are decided
+    locally, without calling Drive. Only unknown IDs, e.g. files added to the
+    employee's folder by hand, are checked against the folder in Drive, and
+    those lookups are cached in drive_file_parents. Failed lookups deny access.
+    
+    Args:
+        identity: CurrentIdentity of the user
+        file_id: Google Drive file ID
+        
+    Returns:
+        True if the file belongs to the user's employee profile
+    """
+    if not identity or not identity.employee_pk or not file_id:
+        return False
+    if identity.drive_profile_pic_id == file_id:
+        return True
+    
+    # Documents with the same content share one Drive copy, which may be in another
+    # employee's folder, so any of the user's documents with this ID will do
+    owners = {employee_id for (employee_id,) in db.session.query(Document.employee_id).filter_by(drive_file_id=file_id)}
+    owners.update(employee_id for (employee_id,) in db.session.query(Employee.id).filter_by(drive_profile_pic_id=file_id))
+    if owners:
+        return identity.employee_pk in owners
+    
+    if not identity.drive_folder_id:
+        return False
+    parents = drive_file_parents.get(file_id)
+    if parents is None:
+        parents = drive_helper.get_file_parents(file_id)
+        if parents is None:
+            return False
+        drive_file_parents.set(file_id, parents)
+    return identity.drive_folder_id in parents
+
 # Route to serve uploaded files
-@app.route('/uploads/<path:filename>')
+@route('/uploads/<path:filename>')
 @login_required
 def uploaded_file(filename):
     # Check if user is authorized to access this file
-    user = User.query.filter_by(username=session.get('username')).first()
+    identity = get_current_identity()
     
     # Check if it's a Google Drive file ID
     if filename.startswith('drive:'):
         file_id = filename.replace('drive:', '')
-        if app.config.get('GOOGLE_DRIVE_ENABLED', False) and drive_helper and drive_helper.is_enabled():
+        if current_app.config.get('GOOGLE_DRIVE_ENABLED', False) and drive_helper.is_enabled():
             # Admin can access any file
             if session.get('is_admin', False):
                 # Instead of redirecting, render a page with an iframe to view the file
@@ -1143,15 +1939,11 @@ def uploaded_file(filename):
                                       download_url=drive_helper.get_download_url(file_id))
             
             # Regular user can only access their own files
-            if user and user.employee_id:
-                employee = db.session.get(Employee, user.employee_id)
-                if employee and employee.drive_folder_id:
-                    # Check if file is in user's folder
-                    if drive_helper.is_file_in_folder(file_id, employee.drive_folder_id):
-                        # Instead of redirecting, render a page with an iframe to view the file
-                        return render_template('view_drive_file.html', 
-                                              file_url=drive_helper.get_file_url(file_id),
-                                              download_url=drive_helper.get_download_url(file_id))
+            if can_view_drive_file(identity, file_id):
+                # Instead of redirecting, render a page with an iframe to view the file
+                return render_template('view_drive_file.html', 
+                                      file_url=drive_helper.get_file_url(file_id),
+                                      download_url=drive_helper.get_download_url(file_id))
             
             # If not authorized
             flash('You are not authorized to access this file', 'danger')
@@ -1165,7 +1957,7 @@ def uploaded_file(filename):
     if filename.startswith('profile_pictures/'):
         # Remove the 'profile_pictures/' prefix
         file_path = filename[len('profile_pictures/'):]
-        upload_path = app.config['PROFILE_PICTURES_FOLDER']
+        upload_path = current_app.config['PROFILE_PICTURES_FOLDER']
         
         # Handle backslashes in the path
         file_path = file_path.replace('\\', '/')
@@ -1181,7 +1973,7 @@ def uploaded_file(filename):
     elif filename.startswith('documents/'):
         # Remove the 'documents/' prefix
         file_path = filename[len('documents/'):]
-        upload_path = app.config['DOCUMENTS_FOLDER']
+        upload_path = current_app.config['DOCUMENTS_FOLDER']
         
         # Handle backslashes in the path
         file_path = file_path.replace('\\', '/')
@@ -1199,70 +1991,74 @@ def uploaded_file(filename):
         if '/' in filename:
             parts = filename.split('/')
             if parts[0] == 'documents':
-                upload_path = app.config['DOCUMENTS_FOLDER']
+                upload_path = current_app.config['DOCUMENTS_FOLDER']
                 folder_name = parts[1] if len(parts) > 2 else ''
                 filename = parts[-1]
                 if folder_name:
                     upload_path = os.path.join(upload_path, folder_name)
             elif parts[0] == 'profile_pictures':
-                upload_path = app.config['PROFILE_PICTURES_FOLDER']
+                upload_path = current_app.config['PROFILE_PICTURES_FOLDER']
                 folder_name = parts[1] if len(parts) > 2 else ''
                 filename = parts[-1]
                 if folder_name:
                     upload_path = os.path.join(upload_path, folder_name)
             else:
                 # Default to documents folder
-                upload_path = app.config['DOCUMENTS_FOLDER']
+                upload_path = current_app.config['DOCUMENTS_FOLDER']
                 filename = parts[-1]
         else:
             # Default to documents folder
-            upload_path = app.config['DOCUMENTS_FOLDER']
+            upload_path = current_app.config['DOCUMENTS_FOLDER']
             
     # Log the path for debugging
-    app.logger.info(f"Accessing file: {os.path.join(upload_path, filename)}")
+    current_app.logger.info(f"Accessing file: {os.path.join(upload_path, filename)}")
 
     # Admin can access any file
     if session.get('is_admin', False):
         return send_from_directory(upload_path, filename)
     
     # Regular user can only access their own files
-    if user and user.employee_id:
-        employee = db.session.get(Employee, user.employee_id)
+    # Check if the file belongs to this employee
+    if identity and identity.employee_pk:
+        employee_folder_prefix = f"{identity.employee_id}_{identity.first_name}_{identity.last_name}"
+        if os.path.basename(upload_path).startswith(employee_folder_prefix) or filename.startswith(employee_folder_prefix):
+            return send_from_directory(upload_path, filename)
         
-        # Check if the file belongs to this employee
-        if employee:
-            employee_folder_prefix = f"{employee.employee_id}_{employee.first_name}_{employee.last_name}"
-            if os.path.basename(upload_path).startswith(employee_folder_prefix) or filename.startswith(employee_folder_prefix):
-                return send_from_directory(upload_path, filename)
+        # Blobs are shared between employees: allowed if one of the employee's documents uses it
+        if os.path.basename(upload_path) == BLOB_FOLDER and db.session.query(Document.id).filter_by(
+                employee_id=identity.employee_pk, filename=f'{BLOB_FOLDER}/{filename}').first():
+            return send_from_directory(upload_path, filename)
     
     # If not authorized
     flash('You are not authorized to access this file', 'danger')
     return redirect(url_for('index'))
 
 # Route to delete a document
-@app.route('/delete-document/<int:document_id>', methods=['POST'])
+@route('/delete-document/<int:document_id>', methods=['POST'])
 @login_required
 def delete_document(document_id):
     document = Document.query.get_or_404(document_id)
     
     # Check if user is authorized to delete this document
-    user = User.query.filter_by(username=session.get('username')).first()
+    identity = get_current_identity()
     
     # Admin can delete any document
     is_authorized = session.get('is_admin', False)
     
     # Regular user can only delete their own documents
-    if not is_authorized and user and user.employee_id:
-        is_authorized = document.employee_id == user.employee_id
+    if not is_authorized and identity and identity.employee_pk:
+        is_authorized = document.employee_id == identity.employee_pk
     
     if not is_authorized:
         flash('You are not authorized to delete this document', 'danger')
         return redirect(url_for('index'))
     
-    # Delete the file from the filesystem
-    file_path = os.path.join(app.config['DOCUMENTS_FOLDER'], document.filename)
-    if os.path.exists(file_path):
-        os.remove(file_path)
+    # Delete the file from the filesystem. Blobs are removed with their last
+    # reference, when the delete is committed (see remove_released_blobs).
+    if document.blob_id is None:
+        file_path = os.path.join(current_app.config['DOCUMENTS_FOLDER'], document.filename)
+        if os.path.exists(file_path):
+            os.remove(file_path)
     
     # Delete the document record
     db.session.delete(document)
@@ -1271,6 +2067,265 @@ def delete_document(document_id):
     flash('Document deleted successfully', 'success')
     return redirect(url_for('self_onboarding'))
 
+def sqlite_pragma_listener(pragmas):
+    # Apply SQLITE_PRAGMAS from config.py to every new SQLite connection
+    def apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    return apply_sqlite_pragmas
+
+def create_drive_helper(config):
+    """
+    Connect to Google Drive. Called by drive_helper in its background thread.
+    
+    The root folder ID is kept in GOOGLE_DRIVE_STATE_FILE, so later runs
+    only check that the folder still exists instead of searching for it.
+    Other folder IDs are shared through drive_folders.
+    
+    Args:
+        config: App config
+        
+    Returns:
+        GoogleDriveHelper, wrapped to record call metrics when metrics are enabled
+    """
+    from google_drive_helper import GoogleDriveHelper
+    root_folder_name = config.get('GOOGLE_DRIVE_ROOT_FOLDER_NAME', 'Employee Management System')
+    state_file = config.get('GOOGLE_DRIVE_STATE_FILE')
+    state = load_drive_state(state_file)
+    root_folders = state.setdefault('root_folders', {})
+    helper = GoogleDriveHelper(
+        config.get('GOOGLE_DRIVE_CREDENTIALS_FILE'),
+        root_folder_name,
+        root_folder_id=root_folders.get(root_folder_name),
+        folder_resolver=drive_folders
+    )
+    if helper.root_folder_id and helper.root_folder_id != root_folders.get(root_folder_name):
+        root_folders[root_folder_name] = helper.root_folder_id
+        try:
+            save_drive_state(state_file, state)
+        except OSError as e:
+            print(f"Warning: could not save Google Drive state to {state_file}: {str(e)}")
+    if config.get('METRICS_ENABLED', True):
+        helper = TimedProxy(helper, metrics, 'drive_call_duration_seconds', 'drive_call_errors_total', DRIVE_API_METHODS)
+    return helper
+
+def create_worker_drive_helper(app):
+    """
+    Google Drive client for one upload worker thread.
+    
+    Waits for the shared helper, which resolves and saves the root folder, so
+    each worker's client only checks the saved folder ID.
+    
+    Returns:
+        GoogleDriveHelper, or None while Google Drive is unavailable
+    """
+    if drive_helper.get() is None:
+        return None
+    helper = create_drive_helper(app.config)
+    return helper if helper.is_enabled() else None
+
+def in_app_context(app, func):
+    # Run func inside an app context, for threads started outside of requests
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with app.app_context():
+            return func(*args, **kwargs)
+    return wrapper
+
+def create_app(config_object='config', test_config=None):
+    """
+    Create and configure the Flask app.
+    
+    Only wires up configuration, views, hooks and CLI commands: the database
+    and Google Drive are not touched. Run init_db() and init_storage() (or
+    "flask --app app init-db" and "flask --app app init-storage") to set them up.
+    
+    Args:
+        config_object: Import path of the configuration module
+        test_config: Extra settings applied on top of the configuration (optional)
+        
+    Returns:
+        Flask app
+    """
+    app = Flask(__name__)
+    app.add_template_filter(nl2br, 'nl2br')
+    
+    # Load configuration from config.py
+    try:
+        app.config.from_object(config_object)
+    except ImportError:
+        # Fallback configuration if config.py doesn't exist
+        app.config['SECRET_KEY'] = 'your-secret-key'
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///employees.db'
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max upload size
+        app.config['GOOGLE_DRIVE_ENABLED'] = False
+    if test_config:
+        app.config.update(test_config)
+    
+    app.wsgi_app = ProxyFix(app.wsgi_app)
+    
+    # Set up upload folders if not defined in config
+    if 'UPLOAD_FOLDER' not in app.config:
+        app.config['UPLOAD_FOLDER'] = os.path.join(app.static_folder, 'uploads')
+        app.config['PROFILE_PICTURES_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], 'profile_pictures')
+        app.config['DOCUMENTS_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], 'documents')
+    
+    # File type configuration
+    app.config['ALLOWED_DOCUMENT_EXTENSIONS'] = {'pdf', 'doc', 'docx', 'jpg', 'jpeg', 'png'}
+    app.config['ALLOWED_IMAGE_EXTENSIONS'] = {'jpg', 'jpeg', 'png', 'gif'}
+    
+    db.init_app(app)
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', sqlite_pragma_listener(app.config.get('SQLITE_PRAGMAS', {})))
+        if app.config.get('QUERY_STATS_ENABLED', True):
+            query_stats.install_query_tracking(db.engine)
+    
+    if app.config.get('QUERY_STATS_ENABLED', True):
+        app.before_request(start_query_stats)
+        app.after_request(report_query_stats)
+        app.teardown_request(stop_query_stats)
+    
+    if app.config.get('METRICS_ENABLED', True):
+        metrics.configure(app.config.get('METRICS_DIR'), app.config.get('METRICS_FLUSH_INTERVAL', 5))
+        app.before_request(start_request_metrics)
+        app.after_request(record_request_metrics)
+        app.teardown_request(finish_request_metrics)
+    
+    dashboard_cache.ttl = app.config.get('DASHBOARD_CACHE_TTL', 60)
+    position_index.ttl = app.config.get('POSITION_INDEX_TTL', 300)
+    user_identity_cache.ttl = app.config.get('CURRENT_USER_CACHE_TTL', 30)
+    drive_file_parents.ttl = app.config.get('DRIVE_PARENT_CACHE_TTL', 300)
+    pending_upload_content.ttl = app.config.get('DRIVE_PENDING_CONTENT_TTL', 60)
+    
+    # Google Drive connects in a background thread started by the first request
+    # of each process, which also starts the workers copying queued uploads to Drive
+    if app.config.get('GOOGLE_DRIVE_ENABLED', False):
+        drive_folders.configure(
+            load=in_app_context(app, load_drive_folder),
+            save=in_app_context(app, save_drive_folder),
+            forget=in_app_context(app, forget_drive_folder),
+            max_entries=app.config.get('DRIVE_FOLDER_CACHE_SIZE', 1024)
+        )
+        drive_helper.configure(lambda: create_drive_helper(app.config))
+        drive_upload_workers.configure(
+            claim_job=in_app_context(app, claim_drive_upload_job),
+            run_job=in_app_context(app, run_drive_upload_job),
+            client_factory=lambda: create_worker_drive_helper(app),
+            workers=app.config.get('DRIVE_UPLOAD_WORKERS', 2),
+            poll_interval=app.config.get('DRIVE_UPLOAD_POLL_INTERVAL', 5)
+        )
+        app.before_request(drive_helper.start)
+        app.before_request(drive_upload_workers.start)
+    else:
+        drive_helper.configure(None)
+        drive_upload_workers.configure(workers=0)
+    
+    for rule, view, options in url_rules:
+        app.add_url_rule(rule, view_func=view, **options)
+    for command in cli_commands:
+        app.cli.add_command(command)
+    
+    return app
+
+def init_db(app):
+    """
+    Create missing tables, the default admin user and the search index.
+    
+    Existing tables and rows are left alone, so this is safe to run on every deploy.
+    
+    Args:
+        app: Flask app from create_app()
+    """
+    with app.app_context():
+        db.create_all()
+        
+        # Create default admin user if it doesn't exist
+        admin = User.query.filter_by(username='admin').first()
+        if not admin:
+            admin = User(username='admin', is_admin=True)
+            admin.set_password('admin')
+            db.session.add(admin)
+            db.session.commit()
+            print("Default admin user created")
+        
+        # Full-text search index (falls back to LIKE queries when FTS5 is unavailable)
+        search_index_state[db.engine] = search_index.ensure_search_index(db.engine)
+        if not search_index_state[db.engine]:
+            app.logger.info("FTS5 not available, employee search will use LIKE queries")
+
+def init_storage(app, connect=False):
+    """
+    Create the local upload folders and optionally connect to Google Drive.
+    
+    Args:
+        app: Flask app from create_app()
+        connect: Connect to Google Drive now instead of on first use
+        
+    Returns:
+        True if Google Drive is enabled and connected, False otherwise
+        (always False when connect is False)
+    """
+    os.makedirs(app.config['PROFILE_PICTURES_FOLDER'], exist_ok=True)
+    os.makedirs(app.config['DOCUMENTS_FOLDER'], exist_ok=True)
+    if not connect:
+        return False
+    enabled = drive_helper.is_enabled()
+    if enabled:
+        app.logger.info("Google Drive integration enabled")
+    return enabled
+
+@cli_command
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create missing tables, the default admin user and the search index."""
+    init_db(current_app)
+    print("Database initialized.")
+
+@cli_command
+@click.command('init-storage')
+@click.option('--connect/--no-connect', default=True, help='Connect to Google Drive now (default: yes)')
+@with_appcontext
+def init_storage_command(connect):
+    """Create the upload folders and check the Google Drive connection."""
+    enabled = init_storage(current_app, connect=connect)
+    print("Upload folders ready.")
+    if connect:
+        print("Google Drive connected." if enabled else "Google Drive is disabled or unavailable; files are stored locally.")
+
+@cli_command
+@click.command('process-drive-uploads')
+@click.option('--limit', type=int, default=None, help='Stop after this many jobs')
+@click.option('--retry-failed', is_flag=True, help='Queue jobs that used up their attempts again first')
+@with_appcontext
+def process_drive_uploads_command(limit, retry_failed):
+    """Copy queued uploads to Google Drive on this process, then exit."""
+    if retry_failed:
+        failed = DriveUploadJob.query.filter_by(status=JOB_FAILED).all()
+        for job in failed:
+            job.status = JOB_PENDING
+            job.attempts = 0
+            job.next_attempt_at = datetime.utcnow()
+        db.session.commit()
+        print(f"Queued {len(failed)} failed jobs again.")
+    
+    helper = drive_helper.get()
+    if helper is None:
+        print("Google Drive is disabled or unavailable.")
+        return
+    count = drive_upload_workers.drain(helper, limit)
+    remaining = DriveUploadJob.query.filter(DriveUploadJob.status.in_([JOB_PENDING, JOB_RUNNING])).count()
+    failed = DriveUploadJob.query.filter_by(status=JOB_FAILED).count()
+    print(f"Ran {count} jobs; {remaining} waiting, {failed} failed.")
+
+# App used by "flask --app app", WSGI servers and the maintenance scripts.
+# Building it doesn't touch the database or Google Drive.
+app = create_app()
+
 if __name__ == '__main__':
     import argparse
     parser = argparse.ArgumentParser()
@@ -1278,4 +2333,8 @@ if __name__ == '__main__':
     parser.add_argument('--host', type=str, default='0.0.0.0', help='Host to run the server on')
     args = parser.parse_args()
     
+    init_db(app)
+    init_storage(app)
+    # Drop metric snapshots left in METRICS_DIR by a previous run
+    metrics.clear()
     app.run(host=args.host, port=args.port, debug=True)
\ No newline at end of file
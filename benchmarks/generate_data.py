@@ -0,0 +1,271 @@
+"""
+Fill a database with synthetic employees for benchmarking.
+
+Usage:
+    python benchmarks/generate_data.py --employees 10k [--seed 42] [--db instance/bench_10k.db]
+
+The same seed and size always produce the same rows. Sizes can be given as
+1k, 10k, 100k, 1m or a plain number. Document rows point at files that do
+not exist on disk; the read paths being benchmarked only list them.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_NAMES = ('James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+               'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen',
+               'Priya', 'Wei', 'Aisha', 'Carlos', 'Fatima', 'Hiroshi', 'Olga', 'Mateo', 'Amara', 'Noah',
+               'Sofia', 'Liam', 'Yuki', 'Omar', 'Ingrid', 'Ravi', 'Chloe', 'Kwame', 'Elena', 'Mohammed')
+LAST_NAMES = ('Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+              'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+              'Lee', 'Perez', 'Thompson', 'White', 'Harris', 'Sanchez', 'Clark', 'Ramirez', 'Lewis', 'Robinson',
+              'Patel', 'Nguyen', 'Kim', 'Chen', 'Singh', 'Okafor', 'Ivanova', 'Tanaka', 'Muller', 'Rossi',
+              'Kowalski', 'Silva', 'Haddad', 'Larsen', 'Novak', 'Mensah', 'Fischer', 'Dubois', 'Yilmaz', 'Costa')
+
+# Department -> positions, with department sizes roughly following the weights
+DEPARTMENTS = {
+    'Engineering': (30, ('Software Engineer', 'Senior Software Engineer', 'Staff Engineer', 'Engineering Manager',
+                         'QA Engineer', 'DevOps Engineer', 'Data Engineer')),
+    'Sales': (15, ('Account Executive', 'Sales Development Representative', 'Sales Manager', 'Solutions Engineer')),
+    'Customer Support': (12, ('Support Specialist', 'Senior Support Specialist', 'Support Team Lead')),
+    'Marketing': (8, ('Marketing Specialist', 'Content Writer', 'Product Marketing Manager', 'SEO Analyst')),
+    'Operations': (8, ('Operations Analyst', 'Operations Manager', 'Logistics Coordinator')),
+    'Finance': (6, ('Accountant', 'Financial Analyst', 'Payroll Specialist', 'Controller')),
+    'Human Resources': (5, ('HR Generalist', 'Recruiter', 'HR Business Partner', 'Talent Acquisition Lead')),
+    'Product': (5, ('Product Manager', 'Senior Product Manager', 'Product Designer', 'UX Researcher')),
+    'Legal': (3, ('Legal Counsel', 'Paralegal', 'Compliance Officer')),
+    'IT': (5, ('IT Support Technician', 'Systems Administrator', 'Network Engineer', 'Security Analyst')),
+    'Facilities': (3, ('Facilities Coordinator', 'Office Manager')),
+}
+
+INSTITUTIONS = ('State University', 'Institute of Technology', 'City College', 'National University', 'Polytechnic University',
+                'University of the Arts', 'Community College', 'Metropolitan University', 'Technical University', 'Business School')
+DEGREES = (('Bachelor of Science', 50), ('Bachelor of Arts', 20), ('Master of Science', 15), ('Master of Business Administration', 7),
+           ('Associate Degree', 5), ('PhD', 3))
+FIELDS = ('Computer Science', 'Business Administration', 'Economics', 'Mechanical Engineering', 'Psychology', 'Marketing',
+          'Accounting', 'Information Systems', 'Mathematics', 'Communications', 'Law', 'Electrical Engineering')
+CERTIFICATIONS = (('AWS Certified Solutions Architect', 'Amazon Web Services'), ('Certified Scrum Master', 'Scrum Alliance'),
+                  ('PMP', 'Project Management Institute'), ('CPA', 'AICPA'), ('SHRM-CP', 'SHRM'),
+                  ('CompTIA Security+', 'CompTIA'), ('Google Analytics Certification', 'Google'),
+                  ('Certified Kubernetes Administrator', 'Cloud Native Computing Foundation'), ('CISSP', 'ISC2'),
+                  ('Salesforce Certified Administrator', 'Salesforce'))
+DOCUMENT_TYPES = ('certificate', 'experience_letter', 'offer_letter')
+STREETS = ('Main St', 'Oak Ave', 'Pine Rd', 'Maple Dr', 'Cedar Ln', 'Elm St', 'Lake View Blvd', 'Hill Rd', 'Park Ave', 'River Rd')
+CITIES = ('Springfield', 'Riverside', 'Franklin', 'Greenville', 'Fairview', 'Madison', 'Georgetown', 'Clinton', 'Salem', 'Arlington')
+
+SIZES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+# Login created for the employee dashboard benchmarks, linked to employee #1
+BENCH_EMPLOYEE_USERNAME = 'bench_employee'
+BENCH_EMPLOYEE_PASSWORD = 'bench_employee'
+
+
+def parse_size(value):
+    value = value.lower()
+    if value in SIZES:
+        return SIZES[value]
+    return int(value)
+
+
+def size_label(count):
+    for label, size in SIZES.items():
+        if size == count:
+            return label
+    return str(count)
+
+
+def default_db_path(count):
+    return os.path.join(ROOT, 'instance', f'bench_{size_label(count)}.db')
+
+
+def use_database(db_path):
+    """Point the app at db_path. Must run before the app module is imported."""
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.abspath(db_path)}'
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+
+def _weighted(rng, choices):
+    total = sum(weight for _, weight in choices)
+    pick = rng.uniform(0, total)
+    for value, weight in choices:
+        pick -= weight
+        if pick <= 0:
+            return value
+    return choices[-1][0]
+
+
+def _random_date(rng, start, end):
+    return start + timedelta(days=rng.randrange((end - start).days + 1))
+
+
+def _address(rng):
+    return f'{rng.randint(1, 9999)} {rng.choice(STREETS)}, {rng.choice(CITIES)}'
+
+
+def generate_employee(rng, number):
+    department = _weighted(rng, [(name, weight) for name, (weight, _) in DEPARTMENTS.items()])
+    first_name = rng.choice(FIRST_NAMES)
+    last_name = rng.choice(LAST_NAMES)
+    hire_date = _random_date(rng, date(2005, 1, 1), date(2024, 12, 31))
+    current_address = _address(rng)
+    employee = {
+        'employee_id': f'EMP{number:07d}',
+        'first_name': first_name,
+        'last_name': last_name,
+        'email': f'{first_name.lower()}.{last_name.lower()}.{number}@example.com',
+        'phone': f'555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}',
+        'department': department,
+        'position': rng.choice(DEPARTMENTS[department][1]),
+        'hire_date': hire_date,
+        'current_address': current_address,
+        'permanent_address': current_address if rng.random() < 0.6 else _address(rng),
+        'salary': round(rng.uniform(35_000, 220_000), -2),
+        'notes': '',
+        'created_at': datetime.combine(hire_date, datetime.min.time()),
+    }
+
+    educations = []
+    year = hire_date.year - rng.randint(1, 12)
+    for _ in range(_weighted(rng, [(0, 5), (1, 55), (2, 30), (3, 10)])):
+        start_date = date(year - rng.randint(2, 5), 9, 1)
+        educations.append({
+            'institution': f'{rng.choice(CITIES)} {rng.choice(INSTITUTIONS)}',
+            'degree': _weighted(rng, DEGREES),
+            'field_of_study': rng.choice(FIELDS),
+            'start_date': start_date,
+            'end_date': date(year, 6, 1),
+            'description': '',
+        })
+        year = start_date.year
+
+    certifications = []
+    for _ in range(_weighted(rng, [(0, 40), (1, 35), (2, 18), (3, 7)])):
+        name, organization = rng.choice(CERTIFICATIONS)
+        issue_date = _random_date(rng, date(2010, 1, 1), date(2024, 12, 31))
+        certifications.append({
+            'name': name,
+            'issuing_organization': organization,
+            'issue_date': issue_date,
+            'expiry_date': issue_date + timedelta(days=365 * 3) if rng.random() < 0.5 else None,
+            'credential_id': f'CRED-{rng.randrange(16 ** 8):08X}',
+            'credential_url': '',
+        })
+
+    documents = []
+    folder = f"{employee['employee_id']}_{first_name}_{last_name}"
+    for doc_type in rng.sample(DOCUMENT_TYPES, _weighted(rng, [(0, 20), (1, 40), (2, 25), (3, 15)])):
+        filename = f'{doc_type}.pdf'
+        documents.append({
+            'filename': f'{folder}/{doc_type}_{rng.randrange(16 ** 32):032x}_{filename}',
+            'original_filename': filename,
+            'document_type': doc_type,
+            'upload_date': employee['created_at'],
+            'drive_file_id': None,
+        })
+
+    return employee, educations, certifications, documents
+
+
+def generate(count, seed=42, batch_size=5000):
+    """
+    Insert count synthetic employees with their child rows into the app's database.
+
+    Rows are inserted with Core executemany in batches of batch_size, one
+    transaction per batch. Department headcounts and the benchmark login
+    are set up at the end.
+
+    Args:
+        count: Number of employees
+        seed: Random seed; the same seed and count give the same data
+        batch_size: Employees per transaction
+    """
+    from sqlalchemy import insert, select, func
+    from app import app, db, init_db, User, Department
+
+    rng = random.Random(seed)
+    tables = db.metadata.tables
+    employee_table = tables['employee']
+    child_tables = (('educations', tables['education']), ('certifications', tables['certification']),
+                    ('documents', tables['document']))
+    totals = {'employees': 0, 'educations': 0, 'certifications': 0, 'documents': 0}
+    started = time.perf_counter()
+
+    init_db(app)
+    with app.app_context():
+        if db.session.query(func.count(employee_table.c.id)).scalar():
+            raise SystemExit('Database already has employees; use a new --db path or --force')
+
+        now = datetime.utcnow()
+        db.session.execute(insert(Department.__table__),
+                           [{'name': name, 'headcount': 0, 'created_at': now} for name in DEPARTMENTS])
+        db.session.commit()
+
+        number = 0
+        while number < count:
+            batch = [generate_employee(rng, number + i + 1) for i in range(min(batch_size, count - number))]
+            number += len(batch)
+            db.session.execute(insert(employee_table), [row[0] for row in batch])
+            id_by_code = dict(db.session.execute(
+                select(employee_table.c.employee_id, employee_table.c.id).where(
+                    employee_table.c.employee_id.in_([row[0]['employee_id'] for row in batch])
+                )
+            ).all())
+            children = {name: [] for name, _ in child_tables}
+            for employee, educations, certifications, documents in batch:
+                employee_pk = id_by_code[employee['employee_id']]
+                for name, rows in (('educations', educations), ('certifications', certifications), ('documents', documents)):
+                    children[name].extend(dict(row, employee_id=employee_pk) for row in rows)
+            for name, table in child_tables:
+                if children[name]:
+                    db.session.execute(insert(table), children[name])
+                totals[name] += len(children[name])
+            db.session.commit()
+            totals['employees'] = number
+            print(f'\r{number:,} / {count:,} employees', end='', flush=True)
+        print()
+
+        # Same headcounts track_department_headcounts would have kept
+        for name, headcount in db.session.query(employee_table.c.department, func.count()).group_by(employee_table.c.department):
+            db.session.query(Department).filter_by(name=name).update({'headcount': headcount})
+
+        user = User.query.filter_by(username=BENCH_EMPLOYEE_USERNAME).first()
+        if not user:
+            user = User(username=BENCH_EMPLOYEE_USERNAME, is_admin=False, employee_id=1, employee_code='EMP0000001')
+            user.set_password(BENCH_EMPLOYEE_PASSWORD)
+            db.session.add(user)
+        db.session.commit()
+
+    elapsed = time.perf_counter() - started
+    print(', '.join(f'{value:,} {name}' for name, value in totals.items()) +
+          f' in {elapsed:.1f}s ({totals["employees"] / elapsed:,.0f} employees/sec)')
+    return totals
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate synthetic employees for benchmarking')
+    parser.add_argument('--employees', default='10k', help='1k, 10k, 100k, 1m or a number (default 10k)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default 42)')
+    parser.add_argument('--db', help='SQLite database path (default instance/bench_<size>.db)')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Employees per transaction')
+    parser.add_argument('--force', action='store_true', help='Delete the database file first if it exists')
+    args = parser.parse_args()
+
+    count = parse_size(args.employees)
+    db_path = args.db or default_db_path(count)
+    if os.path.exists(db_path):
+        if not args.force:
+            sys.exit(f'{db_path} already exists; pass --force to replace it')
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+    use_database(db_path)
+    print(f'Generating {count:,} employees (seed {args.seed}) into {db_path}')
+    generate(count, seed=args.seed, batch_size=args.batch_size)
@@ -0,0 +1,253 @@
+"""
+Read-path benchmarks run through the Flask test client.
+
+Usage:
+    python benchmarks/generate_data.py --employees 10k
+    python benchmarks/run_benchmarks.py --employees 10k [--requests 200] [--save-baseline] [--check-latency]
+
+Each benchmark is warmed up, then timed over --requests requests, reporting
+p50/p95/p99 latency and the median and maximum query and row count per
+request (rows loaded into ORM objects). A shorter second pass runs under
+tracemalloc to measure peak memory per request. Results are compared with
+benchmarks/baselines/<size>.json: more queries or rows than the baseline is
+a regression and makes the script exit with status 1. Latency depends on the
+machine the baseline was recorded on, so a p95 more than --tolerance slower
+only fails the run with --check-latency.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.orm import Mapper
+
+from generate_data import (ROOT, BENCH_EMPLOYEE_USERNAME, DEPARTMENTS, LAST_NAMES, default_db_path,
+                           parse_size, size_label, use_database)
+
+BASELINE_DIR = os.path.join(ROOT, 'benchmarks', 'baselines')
+
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def build_benchmarks(employee_count, seed):
+    """
+    Benchmarks as (name, session role, function returning the next URL).
+
+    Requests that take a parameter cycle through seeded random values, so
+    runs are repeatable without every request hitting the same row.
+    """
+    rng = random.Random(seed)
+    departments = list(DEPARTMENTS)
+    search_terms = [rng.choice(LAST_NAMES) for _ in range(50)] + ['Engineer', 'Sales Manager', 'EMP00001']
+    position_prefixes = ['so', 'sen', 'eng', 'man', 'acc', 'sup', 'pro', 'an']
+    employee_ids = [rng.randint(1, employee_count) for _ in range(1000)]
+
+    def cycle(values, template):
+        state = {'i': 0}
+
+        def next_url():
+            value = values[state['i'] % len(values)]
+            state['i'] += 1
+            return template.format(value)
+        return next_url
+
+    return [
+        ('index (admin)', 'admin', lambda: '/'),
+        ('index (employee)', 'employee', lambda: '/'),
+        ('all_employees', 'admin', lambda: '/all-employees'),
+        ('department_employees', 'admin', cycle(departments, '/department/{}')),
+        ('search_employees', 'admin', cycle(search_terms, '/search?query={}')),
+        ('get_positions', 'admin', cycle(position_prefixes, '/positions?q={}')),
+        ('employee_details', 'admin', cycle(employee_ids, '/employee/{}')),
+    ]
+
+
+def login(client, app, role):
+    from app import User
+    with app.app_context():
+        username = 'admin' if role == 'admin' else BENCH_EMPLOYEE_USERNAME
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise SystemExit(f'User {username} not found; generate the data with benchmarks/generate_data.py')
+        user_id, is_admin = user.id, user.is_admin
+    with client.session_transaction() as session:
+        session['logged_in'] = True
+        session['username'] = username
+        session['is_admin'] = is_admin
+        session['user_id'] = user_id
+
+
+def run_benchmark(clients, role, next_url, requests, warmup, memory_requests):
+    import query_stats
+
+    client = clients[role]
+    for _ in range(warmup):
+        client.get(next_url())
+
+    # Rows loaded into ORM objects; SQLite reports no rowcount for SELECTs
+    loaded = {'rows': 0}
+
+    def count_row(target, context):
+        loaded['rows'] += 1
+
+    latencies = []
+    query_counts = []
+    row_counts = []
+    event.listen(Mapper, 'load', count_row)
+    try:
+        for _ in range(requests):
+            url = next_url()
+            loaded['rows'] = 0
+            with query_stats.collect_queries() as stats:
+                started = time.perf_counter()
+                response = client.get(url)
+                latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise SystemExit(f'GET {url} returned {response.status_code}')
+            query_counts.append(stats.count)
+            row_counts.append(loaded['rows'])
+    finally:
+        event.remove(Mapper, 'load', count_row)
+
+    peak = 0
+    tracemalloc.start()
+    for _ in range(memory_requests):
+        tracemalloc.reset_peak()
+        client.get(next_url())
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    latencies.sort()
+    query_counts.sort()
+    row_counts.sort()
+    return {
+        'requests': requests,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'queries_median': query_counts[len(query_counts) // 2],
+        'queries_max': query_counts[-1],
+        'rows_median': row_counts[len(row_counts) // 2],
+        'rows_max': row_counts[-1],
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def compare(results, baseline, tolerance, check_latency=False):
+    """
+    Compare results with a stored baseline.
+
+    Query and row counts don't depend on the machine, so any increase is a
+    regression. Latency is only compared with check_latency, for baselines
+    recorded on the same machine.
+
+    Returns:
+        List of regression messages
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous:
+            continue
+        if check_latency and result['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['p95_ms']:.2f}ms vs baseline {previous['p95_ms']:.2f}ms")
+        if result['queries_max'] > previous['queries_max']:
+            regressions.append(f"{name}: {result['queries_max']} queries vs baseline {previous['queries_max']}")
+        if 'rows_max' in previous and result['rows_max'] > previous['rows_max']:
+            regressions.append(f"{name}: {result['rows_max']} rows vs baseline {previous['rows_max']}")
+    return regressions
+
+
+def print_table(results, baseline):
+    header = (f"{'benchmark':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>10}{'rows':>10}"
+              f"{'peak KB':>10}{'p95 vs base':>13}")
+    print(header)
+    print('-' * len(header))
+    for name, result in results.items():
+        previous = baseline.get('results', {}).get(name) if baseline else None
+        change = f"{(result['p95_ms'] / previous['p95_ms'] - 1) * 100:+.0f}%" if previous and previous['p95_ms'] else ''
+        queries = f"{result['queries_median']}/{result['queries_max']}"
+        rows = f"{result['rows_median']}/{result['rows_max']}"
+        print(f"{name:<24}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+              f"{queries:>10}{rows:>10}{result['peak_memory_kb']:>10.0f}{change:>13}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the read paths through the Flask test client')
+    parser.add_argument('--employees', default='10k', help='Dataset size: 1k, 10k, 100k, 1m or a number (default 10k)')
+    parser.add_argument('--db', help='SQLite database path (default instance/bench_<size>.db)')
+    parser.add_argument('--requests', type=int, default=200, help='Timed requests per benchmark')
+    parser.add_argument('--warmup', type=int, default=20, help='Untimed requests per benchmark')
+    parser.add_argument('--memory-requests', type=int, default=20, help='Requests per benchmark traced for peak memory')
+    parser.add_argument('--only', action='append', help='Run only benchmarks whose name contains this text')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for request parameters')
+    parser.add_argument('--baseline', help='Baseline file (default benchmarks/baselines/<size>.json)')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--check-latency', action='store_true',
+                        help='Also fail on p95 slowdowns; only meaningful against a baseline from this machine')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed p95 slowdown with --check-latency (default 0.25)')
+    args = parser.parse_args()
+
+    count = parse_size(args.employees)
+    db_path = args.db or default_db_path(count)
+    if not os.path.exists(db_path):
+        sys.exit(f'{db_path} not found; run: python benchmarks/generate_data.py --employees {args.employees}')
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f'{size_label(count)}.json')
+
+    use_database(db_path)
+    from app import app
+    app.logger.setLevel(logging.ERROR)
+
+    clients = {}
+    for role in ('admin', 'employee'):
+        clients[role] = app.test_client()
+        login(clients[role], app, role)
+
+    results = {}
+    for name, role, next_url in build_benchmarks(count, args.seed):
+        if args.only and not any(text in name for text in args.only):
+            continue
+        print(f'Running {name}...', file=sys.stderr)
+        results[name] = run_benchmark(clients, role, next_url, args.requests, args.warmup, args.memory_requests)
+
+    baseline = None
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+
+    print(f'\n{count:,} employees, {args.requests} requests per benchmark\n')
+    print_table(results, baseline)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, 'w') as f:
+            json.dump({
+                'employees': count,
+                'requests': args.requests,
+                'recorded_at': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'results': results,
+            }, f, indent=2)
+            f.write('\n')
+        print(f'\nBaseline saved to {baseline_path}')
+    elif baseline:
+        regressions = compare(results, baseline, args.tolerance, args.check_latency)
+        if regressions:
+            print('\nRegressions:')
+            for message in regressions:
+                print(f'  {message}')
+            sys.exit(1)
+        print(f'\nNo regressions against {baseline_path}')
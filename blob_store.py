@@ -0,0 +1,154 @@
+import hashlib
+import io
+import os
+import time
+import uuid
+
+# Size of the reads used to copy and hash an upload
+CHUNK_SIZE = 64 * 1024
+
+
+class BoundedBuffer:
+    def __init__(self, limit):
+        """
+        In-memory copy of a stream that gives up once it grows past limit bytes.
+
+        Used as the tee of copy_stream() to keep small uploads in memory, so
+        they can be sent on (e.g. to Google Drive) without reading the local
+        copy back.
+
+        Args:
+            limit: Maximum bytes to keep
+        """
+        self.limit = limit
+        self._buffer = io.BytesIO()
+        self.overflowed = False
+
+    def write(self, chunk):
+        if self.overflowed:
+            return
+        if self._buffer.tell() + len(chunk) > self.limit:
+            self.overflowed = True
+            self._buffer = None
+            return
+        self._buffer.write(chunk)
+
+    def getvalue(self):
+        """Buffered bytes, or None if the stream was larger than the limit."""
+        return None if self.overflowed else self._buffer.getvalue()
+
+
+def copy_stream(stream, destination, hasher=None, tee=None, chunk_size=CHUNK_SIZE):
+    """
+    Copy a stream to a file in a single pass, optionally hashing it and
+    passing the same chunks to a second writer.
+
+    Args:
+        stream: Readable binary stream (e.g. an uploaded file's stream)
+        destination: Writable binary file
+        hasher: hashlib object updated with every chunk (optional)
+        tee: Object with a write() method that also receives every chunk (optional)
+        chunk_size: Bytes read at a time
+
+    Returns:
+        Dict with the byte count and the seconds spent reading, hashing and
+        writing ('bytes', 'read_seconds', 'hash_seconds', 'write_seconds')
+    """
+    stats = {'bytes': 0, 'read_seconds': 0.0, 'hash_seconds': 0.0, 'write_seconds': 0.0}
+    clock = time.perf_counter
+    while True:
+        started = clock()
+        chunk = stream.read(chunk_size)
+        read_done = clock()
+        stats['read_seconds'] += read_done - started
+        if not chunk:
+            break
+        hash_done = read_done
+        if hasher is not None:
+            hasher.update(chunk)
+            hash_done = clock()
+            stats['hash_seconds'] += hash_done - read_done
+        destination.write(chunk)
+        if tee is not None:
+            tee.write(chunk)
+        stats['write_seconds'] += clock() - hash_done
+        stats['bytes'] += len(chunk)
+    return stats
+
+
+def write_hashed(stream, directory, tee=None, chunk_size=CHUNK_SIZE):
+    """
+    Copy a stream to a temporary file, hashing it with SHA-256 on the way.
+
+    The file is written once; store() then moves it into place.
+
+    Args:
+        stream: Readable binary stream (e.g. an uploaded file's stream)
+        directory: Folder for the temporary file, on the same filesystem as the blobs
+        tee: Object with a write() method that also receives the content (optional)
+        chunk_size: Bytes read at a time
+
+    Returns:
+        (hex digest, temporary file path, copy_stream() stats)
+    """
+    os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f'.upload-{uuid.uuid4().hex}.tmp')
+    sha256 = hashlib.sha256()
+    try:
+        with open(temp_path, 'wb') as f:
+            stats = copy_stream(stream, f, sha256, tee, chunk_size)
+    except BaseException:
+        discard(temp_path)
+        raise
+    return sha256.hexdigest(), temp_path, stats
+
+
+def save_stream(stream, path, tee=None, chunk_size=CHUNK_SIZE):
+    """
+    Copy a stream to path in a single pass (see copy_stream()).
+
+    Returns:
+        copy_stream() stats
+    """
+    try:
+        with open(path, 'wb') as f:
+            return copy_stream(stream, f, None, tee, chunk_size)
+    except BaseException:
+        discard(path)
+        raise
+
+
+def blob_name(digest, filename):
+    """File name of a blob: its digest plus the uploaded file's extension."""
+    extension = os.path.splitext(filename)[1].lower()
+    return f'{digest}{extension}'
+
+
+def store(temp_path, directory, name):
+    """
+    Move a file written by write_hashed() into the blob folder.
+
+    The file is always moved into place, replacing a blob with the same name
+    (and so the same content). That way a blob removed while the upload was
+    in progress is written again.
+
+    Args:
+        temp_path: Temporary file from write_hashed()
+        directory: Blob folder
+        name: Blob file name from blob_name()
+
+    Returns:
+        True if the blob was written, False if it was already there
+    """
+    path = os.path.join(directory, name)
+    existed = os.path.exists(path)
+    os.replace(temp_path, path)
+    return not existed
+
+
+def discard(path):
+    """Remove a blob or temporary file, ignoring files that are already gone."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
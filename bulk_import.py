@@ -0,0 +1,347 @@
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from sqlalchemy import insert, select, update, bindparam, func
+from sqlalchemy.exc import SQLAlchemyError
+
+# Employee columns accepted in import files
+EMPLOYEE_FIELDS = ('employee_id', 'first_name', 'last_name', 'email', 'phone', 'department', 'position',
+                   'hire_date', 'current_address', 'permanent_address', 'salary', 'notes')
+REQUIRED_EMPLOYEE_FIELDS = ('first_name', 'last_name', 'email', 'phone', 'department', 'position', 'current_address')
+
+EDUCATION_FIELDS = ('institution', 'degree', 'field_of_study', 'start_date', 'end_date', 'description')
+REQUIRED_EDUCATION_FIELDS = ('institution', 'degree', 'field_of_study', 'start_date')
+
+CERTIFICATION_FIELDS = ('name', 'issuing_organization', 'issue_date', 'expiry_date', 'credential_id', 'credential_url')
+REQUIRED_CERTIFICATION_FIELDS = ('name', 'issuing_organization', 'issue_date')
+
+
+class RowError(ValueError):
+    pass
+
+
+def detect_format(filename):
+    """Guess the import format ('csv' or 'jsonl') from a file name."""
+    if filename and filename.lower().endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    return 'csv'
+
+
+def iter_records(stream, file_format):
+    """
+    Stream-parse an import file without loading it into memory.
+
+    CSV files have one employee per row; educations and certifications can be
+    given as JSON lists in 'educations' and 'certifications' columns. JSON
+    Lines files have one employee object per line with nested lists.
+
+    Args:
+        stream: Binary file-like object
+        file_format: 'csv' or 'jsonl'
+
+    Yields:
+        (line number, record dict or None, parse error or None) tuples
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if file_format == 'jsonl':
+        for line_no, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_no, None, f'Invalid JSON: {e}'
+                continue
+            if not isinstance(record, dict):
+                yield line_no, None, 'Each line must be a JSON object'
+                continue
+            yield line_no, record, None
+    else:
+        reader = csv.DictReader(text)
+        for record in reader:
+            # reader.line_num is the last physical line of the record
+            yield reader.line_num, record, None
+
+
+def _clean(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _parse_date(value, field):
+    value = _clean(value)
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise RowError(f'{field} must be a YYYY-MM-DD date, got "{value}"')
+
+
+def _nested_rows(record, key):
+    value = record.get(key)
+    if value in (None, ''):
+        return []
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            raise RowError(f'{key} must be a JSON list')
+    if not isinstance(value, list) or not all(isinstance(item, dict) for item in value):
+        raise RowError(f'{key} must be a list of objects')
+    return value
+
+
+def _require(row, fields, label):
+    missing = [field for field in fields if not row.get(field)]
+    if missing:
+        raise RowError(f'{label} missing required fields: {", ".join(missing)}')
+
+
+def validate_record(record):
+    """
+    Validate and convert one import record.
+
+    Args:
+        record: Raw record dict from iter_records
+
+    Returns:
+        (employee values, list of education values, list of certification values)
+
+    Raises:
+        RowError: If the record is invalid
+    """
+    employee = {field: _clean(record.get(field)) for field in EMPLOYEE_FIELDS}
+    _require(employee, REQUIRED_EMPLOYEE_FIELDS, 'Employee')
+
+    employee['hire_date'] = _parse_date(employee['hire_date'], 'hire_date') or datetime.utcnow().date()
+    try:
+        employee['salary'] = float(employee['salary']) if employee['salary'] else 0
+    except ValueError:
+        raise RowError(f'salary must be a number, got "{employee["salary"]}"')
+    employee['permanent_address'] = employee['permanent_address'] or ''
+    employee['notes'] = employee['notes'] or ''
+    employee['created_at'] = datetime.utcnow()
+
+    educations = []
+    for i, item in enumerate(_nested_rows(record, 'educations'), start=1):
+        education = {field: _clean(item.get(field)) for field in EDUCATION_FIELDS}
+        _require(education, REQUIRED_EDUCATION_FIELDS, f'Education #{i}')
+        education['start_date'] = _parse_date(education['start_date'], f'Education #{i} start_date')
+        education['end_date'] = _parse_date(education['end_date'], f'Education #{i} end_date')
+        education['description'] = education['description'] or ''
+        educations.append(education)
+
+    certifications = []
+    for i, item in enumerate(_nested_rows(record, 'certifications'), start=1):
+        certification = {field: _clean(item.get(field)) for field in CERTIFICATION_FIELDS}
+        _require(certification, REQUIRED_CERTIFICATION_FIELDS, f'Certification #{i}')
+        certification['issue_date'] = _parse_date(certification['issue_date'], f'Certification #{i} issue_date')
+        certification['expiry_date'] = _parse_date(certification['expiry_date'], f'Certification #{i} expiry_date')
+        certification['credential_id'] = certification['credential_id'] or ''
+        certification['credential_url'] = certification['credential_url'] or ''
+        certifications.append(certification)
+
+    return employee, educations, certifications
+
+
+class ImportReport:
+    def __init__(self):
+        self.total_rows = 0
+        self.imported = 0
+        self.errors = []  # (line number, message)
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self.departments = set()
+        self.positions = set()
+
+    @property
+    def rows_per_sec(self):
+        return self.total_rows / self.elapsed if self.elapsed else 0.0
+
+    def error(self, line_no, message):
+        self.errors.append((line_no, message))
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+        self.errors.sort()
+        return self
+
+    def summary(self):
+        return (f'{self.imported} of {self.total_rows} rows imported, {len(self.errors)} errors '
+                f'in {self.elapsed:.2f}s ({self.rows_per_sec:.0f} rows/sec)')
+
+    def write_errors_csv(self, stream):
+        writer = csv.writer(stream)
+        writer.writerow(['line', 'error'])
+        writer.writerows(self.errors)
+
+
+class EmployeeImporter:
+    def __init__(self, session, metadata, batch_size=500):
+        """
+        Batched employee importer.
+
+        Rows are validated in chunks of batch_size. Each chunk does one
+        set-based uniqueness check for emails and employee IDs, then inserts
+        employees, educations and certifications with executemany and commits
+        in a single transaction. Emails are compared case-insensitively. Rows
+        only count towards duplicate checks for later chunks once their chunk
+        has committed, so a rolled-back chunk doesn't reject its rows again.
+
+        Args:
+            session: SQLAlchemy session (db.session)
+            metadata: MetaData holding the app's tables (db.metadata)
+            batch_size: Rows per chunk and transaction
+        """
+        self.session = session
+        self.batch_size = batch_size
+        self.employee = metadata.tables['employee']
+        self.education = metadata.tables['education']
+        self.certification = metadata.tables['certification']
+        self.department = metadata.tables['department']
+        self._seen_emails = set()
+        self._seen_employee_ids = set()
+
+    def run(self, records):
+        """
+        Import records from iter_records.
+
+        Args:
+            records: Iterable of (line number, record, parse error) tuples
+
+        Returns:
+            ImportReport
+        """
+        report = ImportReport()
+        chunk = []
+        for line_no, record, parse_error in records:
+            report.total_rows += 1
+            if parse_error:
+                report.error(line_no, parse_error)
+                continue
+            chunk.append((line_no, record))
+            if len(chunk) >= self.batch_size:
+                self._import_chunk(chunk, report)
+                chunk = []
+        if chunk:
+            self._import_chunk(chunk, report)
+        return report.finish()
+
+    def _existing_values(self, column, values):
+        if not values:
+            return set()
+        rows = self.session.execute(select(column).where(column.in_(values)))
+        return {row[0] for row in rows}
+
+    def _import_chunk(self, chunk, report):
+        # Validate rows and check uniqueness within the file
+        valid = []
+        chunk_emails = set()
+        chunk_employee_ids = set()
+        for line_no, record in chunk:
+            try:
+                employee, educations, certifications = validate_record(record)
+            except RowError as e:
+                report.error(line_no, str(e))
+                continue
+
+            email_key = employee['email'].lower()
+            if email_key in self._seen_emails or email_key in chunk_emails:
+                report.error(line_no, f'Duplicate email in file: {employee["email"]}')
+                continue
+            employee_id = employee['employee_id']
+            if employee_id and (employee_id in self._seen_employee_ids or employee_id in chunk_employee_ids):
+                report.error(line_no, f'Duplicate employee ID in file: {employee_id}')
+                continue
+            chunk_emails.add(email_key)
+            if employee_id:
+                chunk_employee_ids.add(employee_id)
+            valid.append((line_no, employee, educations, certifications))
+
+        if not valid:
+            return
+
+        # One query per unique column for the whole chunk
+        existing_emails = self._existing_values(
+            func.lower(self.employee.c.email), [row[1]['email'].lower() for row in valid]
+        )
+        existing_ids = self._existing_values(
+            self.employee.c.employee_id, [row[1]['employee_id'] for row in valid if row[1]['employee_id']]
+        )
+        rows = []
+        for line_no, employee, educations, certifications in valid:
+            if employee['email'].lower() in existing_emails:
+                report.error(line_no, f'Email already exists: {employee["email"]}')
+            elif employee['employee_id'] and employee['employee_id'] in existing_ids:
+                report.error(line_no, f'Employee ID already exists: {employee["employee_id"]}')
+            else:
+                rows.append((line_no, employee, educations, certifications))
+
+        if not rows:
+            return
+
+        try:
+            self._insert_rows(rows)
+            self.session.commit()
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            message = f'Batch failed and was rolled back: {e.__class__.__name__}: {getattr(e, "orig", e)}'
+            for line_no, *_ in rows:
+                report.error(line_no, message)
+            return
+
+        report.imported += len(rows)
+        for _, employee, _, _ in rows:
+            self._seen_emails.add(employee['email'].lower())
+            if employee['employee_id']:
+                self._seen_employee_ids.add(employee['employee_id'])
+            report.departments.add(employee['department'])
+            report.positions.add(employee['position'])
+
+    def _insert_rows(self, rows):
+        employees = [row[1] for row in rows]
+
+        # Create departments that don't exist yet, then insert the employees
+        headcounts = {}
+        for employee in employees:
+            headcounts[employee['department']] = headcounts.get(employee['department'], 0) + 1
+        known = self._existing_values(self.department.c.name, list(headcounts))
+        missing = [name for name in headcounts if name not in known]
+        if missing:
+            now = datetime.utcnow()
+            self.session.execute(insert(self.department),
+                                 [{'name': name, 'headcount': 0, 'created_at': now} for name in missing])
+
+        self.session.execute(insert(self.employee), employees)
+
+        # Emails are unique, so they map the new rows back to their primary keys
+        id_by_email = dict(self.session.execute(
+            select(self.employee.c.email, self.employee.c.id).where(
+                self.employee.c.email.in_([employee['email'] for employee in employees])
+            )
+        ).all())
+
+        educations = []
+        certifications = []
+        now = datetime.utcnow()
+        for _, employee, employee_educations, employee_certifications in rows:
+            employee_pk = id_by_email[employee['email']]
+            educations.extend(dict(education, employee_id=employee_pk, created_at=now) for education in employee_educations)
+            certifications.extend(dict(certification, employee_id=employee_pk, created_at=now) for certification in employee_certifications)
+        if educations:
+            self.session.execute(insert(self.education), educations)
+        if certifications:
+            self.session.execute(insert(self.certification), certifications)
+
+        # Core inserts bypass the ORM headcount hook, so apply the counts here
+        self.session.execute(
+            update(self.department)
+            .where(self.department.c.name == bindparam('department_name'))
+            .values(headcount=self.department.c.headcount + bindparam('added')),
+            [{'department_name': name, 'added': count} for name, count in headcounts.items()]
+        )
@@ -1,18 +1,14 @@
-from app import app, db, User, Employee
+from app import app, init_db, User, Employee
+
+# Importing app doesn't touch the database: create missing tables and the
+# default admin user first, so a fresh checkout gets an empty report
+init_db(app)
 
 with app.app_context():
     # Check if admin user exists
     admin = User.query.filter_by(username='admin').first()
     print(f'Admin exists: {admin is not None}')
     
-    if admin is None:
-        # Create admin user
-        admin = User(username='admin', is_admin=True)
-        admin.set_password('admin')
-        db.session.add(admin)
-        db.session.commit()
-        print("Admin user created")
-    
     # List all users
     print('\nCurrent Users:')
     for u in User.query.all():
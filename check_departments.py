@@ -1,10 +1,8 @@
-from app import app, db, Employee
+from app import app, db, Department
 
 with app.app_context():
-    departments = db.session.query(Employee.department).distinct().all()
-    departments = [dept[0] for dept in departments]
+    departments = Department.query.order_by(Department.name).all()
     
     print('Current Departments:')
     for dept in departments:
-        count = Employee.query.filter_by(department=dept).count()
-        print(f'{dept}: {count} employees')
\ No newline at end of file
+        print(f'{dept.name}: {dept.headcount} employees')
\ No newline at end of file
@@ -0,0 +1,56 @@
+import re
+import sys
+from sqlalchemy import select
+from app import app, db, User, Department, Employee, Education, Certification, Document
+
+# Hot queries issued by index(), department_employees(), get_positions(),
+# employee_details(), self_onboarding() and uploaded_file().
+# The dashboard reads the small department table in full by design, so it isn't listed.
+HOT_QUERIES = {
+    'department by name': select(Department).where(Department.name == 'Sales'),
+    'department listing page': select(Employee.id).where(Employee.department == 'Sales').order_by(Employee.last_name, Employee.id).limit(50),
+    'all employees listing page': select(Employee.id).order_by(Employee.last_name, Employee.id).limit(50),
+    'position lookup': select(Employee.id).where(Employee.position == 'Engineer'),
+    'distinct positions': select(Employee.position).distinct(),
+    'educations by employee': select(Education).where(Education.employee_id == 1),
+    'certifications by employee': select(Certification).where(Certification.employee_id == 1),
+    'documents by employee': select(Document).where(Document.employee_id == 1),
+    'documents by Drive file': select(Document.employee_id).where(Document.drive_file_id == 'abc'),
+    'employee by Drive profile picture': select(Employee.id).where(Employee.drive_profile_pic_id == 'abc'),
+    'user by username': select(User).where(User.username == 'admin'),
+    'user by employee code': select(User).where(User.employee_code == 'EMP001'),
+    'user by employee': select(User).where(User.employee_id == 1),
+    'employee by employee ID': select(Employee).where(Employee.employee_id == 'EMP001'),
+}
+
+# A plan step like "SCAN employee" reads every row; "SCAN employee USING INDEX ..." does not
+TABLE_SCAN = re.compile(r'^SCAN (?:TABLE )?\S+$')
+
+def check_query_plans():
+    failures = []
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            print('EXPLAIN QUERY PLAN checks only run against SQLite databases.')
+            return True
+        
+        for name, statement in HOT_QUERIES.items():
+            sql = str(statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+            plan = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}')).all()
+            details = [row[-1] for row in plan]
+            scans = [detail for detail in details if TABLE_SCAN.match(detail)]
+            
+            status = 'FAIL' if scans else 'ok'
+            print(f'[{status}] {name}: {"; ".join(details)}')
+            if scans:
+                failures.append(name)
+    
+    if failures:
+        print(f'\n{len(failures)} hot queries still do a table scan: {", ".join(failures)}')
+        print('Run migrations/add_indexes.py against the database.')
+        return False
+    
+    print('\nAll hot queries use an index.')
+    return True
+
+if __name__ == '__main__':
+    sys.exit(0 if check_query_plans() else 1)
@@ -2,10 +2,88 @@ import os
 
 # Application configuration
 SECRET_KEY = 'your-secret-key'
-SQLALCHEMY_DATABASE_URI = 'sqlite:///employees.db'
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50MB max upload size
 
+# Database
+# Set DATABASE_URL to a postgresql:// URI to run against PostgreSQL (requires psycopg2)
+SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///employees.db')
+if SQLALCHEMY_DATABASE_URI.startswith('postgres://'):
+    SQLALCHEMY_DATABASE_URI = 'postgresql://' + SQLALCHEMY_DATABASE_URI[len('postgres://'):]
+
+# Connection pool, sized for a multi-threaded server (per worker process)
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+DB_POOL_TIMEOUT = 30  # seconds to wait for a free connection
+
+# Pragmas applied to every new SQLite connection
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',       # readers no longer queue behind writers
+    'synchronous': 'NORMAL',     # durable with WAL, far fewer fsyncs
+    'busy_timeout': 30000,       # ms to wait for a write lock instead of "database is locked"
+    'mmap_size': 268435456,      # 256MB of memory-mapped reads
+    'cache_size': -65536,        # 64MB page cache (negative values are KiB)
+    'temp_store': 'MEMORY',
+}
+
+if SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+    if SQLALCHEMY_DATABASE_URI in ('sqlite://', 'sqlite:///:memory:'):
+        # In-memory databases use a single shared connection
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+    else:
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            'pool_size': DB_POOL_SIZE,
+            'max_overflow': DB_MAX_OVERFLOW,
+            'pool_timeout': DB_POOL_TIMEOUT,
+            'connect_args': {'timeout': SQLITE_PRAGMAS['busy_timeout'] / 1000, 'check_same_thread': False},
+        }
+else:
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_pre_ping': True,   # drop connections the server closed
+        'pool_recycle': 1800,    # recycle before typical idle timeouts
+        'pool_use_lifo': True,   # keep a small hot set of connections under light load
+    }
+
+# Admin dashboard aggregate cache lifetime in seconds (0 = until invalidated)
+DASHBOARD_CACHE_TTL = 60
+
+# Logged-in user/employee lookups shared across requests, in seconds (0 = per request only)
+CURRENT_USER_CACHE_TTL = 30
+
+# Employee listing pagination (/all-employees, /department/<department>)
+EMPLOYEES_PAGE_SIZE = 50
+EMPLOYEES_MAX_PAGE_SIZE = 500
+
+# Maximum number of ranked results returned by /search
+SEARCH_RESULTS_LIMIT = 100
+
+# /positions typeahead: index rebuild interval and browser cache lifetime in seconds
+POSITION_INDEX_TTL = 300
+POSITIONS_CACHE_MAX_AGE = 60
+
+# Bulk employee import: rows validated and inserted per transaction
+IMPORT_BATCH_SIZE = 500
+
+# Streaming employee export: rows fetched per database round trip
+EXPORT_BATCH_SIZE = 1000
+
+# Per-request query stats: logged as JSON in production, X-Query-* headers in debug mode.
+# Statements run this many times in one request are reported as likely N+1 queries.
+QUERY_STATS_ENABLED = True
+QUERY_REPEAT_THRESHOLD = 5
+
+# Prometheus metrics at /metrics, readable by admins or with "Authorization: Bearer <METRICS_TOKEN>".
+# With several worker processes, point METRICS_DIR at a folder shared by the workers;
+# each worker writes its values there every METRICS_FLUSH_INTERVAL seconds and /metrics
+# sums them. gunicorn.conf.py and "python app.py" empty the folder when the server starts.
+METRICS_ENABLED = True
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+METRICS_DIR = os.environ.get('METRICS_DIR')
+METRICS_FLUSH_INTERVAL = 5
+
 # Upload directories
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static/uploads')
 PROFILE_PICTURES_FOLDER = os.path.join(UPLOAD_FOLDER, 'profile_pictures')
@@ -22,5 +100,34 @@ GOOGLE_DRIVE_CREDENTIALS_FILE = os.path.join(
 if not os.path.exists(GOOGLE_DRIVE_CREDENTIALS_FILE):
     GOOGLE_DRIVE_ENABLED = False
 
+# Uploads up to this size are kept in memory while they're saved, so they can be
+# sent to Google Drive without reading the local copy back
+DRIVE_INLINE_UPLOAD_MAX_BYTES = 8 * 1024 * 1024
+DRIVE_PENDING_CONTENT_TTL = 60     # seconds that content is held for a job no worker of this process picked up
+
+# Background copying of uploads to Google Drive (a database-backed job queue)
+DRIVE_UPLOAD_WORKERS = 2           # worker threads per process, 0 to leave jobs to "flask process-drive-uploads"
+DRIVE_UPLOAD_POLL_INTERVAL = 5     # seconds between checks for due jobs when idle
+DRIVE_UPLOAD_MAX_ATTEMPTS = 8      # attempts before a job is marked failed
+DRIVE_UPLOAD_RETRY_BASE = 5        # seconds before the first retry, doubling after each failure
+DRIVE_UPLOAD_RETRY_MAX = 3600      # longest wait between retries
+DRIVE_UPLOAD_LEASE = 600           # seconds before a job claimed by a worker that died is retried
+
 # Google Drive folder structure
-GOOGLE_DRIVE_ROOT_FOLDER_NAME = 'Employee Management System'
\ No newline at end of file
+GOOGLE_DRIVE_ROOT_FOLDER_NAME = 'Employee Management System'
+DRIVE_PARENT_CACHE_TTL = 300      # seconds the folders of a Drive file unknown to the database are cached
+DRIVE_FOLDER_CACHE_SIZE = 1024     # folder IDs kept in memory per process (all of them are kept in the database)
+
+# IDs found on earlier runs (e.g. the root folder), so startup doesn't search Drive again
+GOOGLE_DRIVE_STATE_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    'instance/drive_state.json'
+)
+
+# Maintenance scripts (make_all_public.py, make_files_public.py)
+DRIVE_MAINTENANCE_WORKERS = 4      # threads, each with its own Drive client
+DRIVE_MAINTENANCE_RATE = 10        # Drive calls per second across all threads, well under the per-user quota
+DRIVE_MAINTENANCE_CHECKPOINT_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    'instance/maintenance'
+)
@@ -0,0 +1,97 @@
+import threading
+import time
+
+
+class DashboardStatsCache:
+    def __init__(self, loader, ttl=60):
+        """
+        Process-local cache for the admin dashboard department aggregates.
+
+        Args:
+            loader: Callable returning a list of (department, count) tuples.
+                    It is expected to run a single grouped query.
+            ttl: Maximum age of a cached result in seconds. Explicit
+                 invalidation is local to the process, so the TTL bounds how
+                 stale another worker's view can get. Use 0 to disable expiry.
+        """
+        self.loader = loader
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._value = None
+        self._built_at = 0.0
+
+        # Counters exposed through stats()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.rebuilds = 0
+        self.last_rebuild_ms = 0.0
+        self.total_rebuild_ms = 0.0
+        self.max_rebuild_ms = 0.0
+
+    def _is_fresh(self):
+        if self._value is None:
+            return False
+        if self.ttl and time.monotonic() - self._built_at > self.ttl:
+            return False
+        return True
+
+    def get(self):
+        """
+        Get the cached dashboard aggregates, rebuilding them if needed.
+
+        Returns:
+            Dictionary with 'departments' (sorted list of names),
+            'department_counts' (name -> count) and 'total_employees'
+        """
+        with self._lock:
+            if self._is_fresh():
+                self.hits += 1
+                return self._value
+
+            self.misses += 1
+            start = time.perf_counter()
+            rows = self.loader()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            department_counts = {department: count for department, count in rows}
+            self._value = {
+                'departments': sorted(department_counts),
+                'department_counts': department_counts,
+                'total_employees': sum(department_counts.values())
+            }
+            self._built_at = time.monotonic()
+
+            self.rebuilds += 1
+            self.last_rebuild_ms = elapsed_ms
+            self.total_rebuild_ms += elapsed_ms
+            self.max_rebuild_ms = max(self.max_rebuild_ms, elapsed_ms)
+            return self._value
+
+    def invalidate(self):
+        """Drop the cached aggregates so the next get() rebuilds them."""
+        with self._lock:
+            self._value = None
+            self.invalidations += 1
+
+    def stats(self):
+        """
+        Get cache counters and rebuild timings.
+
+        Returns:
+            Dictionary of hit/miss counts and rebuild timings in milliseconds
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'rebuilds': self.rebuilds,
+                'last_rebuild_ms': round(self.last_rebuild_ms, 3),
+                'avg_rebuild_ms': round(self.total_rebuild_ms / self.rebuilds, 3) if self.rebuilds else 0.0,
+                'max_rebuild_ms': round(self.max_rebuild_ms, 3),
+                'cached': self._value is not None,
+                'ttl': self.ttl
+            }
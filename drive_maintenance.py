@@ -0,0 +1,298 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        """
+        Thread-safe token bucket limiting how fast API calls are made.
+
+        Args:
+            rate: Tokens added per second, 0 for no limit
+            capacity: Most tokens that can build up while idle (defaults to one second's worth)
+            clock: Monotonic clock, for tests
+            sleep: Sleep function, for tests
+        """
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = clock()
+
+    def acquire(self, tokens=1):
+        """
+        Take tokens, waiting until enough have built up.
+
+        Args:
+            tokens: Tokens to take, e.g. the number of calls in a batch request
+                    (more than the capacity counts as the whole capacity)
+
+        Returns:
+            Seconds spent waiting
+        """
+        if self.rate <= 0:
+            return 0.0
+        tokens = min(tokens, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            self.sleep(delay)
+            waited += delay
+
+
+class Checkpoint:
+    def __init__(self, path):
+        """
+        Progress of a maintenance run, appended to a JSON lines file after
+        every batch so a run that was killed can resume where it stopped.
+
+        Each line records one item: {"id": ..., "ok": true|false}. Later lines
+        win, so an item that failed and then succeeded on a resumed run counts
+        as done. A partly written last line (from a crash) is ignored.
+
+        Args:
+            path: Checkpoint file, or None to keep no checkpoint
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self.done = set()
+        self.failed = set()
+        if path and os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get('ok'):
+                    self.done.add(entry['id'])
+                    self.failed.discard(entry['id'])
+                else:
+                    self.failed.add(entry['id'])
+
+    def record(self, results):
+        """
+        Append the outcome of a batch.
+
+        Args:
+            results: Dict mapping item IDs to True (done) or False (failed)
+        """
+        with self._lock:
+            for item_id, ok in results.items():
+                if ok:
+                    self.done.add(item_id)
+                    self.failed.discard(item_id)
+                else:
+                    self.failed.add(item_id)
+            if not self.path:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, 'a') as f:
+                for item_id, ok in results.items():
+                    f.write(json.dumps({'id': item_id, 'ok': bool(ok)}) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def reset(self):
+        """Forget all progress, e.g. to run over every item again."""
+        with self._lock:
+            self.done.clear()
+            self.failed.clear()
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class MaintenanceRunner:
+    def __init__(self, operation, client_factory, workers=4, rate=10, batch_size=100,
+                 checkpoint=None, on_progress=None, progress_interval=10):
+        """
+        Runs a batch operation over many Drive items on a bounded thread pool.
+
+        Items are read lazily and handed to the workers in batches through a
+        bounded queue, so listing and processing overlap without holding every
+        item in memory. Each worker creates its own client (API clients can't
+        be shared between threads). All workers share one token bucket, so
+        the run stays under the API quota however many threads there are.
+
+        Args:
+            operation: Callable taking (client, list of item IDs) and returning a
+                       dict mapping each ID to True on success, False on failure
+            client_factory: Callable returning a client for the calling thread,
+                            or None if the service is unavailable
+            workers: Number of threads
+            rate: API calls per second across all workers, 0 for no limit
+            batch_size: Items per operation call
+            checkpoint: Checkpoint recording finished items, whose done items are
+                        skipped (optional)
+            on_progress: Callable taking the summary so far, called at most every
+                         progress_interval seconds (optional)
+            progress_interval: Seconds between progress reports
+        """
+        self.operation = operation
+        self.client_factory = client_factory
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.limiter = TokenBucket(rate, capacity=max(rate, batch_size) if rate > 0 else None)
+        self.checkpoint = checkpoint or Checkpoint(None)
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def run(self, item_ids):
+        """
+        Process every item, skipping those the checkpoint has as done.
+
+        Args:
+            item_ids: Iterable of item IDs (consumed lazily)
+
+        Returns:
+            Summary dict (see summary())
+        """
+        self._started = time.monotonic()
+        self._last_report = self._started
+        self._counts = {'seen': 0, 'skipped': 0, 'succeeded': 0, 'failed': 0, 'rate_limit_wait': 0.0}
+        self._failed_ids = []
+
+        batches = queue.Queue(maxsize=self.workers * 2)
+        threads = [
+            threading.Thread(target=self._work, args=(batches,), name=f'maintenance-{index}', daemon=True)
+            for index in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            batch = []
+            for item_id in item_ids:
+                with self._lock:
+                    self._counts['seen'] += 1
+                    if item_id in self.checkpoint.done:
+                        self._counts['skipped'] += 1
+                        continue
+                batch.append(item_id)
+                if len(batch) >= self.batch_size:
+                    self._put(batches, batch, threads)
+                    batch = []
+            if batch:
+                self._put(batches, batch, threads)
+        finally:
+            # Let the workers finish the queued batches, so their progress is saved
+            try:
+                for _ in threads:
+                    self._put(batches, None, threads)
+            except RuntimeError:
+                pass
+            for thread in threads:
+                thread.join()
+
+        return self.summary()
+
+    def _put(self, batches, batch, threads):
+        # Wait for room in the queue, but not for workers that have stopped
+        while True:
+            try:
+                batches.put(batch, timeout=1)
+                return
+            except queue.Full:
+                if not any(thread.is_alive() for thread in threads):
+                    raise RuntimeError('All maintenance workers stopped')
+
+    def _work(self, batches):
+        while True:
+            batch = batches.get()
+            if batch is None:
+                return
+            try:
+                client = self._client()
+                if client is None:
+                    raise RuntimeError('no client available')
+                waited = self.limiter.acquire(len(batch))
+                results = self.operation(client, batch)
+                results = {item_id: bool(results.get(item_id)) for item_id in batch}
+            except Exception as e:
+                logger.error(f"Maintenance batch of {len(batch)} items failed: {str(e)}")
+                waited = 0.0
+                results = {item_id: False for item_id in batch}
+            try:
+                self.checkpoint.record(results)
+            except Exception as e:
+                # The batch still counts; without its checkpoint a resumed run does it again
+                logger.error(f"Could not save the progress of {len(batch)} items: {str(e)}")
+            self._tally(results, waited)
+
+    def _client(self):
+        # One client per worker thread, created on its first batch
+        if getattr(self._local, 'client', None) is None:
+            self._local.client = self.client_factory()
+        return self._local.client
+
+    def _tally(self, results, waited):
+        report = None
+        with self._lock:
+            for item_id, ok in results.items():
+                if ok:
+                    self._counts['succeeded'] += 1
+                else:
+                    self._counts['failed'] += 1
+                    self._failed_ids.append(item_id)
+            self._counts['rate_limit_wait'] += waited
+            now = time.monotonic()
+            if self.on_progress is not None and now - self._last_report >= self.progress_interval:
+                self._last_report = now
+                report = self._summary()
+        if report is not None:
+            try:
+                self.on_progress(report)
+            except Exception as e:
+                logger.error(f"Maintenance progress report failed: {str(e)}")
+
+    def summary(self):
+        """
+        Throughput and failures of the current or last run.
+
+        Returns:
+            Dict with 'seen', 'skipped' (done in an earlier run), 'succeeded',
+            'failed', 'failed_ids', 'seconds', 'per_second' (items processed
+            per second) and 'rate_limit_wait' (seconds workers waited for the
+            token bucket, summed over workers)
+        """
+        with self._lock:
+            return self._summary()
+
+    def _summary(self):
+        seconds = time.monotonic() - self._started
+        processed = self._counts['succeeded'] + self._counts['failed']
+        return dict(
+            self._counts,
+            failed_ids=list(self._failed_ids),
+            seconds=seconds,
+            per_second=processed / seconds if seconds > 0 else 0.0,
+        )
+
+
+def format_summary(summary):
+    """One-line description of a MaintenanceRunner summary."""
+    return (
+        f"{summary['succeeded']} succeeded, {summary['failed']} failed, "
+        f"{summary['skipped']} already done, {summary['seen']} seen in {summary['seconds']:.1f}s "
+        f"({summary['per_second']:.1f} items/s, {summary['rate_limit_wait']:.1f}s waiting for the rate limit)"
+    )
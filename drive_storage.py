@@ -0,0 +1,291 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def load_drive_state(path):
+    """
+    Read the persisted Google Drive state (e.g. the root folder ID).
+
+    Args:
+        path: State file path, or None
+
+    Returns:
+        State dict, empty if the file is missing or unreadable
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable Google Drive state file {path}: {str(e)}")
+        return {}
+
+
+def save_drive_state(path, state):
+    """Write the Google Drive state file atomically."""
+    if not path:
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(temp_path, path)
+
+
+class LazyDriveHelper:
+    def __init__(self, factory=None):
+        """
+        Stand-in for a GoogleDriveHelper that is created in a background thread.
+
+        Creating the helper authenticates and resolves the root folder over
+        the network, so it runs in a background thread started by start()
+        instead of at startup. Each process starts its own thread, so forked
+        workers never share a client created by the parent.
+
+        Code that needs Drive right away calls get() (or any helper attribute),
+        which waits for the thread. Uploads don't wait: they go through the
+        Drive upload job queue (see upload_queue.py).
+
+        Args:
+            factory: Callable returning a GoogleDriveHelper, or None when Drive is
+                     disabled. Can be set later with configure().
+        """
+        self._lock = threading.Lock()
+        self.configure(factory)
+
+    def configure(self, factory):
+        """Replace the factory and drop any helper created by the previous one."""
+        with self._lock:
+            self._factory = factory
+            self._helper = None
+            self._done = threading.Event()
+            self._pid = None
+            if factory is None:
+                self._done.set()
+
+    def start(self):
+        """Start creating the helper in the background, once per process."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid() or self._factory is None:
+                return
+            if self._pid is not None:
+                # Forked from a process that had already started: start over in this one
+                self._helper = None
+                self._done = threading.Event()
+            self._pid = os.getpid()
+            thread = threading.Thread(target=self._initialize, name='drive-init', daemon=True)
+        thread.start()
+
+    def _initialize(self):
+        try:
+            helper = self._factory()
+        except Exception as e:
+            logger.error(f"Failed to initialize Google Drive: {str(e)}")
+            helper = None
+        if helper is not None and not helper.is_enabled():
+            helper = None
+
+        with self._lock:
+            self._helper = helper
+            self._done.set()
+
+    def get(self, timeout=None):
+        """
+        Get the helper, waiting for the background initialization if needed.
+
+        Args:
+            timeout: Seconds to wait, or None to wait until it finishes
+
+        Returns:
+            GoogleDriveHelper, or None if Drive is disabled, failed to initialize
+            or isn't ready within the timeout
+        """
+        self.start()
+        self._done.wait(timeout)
+        return self._helper
+
+    @property
+    def ready(self):
+        """True once the helper is created and connected."""
+        return self._done.is_set() and self._helper is not None
+
+    @property
+    def available(self):
+        """True unless Drive is disabled or failed to initialize (doesn't wait)."""
+        return self._factory is not None and (not self._done.is_set() or self._helper is not None)
+
+    def is_enabled(self):
+        helper = self.get()
+        return helper is not None and helper.is_enabled()
+
+    def __bool__(self):
+        return self.available
+
+    def __getattr__(self, name):
+        helper = self.get()
+        if helper is None:
+            raise AttributeError(f"Google Drive is not available (looking up '{name}')")
+        return getattr(helper, name)
+
+
+class FolderResolver:
+    def __init__(self, load=None, save=None, forget=None, max_entries=1024, stripes=64):
+        """
+        Cache of Drive folder IDs by (parent folder ID, name), shared by all
+        GoogleDriveHelper instances of a process.
+
+        Lookups go to an in-memory LRU first, then to the persistent store
+        (load), and only then to Drive. Concurrent misses for the same folder
+        wait on one lock, so only one of them searches for or creates the
+        folder. Entries aren't checked on every hit: callers that get a 404
+        for a cached folder drop it with forget().
+
+        Args:
+            load: Callable taking (parent_id, name), returning a stored folder ID or None
+            save: Callable taking (parent_id, name, folder_id), returning the folder ID
+                  to use (another process may have stored one first)
+            forget: Callable taking (parent_id, name, folder_id) that removes a stored entry
+            max_entries: Folder IDs kept in memory
+            stripes: Number of locks the folders are spread over
+        """
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stripes = [threading.Lock() for _ in range(stripes)]
+        self.configure(load, save, forget, max_entries)
+
+    def configure(self, load=None, save=None, forget=None, max_entries=None):
+        """Replace the store callables and size, and drop the cached IDs."""
+        with self._lock:
+            self.load = load
+            self.save = save
+            self.forget_stored = forget
+            if max_entries is not None:
+                self.max_entries = max_entries
+            self._entries.clear()
+
+    def resolve(self, helper, name, parent_id=None):
+        """
+        Get the ID of a folder, finding or creating it in Drive on a miss.
+
+        Args:
+            helper: GoogleDriveHelper used for the Drive calls on a miss
+            name: Folder name
+            parent_id: ID of the parent folder (optional)
+
+        Returns:
+            Folder ID, or None if it couldn't be created
+
+        Raises:
+            HttpError: If searching Drive for the folder failed
+        """
+        key = (parent_id or '', name)
+        folder_id = self._get(key)
+        if folder_id:
+            return folder_id
+        with self._stripes[hash(key) % len(self._stripes)]:
+            # Another thread may have resolved it while this one waited
+            folder_id = self._get(key)
+            if folder_id:
+                return folder_id
+            folder_id = self._call(self.load, parent_id, name)
+            if not folder_id:
+                folder_id = helper.lookup_folder(name, parent_id) or helper.create_folder(name, parent_id)
+                if not folder_id:
+                    return None
+                folder_id = self._call(self.save, parent_id, name, folder_id) or folder_id
+            self._put(key, folder_id)
+            return folder_id
+
+    def forget(self, name, parent_id=None, folder_id=None):
+        """
+        Drop a cached folder, e.g. after Drive reported it missing.
+
+        Args:
+            name: Folder name
+            parent_id: ID of the parent folder (optional)
+            folder_id: Only drop the entry if it still has this ID (optional)
+        """
+        key = (parent_id or '', name)
+        with self._lock:
+            if folder_id is None or self._entries.get(key) == folder_id:
+                self._entries.pop(key, None)
+        self._call(self.forget_stored, parent_id, name, folder_id)
+
+    def _get(self, key):
+        with self._lock:
+            folder_id = self._entries.get(key)
+            if folder_id:
+                self._entries.move_to_end(key)
+            return folder_id
+
+    def _put(self, key, folder_id):
+        with self._lock:
+            self._entries[key] = folder_id
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _call(self, func, *args):
+        # The store only saves Drive calls, so failures fall back to Drive
+        if func is None:
+            return None
+        try:
+            return func(*args)
+        except Exception as e:
+            logger.warning(f"Google Drive folder cache unavailable: {str(e)}")
+            return None
+
+
+class FileParentCache:
+    def __init__(self, ttl=300, max_entries=4096):
+        """
+        Short-lived process cache of Drive file parents, keyed by file ID.
+
+        Only files that aren't known locally are looked up in Drive, so this
+        keeps repeated views of such a file from calling Drive every time.
+        Failed lookups aren't cached.
+
+        Args:
+            ttl: Seconds an entry stays valid, bounding how long a moved file
+                 keeps its old parents. Use 0 to disable the cache.
+            max_entries: Entries kept, dropping the oldest first
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # file_id -> (expires_at, parents)
+
+    def get(self, file_id):
+        if not self.ttl:
+            return None
+        with self._lock:
+            entry = self._entries.get(file_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[file_id]
+                return None
+            return entry[1]
+
+    def set(self, file_id, parents):
+        if not self.ttl or parents is None:
+            return
+        with self._lock:
+            self._entries.pop(file_id, None)
+            self._entries[file_id] = (time.monotonic() + self.ttl, tuple(parents))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
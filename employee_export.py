@@ -0,0 +1,118 @@
+import csv
+import io
+import json
+from sqlalchemy import select
+from bulk_import import EMPLOYEE_FIELDS, EDUCATION_FIELDS, CERTIFICATION_FIELDS
+
+# Columns that can be exported; the defaults match the bulk import format
+EXPORT_COLUMNS = ('id',) + EMPLOYEE_FIELDS + ('created_at',)
+DEFAULT_COLUMNS = EMPLOYEE_FIELDS
+CHILD_COLLECTIONS = ('educations', 'certifications')
+
+
+def _json_default(value):
+    # Dates and datetimes
+    return value.isoformat()
+
+
+def iter_employee_records(session, metadata, columns=DEFAULT_COLUMNS, include=(), department=None,
+                          hired_from=None, hired_to=None, batch_size=1000):
+    """
+    Stream employee records from the database.
+
+    Rows are fetched with yield_per, so only one batch of employees (and
+    their child rows, fetched with one IN query per batch) is held in
+    memory at a time.
+
+    Args:
+        session: SQLAlchemy session (db.session)
+        metadata: MetaData holding the app's tables (db.metadata)
+        columns: Employee columns to export, in order
+        include: Child collections to add ('educations', 'certifications')
+        department: Only export this department (optional)
+        hired_from: Only export employees hired on or after this date (optional)
+        hired_to: Only export employees hired on or before this date (optional)
+        batch_size: Rows fetched per round trip
+
+    Yields:
+        Record dicts with the requested columns and child lists
+    """
+    employee = metadata.tables['employee']
+    children = {
+        'educations': (metadata.tables['education'], EDUCATION_FIELDS),
+        'certifications': (metadata.tables['certification'], CERTIFICATION_FIELDS),
+    }
+
+    statement = select(employee.c.id, *[employee.c[column] for column in columns if column != 'id']).order_by(employee.c.id)
+    if department:
+        statement = statement.where(employee.c.department == department)
+    if hired_from:
+        statement = statement.where(employee.c.hire_date >= hired_from)
+    if hired_to:
+        statement = statement.where(employee.c.hire_date <= hired_to)
+
+    result = session.execute(statement.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        employee_ids = [row.id for row in partition]
+
+        child_rows = {}
+        for name in include:
+            table, fields = children[name]
+            rows = {}
+            child_query = select(table.c.employee_id, *[table.c[field] for field in fields]).where(
+                table.c.employee_id.in_(employee_ids)
+            ).order_by(table.c.id)
+            for row in session.execute(child_query):
+                rows.setdefault(row.employee_id, []).append({field: getattr(row, field) for field in fields})
+            child_rows[name] = rows
+
+        for row in partition:
+            record = {column: getattr(row, column) for column in columns}
+            for name in include:
+                record[name] = child_rows[name].get(row.id, [])
+            yield record
+
+
+def csv_lines(records, columns, include=(), chunk_size=64 * 1024):
+    """
+    Encode records as CSV.
+
+    Child collections are written as JSON lists, the same way the bulk
+    import reads them. Output is yielded in chunks of about chunk_size
+    characters so the response isn't split into one write per row.
+
+    Yields:
+        CSV text chunks
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(list(columns) + list(include))
+    for record in records:
+        values = ['' if record[column] is None else record[column] for column in columns]
+        values += [json.dumps(record[name], default=_json_default) for name in include]
+        writer.writerow(values)
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+
+def jsonl_lines(records, chunk_size=64 * 1024):
+    """
+    Encode records as JSON Lines, one object per line.
+
+    Yields:
+        Text chunks of about chunk_size characters
+    """
+    lines = []
+    size = 0
+    for record in records:
+        line = json.dumps(record, default=_json_default) + '\n'
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield ''.join(lines)
+            lines = []
+            size = 0
+    yield ''.join(lines)
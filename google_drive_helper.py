@@ -1,5 +1,9 @@
 import os
 import io
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
@@ -14,8 +18,17 @@ except (ImportError, AttributeError):
     CREDENTIALS_PATH = os.environ.get('GOOGLE_APPLICATION_CREDENTIALS')
     ROOT_FOLDER_NAME = 'Employee Management System'
 
+# Maximum number of calls the Drive API accepts in one batch request
+BATCH_SIZE = 100
+# Times a rate-limited call in a batch is retried before it counts as failed
+BATCH_MAX_RETRIES = 5
+# Files returned per page by the iter_files* methods (the Drive API maximum)
+LIST_PAGE_SIZE = 1000
+# Error reasons the Drive API returns with 403 when a quota is exceeded
+RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded', 'sharingRateLimitExceeded')
+
 class GoogleDriveHelper:
-    def __init__(self, credentials_path=None, root_folder_name=None):
+    def __init__(self, credentials_path=None, root_folder_name=None, root_folder_id=None, folder_resolver=None):
         """
         Initialize the Google Drive helper with service account credentials.
         
@@ -24,24 +37,29 @@ class GoogleDriveHelper:
                              If None, will use the configured path or GOOGLE_APPLICATION_CREDENTIALS env var.
             root_folder_name: Name of the root folder in Google Drive.
                              If None, will use the configured name.
+            root_folder_id: ID of the root folder found on a previous run (optional).
+                           It is checked with a single request instead of searching
+                           for the folder and updating its permissions again.
+            folder_resolver: Shared folder ID cache used by create_folder_if_not_exists
+                             (optional, see drive_storage.FolderResolver)
         """
         self.credentials_path = credentials_path or CREDENTIALS_PATH
         self.root_folder_name = root_folder_name or ROOT_FOLDER_NAME
         self.drive_service = None
+        self.credentials = None
         self.root_folder_id = None
+        self.folder_resolver = None
         
         # Check if credentials file exists
         if self.credentials_path and os.path.exists(self.credentials_path):
             self._initialize_service()
             if self.is_enabled():
-                # Create or get the root folder
-                self.root_folder_id = self.create_folder_if_not_exists(self.root_folder_name)
-                
-                # Make sure the root folder is publicly accessible
-                if self.root_folder_id:
-                    self.make_file_public(self.root_folder_id)
+                self.root_folder_id = self.resolve_root_folder(root_folder_id)
         else:
             print("Warning: Google Drive credentials not found. File uploads will be stored locally.")
+        
+        # Set after the root folder, which has its own state (see resolve_root_folder)
+        self.folder_resolver = folder_resolver
     
     def _initialize_service(self):
         """Initialize the Google Drive service."""
@@ -51,6 +69,7 @@ class GoogleDriveHelper:
                 scopes=['https://www.googleapis.com/auth/drive']
             )
             self.drive_service = build('drive', 'v3', credentials=credentials)
+            self.credentials = credentials
             print("Google Drive service initialized successfully.")
         except Exception as e:
             print(f"Error initializing Google Drive service: {str(e)}")
@@ -60,10 +79,65 @@ class GoogleDriveHelper:
         """Check if Google Drive integration is enabled."""
         return self.drive_service is not None
     
+    def resolve_root_folder(self, known_id=None):
+        """
+        Find or create the root folder.
+        
+        Args:
+            known_id: Root folder ID found on a previous run (optional)
+            
+        Returns:
+            Root folder ID, or None if it couldn't be found or created
+        """
+        if not self.is_enabled():
+            return None
+            
+        if known_id and self.folder_exists(known_id):
+            return known_id
+            
+        # Create or get the root folder
+        folder_id = self.create_folder_if_not_exists(self.root_folder_name)
+        
+        # Make sure the root folder is publicly accessible
+        if folder_id:
+            self.make_file_public(folder_id)
+        return folder_id
+    
+    def folder_exists(self, folder_id):
+        """
+        Check that a folder ID still refers to a folder that isn't in the trash.
+        
+        Args:
+            folder_id: ID of the folder
+            
+        Returns:
+            False if the folder is gone, True otherwise (including on transient errors)
+        """
+        if not self.is_enabled():
+            return False
+            
+        try:
+            folder = self.drive_service.files().get(
+                fileId=folder_id,
+                fields='id, mimeType, trashed'
+            ).execute()
+            return (folder.get('mimeType') == 'application/vnd.google-apps.folder'
+                    and not folder.get('trashed'))
+        except HttpError as e:
+            if e.resp.status == 404:
+                return False
+            print(f"Error checking folder {folder_id}: {str(e)}")
+            return True
+    
     def create_folder(self, folder_name, parent_id=None):
         """
         Create a folder in Google Drive.
         
+        The folder is made publicly accessible with a link. Folders created in
+        the root folder inherit its link sharing (Drive permissions propagate
+        to a folder's contents), so only folders elsewhere need their own
+        permission call.
+        
         Args:
             folder_name: Name of the folder to create
             parent_id: ID of the parent folder (optional)
@@ -90,6 +164,8 @@ class GoogleDriveHelper:
             ).execute()
             
             folder_id = folder.get('id')
+            if parent_id and parent_id == self.root_folder_id:
+                return folder_id
             
             # Make the folder publicly accessible
             try:
@@ -109,6 +185,9 @@ class GoogleDriveHelper:
         """
         Create a folder in Google Drive if it doesn't exist.
         
+        With a folder_resolver, known folders are answered from its cache
+        and concurrent calls for the same folder search for it only once.
+        
         Args:
             folder_name: Name of the folder to create
             parent_id: ID of the parent folder (optional)
@@ -120,29 +199,59 @@ class GoogleDriveHelper:
             return None
             
         try:
-            # Search for the folder
-            query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder'"
-            if parent_id:
-                query += f" and '{parent_id}' in parents"
-            
-            response = self.drive_service.files().list(
-                q=query,
-                spaces='drive',
-                fields='files(id, name)'
-            ).execute()
-            
-            # If folder exists, return its ID
-            if response.get('files'):
-                return response['files'][0]['id']
-            
-            # If folder doesn't exist, create it
-            return self.create_folder(folder_name, parent_id)
+            if self.folder_resolver is not None:
+                return self.folder_resolver.resolve(self, folder_name, parent_id)
+            return self.lookup_folder(folder_name, parent_id) or self.create_folder(folder_name, parent_id)
             
         except HttpError as e:
             print(f"Error creating folder in Google Drive: {str(e)}")
             return None
     
-    def upload_file(self, file_path, file_name=None, parent_folder_id=None, mime_type=None):
+    def lookup_folder(self, folder_name, parent_id=None):
+        """
+        Find a folder in Google Drive by name.
+        
+        Args:
+            folder_name: Name of the folder
+            parent_id: ID of the parent folder (optional)
+            
+        Returns:
+            Folder ID of the first matching folder, or None if there is none
+            
+        Raises:
+            HttpError: If the search failed, so callers don't create a duplicate folder
+        """
+        if not self.is_enabled():
+            return None
+            
+        # Search for the folder
+        escaped_name = folder_name.replace('\\', '\\\\').replace("'", "\\'")
+        query = f"name='{escaped_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
+        if parent_id:
+            query += f" and '{parent_id}' in parents"
+        
+        response = self.drive_service.files().list(
+            q=query,
+            spaces='drive',
+            fields='files(id, name)'
+        ).execute()
+        
+        files = response.get('files')
+        return files[0]['id'] if files else None
+    
+    def forget_folder(self, folder_name, parent_id=None, folder_id=None):
+        """
+        Drop a folder from the folder_resolver cache, e.g. after Drive reported it missing.
+        
+        Args:
+            folder_name: Name of the folder
+            parent_id: ID of the parent folder (optional)
+            folder_id: Only drop the entry if it still has this ID (optional)
+        """
+        if self.folder_resolver is not None:
+            self.folder_resolver.forget(folder_name, parent_id, folder_id)
+    
+    def upload_file(self, file_path, file_name=None, parent_folder_id=None, mime_type=None, make_public=True):
         """
         Upload a file to Google Drive.
         
@@ -151,6 +260,9 @@ class GoogleDriveHelper:
             file_name: Name to give the file in Google Drive (optional)
             parent_folder_id: ID of the parent folder (optional)
             mime_type: MIME type of the file (optional)
+            make_public: Make the file publicly accessible with a link; pass False
+                         when the parent folder is link-shared, as the file
+                         inherits its access without another API call
             
         Returns:
             File ID of the uploaded file, or None if upload failed
@@ -196,7 +308,8 @@ class GoogleDriveHelper:
             file_id = file.get('id')
             print(f"File uploaded successfully. File ID: {file_id}")
             # Make the file publicly accessible
-            self._make_uploaded_file_public(file_id)
+            if make_public:
+                self._make_uploaded_file_public(file_id)
             
             return file_id
             
@@ -209,7 +322,7 @@ class GoogleDriveHelper:
             traceback.print_exc()
             return None
     
-    def upload_file_from_memory(self, file_content, file_name, parent_folder_id=None, mime_type=None):
+    def upload_file_from_memory(self, file_content, file_name, parent_folder_id=None, mime_type=None, make_public=True):
         """
         Upload a file from memory to Google Drive.
         
@@ -218,6 +331,7 @@ class GoogleDriveHelper:
             file_name: Name to give the file in Google Drive
             parent_folder_id: ID of the parent folder (optional)
             mime_type: MIME type of the file (optional)
+            make_public: Make the file publicly accessible with a link (see upload_file)
             
         Returns:
             File ID of the uploaded file, or None if upload failed
@@ -257,7 +371,8 @@ class GoogleDriveHelper:
             file_id = file.get('id')
             print(f"File uploaded successfully. File ID: {file_id}")
             # Make the file publicly accessible
-            self._make_uploaded_file_public(file_id)
+            if make_public:
+                self._make_uploaded_file_public(file_id)
             
             return file_id
             
@@ -309,25 +424,44 @@ class GoogleDriveHelper:
             folder_id: ID of the folder
             
         Returns:
-            True if the file is in the folder, False otherwise
+            True if the file is in the folder, False otherwise (including
+            when the check fails)
         """
-        if not self.is_enabled() or not file_id or not folder_id:
+        if not folder_id:
             return False
             
+        parents = self.get_file_parents(file_id)
+        return parents is not None and folder_id in parents
+    
+    def get_file_parents(self, file_id):
+        """
+        Get the IDs of the folders a file is in.
+        
+        Args:
+            file_id: ID of the file
+            
+        Returns:
+            List of parent folder IDs (empty if the file doesn't exist), or
+            None if they couldn't be read
+        """
+        if not self.is_enabled() or not file_id:
+            return None
+            
         try:
-            # Get the file metadata
             file = self.drive_service.files().get(
                 fileId=file_id,
                 fields='parents'
             ).execute()
+            return file.get('parents', [])
             
-            # Check if the folder is in the parents
-            return folder_id in file.get('parents', [])
-            
+        except HttpError as e:
+            if e.resp.status == 404:
+                return []
+            print(f"Error getting the parents of file {file_id}: {str(e)}")
+            return None
         except Exception as e:
-            print(f"Error checking if file is in folder: {str(e)}")
-            # If there's an error, assume the file is accessible
-            return True
+            print(f"Error getting the parents of file {file_id}: {str(e)}")
+            return None
     
     def get_folder_url(self, folder_id):
         """
@@ -382,10 +516,114 @@ class GoogleDriveHelper:
                 import traceback
                 traceback.print_exc()
                 
+    def make_files_public_batch(self, file_ids):
+        """
+        Make several files publicly accessible with a link, up to 100 per request.
+
+        Args:
+            file_ids: IDs of the files
+
+        Returns:
+            Dict mapping each file ID to True if successful, False otherwise
+        """
+        permission = {'type': 'anyone', 'role': 'reader'}
+        results, errors = self._execute_batch(
+            file_ids,
+            lambda file_id: self.drive_service.permissions().create(
+                fileId=file_id, body=permission, fields='id'
+            )
+        )
+        for file_id, error in errors.items():
+            print(f"Error setting public permission on {file_id}: {str(error)}")
+        print(f"Made {len(results)} of {len(results) + len(errors)} files publicly accessible with a link")
+        return {file_id: file_id in results for file_id in dict.fromkeys(file_ids) if file_id}
+
+    def get_files_metadata_batch(self, file_ids, fields='id, name, mimeType, parents, trashed'):
+        """
+        Get the metadata of several files, up to 100 per request.
+
+        Args:
+            file_ids: IDs of the files
+            fields: Fields to return for each file
+
+        Returns:
+            Dict mapping each file ID to its metadata dictionary, or None if
+            the file doesn't exist or couldn't be read
+        """
+        results, errors = self._execute_batch(
+            file_ids,
+            lambda file_id: self.drive_service.files().get(fileId=file_id, fields=fields)
+        )
+        for file_id, error in errors.items():
+            if not (isinstance(error, HttpError) and error.resp.status == 404):
+                print(f"Error getting metadata of {file_id}: {str(error)}")
+        return {file_id: results.get(file_id) for file_id in dict.fromkeys(file_ids) if file_id}
+
+    def _execute_batch(self, file_ids, make_request):
+        """
+        Run one API call per file ID in batch requests of up to BATCH_SIZE calls.
+
+        Calls rejected by a rate limit are retried in a later batch with
+        exponential backoff; other failures are reported per file.
+
+        Args:
+            file_ids: IDs of the files (duplicates and empty IDs are skipped)
+            make_request: Callable taking a file ID and returning an unexecuted request
+
+        Returns:
+            (dict of file ID to response, dict of file ID to exception)
+        """
+        results, errors = {}, {}
+        if not self.is_enabled():
+            return results, errors
+
+        pending = [file_id for file_id in dict.fromkeys(file_ids) if file_id]
+        retries = 0
+        while pending:
+            limited = []
+
+            def callback(request_id, response, exception):
+                if exception is None:
+                    results[request_id] = response
+                elif _is_rate_limited(exception) and retries < BATCH_MAX_RETRIES:
+                    limited.append(request_id)
+                else:
+                    errors[request_id] = exception
+
+            for start in range(0, len(pending), BATCH_SIZE):
+                chunk = pending[start:start + BATCH_SIZE]
+                batch = self.drive_service.new_batch_http_request(callback=callback)
+                for file_id in chunk:
+                    batch.add(make_request(file_id), request_id=file_id)
+                try:
+                    batch.execute()
+                except Exception as e:
+                    # The whole batch failed: retry it if rate limited, otherwise fail each call
+                    unfinished = [file_id for file_id in chunk if file_id not in results and file_id not in errors]
+                    for file_id in unfinished:
+                        if file_id in limited:
+                            continue
+                        if _is_rate_limited(e) and retries < BATCH_MAX_RETRIES:
+                            limited.append(file_id)
+                        else:
+                            errors[file_id] = e
+
+            if limited:
+                retries += 1
+                delay = min(64, 2 ** retries) + random.random()
+                print(f"Drive rate limit hit for {len(limited)} calls, retrying in {delay:.1f}s")
+                time.sleep(delay)
+            pending = limited
+
+        return results, errors
+
     def list_files_in_folder(self, folder_id):
         """
         List all files in a Google Drive folder.
         
+        Reads every page of results; use iter_files_in_folder() to go
+        through a large folder without holding all of it in memory.
+        
         Args:
             folder_id: ID of the folder
             
@@ -396,14 +634,7 @@ class GoogleDriveHelper:
             return None
             
         try:
-            query = f"'{folder_id}' in parents and trashed=false"
-            results = self.drive_service.files().list(
-                q=query,
-                fields="files(id, name, mimeType, webViewLink)",
-                pageSize=100
-            ).execute()
-            
-            files = results.get('files', [])
+            files = list(self.iter_files_in_folder(folder_id, fields='id, name, mimeType, webViewLink'))
             print(f"Found {len(files)} files in folder {folder_id}")
             return files
             
@@ -412,7 +643,95 @@ class GoogleDriveHelper:
             import traceback
             traceback.print_exc()
             return None
+    
+    def iter_files_in_folder(self, folder_id, query=None, **kwargs):
+        """
+        Iterate over the files in a Google Drive folder (not in its subfolders).
+        
+        Args:
+            folder_id: ID of the folder
+            query: Additional Drive search query, e.g. "mimeType != 'application/vnd.google-apps.folder'"
+            **kwargs: Passed on to iter_files()
+            
+        Returns:
+            Iterator of file metadata dictionaries (see iter_files())
+        """
+        folder_query = f"'{folder_id}' in parents and trashed=false"
+        if query:
+            folder_query += f" and ({query})"
+        return self.iter_files(folder_query, **kwargs)
+    
+    def iter_files(self, query=None, fields='id, name, mimeType', page_size=LIST_PAGE_SIZE,
+                   order_by=None, prefetch=True):
+        """
+        Iterate over the files matching a Drive search query, one page at a time.
+        
+        Pages are requested lazily, following nextPageToken until the last one.
+        With prefetch, the next page is requested in a background thread
+        while the caller works through the current one. That thread has its
+        own HTTP connection, so the caller can keep using this helper.
+        
+        Args:
+            query: Drive search query (optional, all files visible to the service account if None)
+            fields: Fields to return for each file
+            page_size: Files requested per page
+            order_by: Sort order, e.g. 'name' or 'modifiedTime desc' (optional)
+            prefetch: Request the next page before the current one is consumed
+            
+        Yields:
+            File metadata dictionaries
+            
+        Raises:
+            HttpError: If a page couldn't be read, instead of silently ending the listing early
+        """
+        if not self.is_enabled():
+            return
+            
+        def page_request(page_token):
+            parameters = {'fields': f'nextPageToken, files({fields})', 'pageSize': page_size}
+            if query:
+                parameters['q'] = query
+            if order_by:
+                parameters['orderBy'] = order_by
+            if page_token:
+                parameters['pageToken'] = page_token
+            return self.drive_service.files().list(**parameters)
+            
+        executor = None
+        prefetch_http = None
+        if prefetch and self.credentials is not None:
+            import google_auth_httplib2
+            import httplib2
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='drive-list')
+            prefetch_http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http())
+            
+        try:
+            response = page_request(None).execute()
+            while True:
+                page_token = response.get('nextPageToken')
+                next_page = None
+                if page_token and executor is not None:
+                    next_page = executor.submit(page_request(page_token).execute, http=prefetch_http)
+                    
+                yield from response.get('files', [])
+                
+                if not page_token:
+                    break
+                response = next_page.result() if next_page is not None else page_request(page_token).execute()
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
 
-# Create a singleton instance
-# Note: This singleton is not used in app.py, which creates its own instance
-drive_helper = GoogleDriveHelper()
\ No newline at end of file
+def _is_rate_limited(error):
+    """True if an API error means a rate limit or quota was exceeded."""
+    if not isinstance(error, HttpError):
+        return False
+    if error.resp.status == 429:
+        return True
+    if error.resp.status != 403:
+        return False
+    try:
+        details = json.loads(error.content.decode('utf-8')).get('error', {})
+    except (ValueError, AttributeError):
+        return False
+    return any(item.get('reason') in RATE_LIMIT_REASONS for item in details.get('errors', []))
@@ -0,0 +1,10 @@
+# Gunicorn settings, read by "gunicorn app:app" when started from this folder
+import config
+from metrics import MetricsRegistry
+
+
+def on_starting(server):
+    # Runs once in the master before any worker starts. Snapshots left in METRICS_DIR
+    # by the workers of a previous run would otherwise be summed into /metrics.
+    if config.METRICS_ENABLED and config.METRICS_DIR:
+        MetricsRegistry(config.METRICS_DIR).clear()
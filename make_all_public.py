@@ -1,45 +1,90 @@
+import argparse
+import os
 import sys
-from app import drive_helper
+from app import app, drive_helper, create_worker_drive_helper
+from drive_maintenance import Checkpoint, MaintenanceRunner, format_summary
+from google_drive_helper import BATCH_SIZE
 
-def make_all_public():
+def create_make_public_runner(checkpoint_name, workers=None, rate=None, restart=False):
+    """
+    Runner making Drive files public in batches on several threads.
+    
+    Progress is saved to DRIVE_MAINTENANCE_CHECKPOINT_DIR, so running the same
+    script again after it was stopped skips the files it already made public.
+    
+    Args:
+        checkpoint_name: Name of the checkpoint file (one per script)
+        workers: Number of threads (defaults to DRIVE_MAINTENANCE_WORKERS)
+        rate: Drive calls per second (defaults to DRIVE_MAINTENANCE_RATE)
+        restart: Ignore the progress of earlier runs
+        
+    Returns:
+        MaintenanceRunner
+    """
+    config = app.config
+    checkpoint = Checkpoint(os.path.join(
+        config.get('DRIVE_MAINTENANCE_CHECKPOINT_DIR', os.path.join(app.instance_path, 'maintenance')),
+        f'{checkpoint_name}.jsonl'
+    ))
+    if restart:
+        checkpoint.reset()
+    elif checkpoint.done:
+        print(f"Resuming: {len(checkpoint.done)} files were made public by an earlier run.")
+    return MaintenanceRunner(
+        operation=lambda client, file_ids: client.make_files_public_batch(file_ids),
+        client_factory=lambda: create_worker_drive_helper(app),
+        workers=workers or config.get('DRIVE_MAINTENANCE_WORKERS', 4),
+        rate=config.get('DRIVE_MAINTENANCE_RATE', 10) if rate is None else rate,
+        batch_size=BATCH_SIZE,
+        checkpoint=checkpoint,
+        on_progress=lambda summary: print(f"Progress: {format_summary(summary)}")
+    )
+
+def print_summary(summary):
+    """Print a runner summary, returning True if every file was made public."""
+    print(format_summary(summary))
+    failed = summary['failed_ids']
+    if failed:
+        print(f"Failed to make {len(failed)} files/folders public: {', '.join(failed[:20])}"
+              f"{' ...' if len(failed) > 20 else ''}")
+        print("Run the script again to retry them.")
+    return not failed
+
+def parse_args(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--workers', type=int, help='number of threads, each with its own Drive client')
+    parser.add_argument('--rate', type=float, help='Drive calls per second across all threads (0 for no limit)')
+    parser.add_argument('--restart', action='store_true', help='ignore the checkpoint of an earlier run')
+    return parser.parse_args()
+
+def make_all_public(workers=None, rate=None, restart=False):
     """Make all files and folders in Google Drive public."""
     if not drive_helper or not drive_helper.is_enabled():
         print("Google Drive is not enabled.")
-        return
+        return False
     
-    # Get all files and folders
+    # Files are listed page by page on this thread while the workers make the
+    # previous pages public
     try:
-        # Get all files
-        results = drive_helper.drive_service.files().list(
-            pageSize=1000,
-            fields="nextPageToken, files(id, name, mimeType)"
-        ).execute()
-        
-        items = results.get('files', [])
+        runner = create_make_public_runner('make_all_public', workers, rate, restart)
+        summary = runner.run(item['id'] for item in drive_helper.iter_files(fields='id'))
         
-        if not items:
+        if not summary['seen']:
             print('No files found.')
-            return
-            
-        print(f'Found {len(items)} files/folders:')
-        
-        # Make each item public
-        for item in items:
-            item_id = item['id']
-            name = item['name']
-            mime_type = item['mimeType']
-            
-            item_type = "Folder" if mime_type == 'application/vnd.google-apps.folder' else "File"
-            print(f"Making {item_type} '{name}' (ID: {item_id}) public...")
+            return True
             
-            drive_helper.make_file_public(item_id)
+        if not print_summary(summary):
+            return False
             
         print("All files and folders are now publicly accessible with a link.")
+        return True
         
     except Exception as e:
         print(f"Error making files public: {str(e)}")
         import traceback
         traceback.print_exc()
+        return False
 
 if __name__ == "__main__":
-    make_all_public()
\ No newline at end of file
+    args = parse_args(make_all_public.__doc__)
+    sys.exit(0 if make_all_public(args.workers, args.rate, args.restart) else 1)
@@ -1,5 +1,6 @@
 import sys
 from app import drive_helper
+from make_all_public import create_make_public_runner, parse_args, print_summary
 
 # List of file IDs to make public
 file_ids = [
@@ -12,9 +13,16 @@ file_ids = [
     '1hJ_ASv7x96tvzTrbKtujYngEIfUXYfTa'
 ]
 
-# Make each file public
-for file_id in file_ids:
-    print(f"Making file {file_id} public...")
-    drive_helper.make_file_public(file_id)
+if __name__ == "__main__":
+    args = parse_args("Make the listed Google Drive files public.")
+    if not drive_helper or not drive_helper.is_enabled():
+        print("Google Drive is not enabled.")
+        sys.exit(1)
     
-print("Done!")
\ No newline at end of file
+    # Make the files public in batches, skipping those done by an earlier run
+    print(f"Making {len(file_ids)} files public...")
+    runner = create_make_public_runner('make_files_public', args.workers, args.rate, args.restart)
+    success = print_summary(runner.run(file_ids))
+    
+    print("Done!")
+    sys.exit(0 if success else 1)
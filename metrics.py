@@ -0,0 +1,268 @@
+import bisect
+import functools
+import glob
+import json
+import os
+import threading
+import time
+
+# Latency buckets in seconds, shared by all histograms
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class MetricsRegistry:
+    def __init__(self, directory=None, flush_interval=5, buckets=DEFAULT_BUCKETS):
+        """
+        Counters, gauges and histograms rendered in the Prometheus text format.
+
+        Each update takes one uncontended lock for a dict update. With several
+        worker processes, set directory to a folder shared by the workers
+        (emptied with clear() when the server starts): each process writes a
+        snapshot of its values there every flush_interval seconds, and collect()
+        sums the snapshots of all processes.
+
+        Args:
+            directory: Folder for per-process snapshots, or None for a single process
+            flush_interval: Seconds between snapshot writes
+            buckets: Histogram bucket upper bounds in seconds
+        """
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._meta = {}        # name -> (type, help)
+        self._counters = {}    # (name, labels) -> value
+        self._gauges = {}      # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [count per bucket..., +Inf count, sum]
+        self._last_flush = 0.0
+        self.configure(directory, flush_interval)
+
+    def configure(self, directory=None, flush_interval=5):
+        """Set the snapshot directory and interval (see __init__)."""
+        self.directory = directory
+        self.flush_interval = flush_interval
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def clear(self):
+        """
+        Delete every snapshot in the shared directory.
+
+        Counters of exited processes are kept in the sums so totals don't drop
+        when a worker is replaced, which leaves those of a previous server run
+        in the directory. Call this once when the server starts, before the
+        workers are forked (see gunicorn.conf.py).
+        """
+        if not self.directory:
+            return
+        for path in glob.glob(os.path.join(self.directory, 'metrics_*.json*')):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def describe(self, name, metric_type, help_text):
+        self._meta[name] = (metric_type, help_text)
+
+    def inc(self, name, labels=None, amount=1):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+        self._maybe_flush()
+
+    def gauge_add(self, name, labels=None, amount=1):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + amount
+
+    def observe(self, name, labels=None, value=0.0):
+        key = (name, _labels_key(labels))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[index] += 1
+            histogram[-1] += value
+        self._maybe_flush()
+
+    def time(self, name, labels=None, error_counter=None):
+        """
+        Decorator recording a function's duration in a histogram.
+
+        Args:
+            name: Histogram name
+            labels: Histogram labels
+            error_counter: Counter incremented (with the same labels) when the function raises
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                except Exception:
+                    if error_counter:
+                        self.inc(error_counter, labels)
+                    raise
+                finally:
+                    self.observe(name, labels, time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+    def _snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, labels, value] for (name, labels), value in self._counters.items()],
+                'gauges': [[name, labels, value] for (name, labels), value in self._gauges.items()],
+                'histograms': [[name, labels, list(values)] for (name, labels), values in self._histograms.items()],
+            }
+
+    def _maybe_flush(self):
+        if self.directory and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write this process's snapshot to the shared directory."""
+        if not self.directory:
+            return
+        self._last_flush = time.monotonic()
+        pid = os.getpid()
+        path = os.path.join(self.directory, f'metrics_{pid}.json')
+        temp_path = f'{path}.{threading.get_ident()}.tmp'
+        snapshot = self._snapshot()
+        snapshot['pid'] = pid
+        with open(temp_path, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(temp_path, path)
+
+    def _snapshots(self):
+        if not self.directory:
+            return [self._snapshot()]
+        self.flush()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, 'metrics_*.json')):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            # Gauges of processes that have exited are stale; their counters still count
+            if not _pid_alive(snapshot.get('pid', 0)):
+                snapshot['gauges'] = []
+            snapshots.append(snapshot)
+        return snapshots
+
+    def collect(self):
+        """
+        Sum the values of every process.
+
+        Returns:
+            (counters, gauges, histograms) dicts keyed by (name, labels)
+        """
+        counters, gauges, histograms = {}, {}, {}
+        for snapshot in self._snapshots():
+            for target, kind in ((counters, 'counters'), (gauges, 'gauges')):
+                for name, labels, value in snapshot[kind]:
+                    key = (name, tuple(tuple(pair) for pair in labels))
+                    target[key] = target.get(key, 0) + value
+            for name, labels, values in snapshot['histograms']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                if key in histograms:
+                    histograms[key] = [a + b for a, b in zip(histograms[key], values)]
+                else:
+                    histograms[key] = list(values)
+        return counters, gauges, histograms
+
+    def render(self):
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            Text for a /metrics response
+        """
+        counters, gauges, histograms = self.collect()
+        types = {}
+        for values, metric_type in ((counters, 'counter'), (gauges, 'gauge'), (histograms, 'histogram')):
+            for name, labels in values:
+                types[name] = metric_type
+        lines = []
+        for name in sorted(types):
+            metric_type, help_text = self._meta.get(name, (types[name], ''))
+            if help_text:
+                lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for source in (counters, gauges):
+                for (metric_name, labels), value in sorted(source.items()):
+                    if metric_name == name:
+                        lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+            for (metric_name, labels), values in sorted(histograms.items()):
+                if metric_name != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), values[:-1]):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{name}_bucket{_format_labels(labels, [("le", le)])} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(values[-1])}')
+                lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+class TimedProxy:
+    def __init__(self, target, registry, histogram, error_counter, methods):
+        """
+        Wrap an object so calls to the given methods are timed.
+
+        Args:
+            target: Object to wrap
+            registry: MetricsRegistry
+            histogram: Histogram name, labelled with method=<method name>
+            error_counter: Counter name for calls that raise
+            methods: Names of the methods to time; other attributes pass through
+        """
+        self._target = target
+        self._registry = registry
+        self._histogram = histogram
+        self._error_counter = error_counter
+        self._methods = frozenset(methods)
+        self._wrapped = {}
+
+    def __getattr__(self, name):
+        value = getattr(self._target, name)
+        if name not in self._methods or not callable(value):
+            return value
+        wrapped = self._wrapped.get(name)
+        if wrapped is None:
+            wrapped = self._registry.time(self._histogram, {'method': name}, self._error_counter)(
+                getattr(type(self._target), name)
+            )
+            wrapped = self._wrapped[name] = functools.partial(wrapped, self._target)
+        return wrapped
@@ -0,0 +1,62 @@
+import os
+import sys
+import sqlite3
+
+def add_blob_storage(db_path):
+    print(f"Using database at {db_path}")
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    # Get table names
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    table_names = [table[0] for table in cursor.fetchall()]
+
+    if 'document' not in table_names:
+        print("No document table found, run the document migration first")
+        conn.close()
+        return False
+
+    # Document content stored once per SHA-256 digest
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS file_blob (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        digest VARCHAR(64) NOT NULL UNIQUE,
+        path VARCHAR(255) NOT NULL,
+        size INTEGER NOT NULL,
+        ref_count INTEGER NOT NULL DEFAULT 0,
+        drive_file_id VARCHAR(255),
+        created_at DATETIME
+    )
+    ''')
+    print("file_blob table is in place")
+
+    cursor.execute("PRAGMA table_info(document)")
+    column_names = [column[1] for column in cursor.fetchall()]
+    if 'blob_id' not in column_names:
+        cursor.execute("ALTER TABLE document ADD COLUMN blob_id INTEGER REFERENCES file_blob (id)")
+        print("Added blob_id column to document table")
+    else:
+        print("blob_id column already exists in document table")
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_document_blob_id ON document (blob_id)")
+
+    # Existing documents keep their files; only new uploads are stored as blobs
+    conn.commit()
+    conn.close()
+    return True
+
+if __name__ == "__main__":
+    print("Running database migration for blob storage...")
+
+    # Use the path given on the command line, or try both possible database locations
+    db_paths = sys.argv[1:] or ['employees.db', 'instance/employees.db']
+
+    for db_path in db_paths:
+        if os.path.exists(db_path):
+            if add_blob_storage(db_path):
+                print("Migration completed successfully!")
+            else:
+                sys.exit(1)
+            break
+    else:
+        print("Could not find a valid database file")
+        sys.exit(1)
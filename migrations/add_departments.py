@@ -0,0 +1,72 @@
+import os
+import sys
+import sqlite3
+
+# Notes text add_department() used to put on its placeholder employees
+PLACEHOLDER_NOTES = "This is a placeholder record to establish the department.%"
+
+def migrate_departments(db_path):
+    print(f"Using database at {db_path}")
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='employee'")
+    if not cursor.fetchone():
+        print(f"No employee table found in {db_path}")
+        conn.close()
+        return False
+
+    # Create department table (same schema as the Department model)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS department (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name VARCHAR(50) NOT NULL UNIQUE,
+        headcount INTEGER NOT NULL DEFAULT 0,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    # Fold existing department values in before the placeholders go away,
+    # so departments that only had a placeholder are kept
+    cursor.execute('''
+    INSERT OR IGNORE INTO department (name, headcount)
+    SELECT DISTINCT department, 0 FROM employee
+    WHERE department IS NOT NULL AND department != ''
+    ''')
+    print(f"Added {cursor.rowcount} departments")
+
+    # Delete placeholder employees created by the old add_department()
+    placeholder_filter = '''
+    first_name = 'Department' AND last_name = 'Placeholder' AND notes LIKE ?
+    '''
+    cursor.execute(f"UPDATE user SET employee_id = NULL WHERE employee_id IN (SELECT id FROM employee WHERE {placeholder_filter})", (PLACEHOLDER_NOTES,))
+    cursor.execute(f"DELETE FROM employee WHERE {placeholder_filter}", (PLACEHOLDER_NOTES,))
+    print(f"Deleted {cursor.rowcount} placeholder employees")
+
+    # Recompute headcounts from the remaining employees
+    cursor.execute('''
+    UPDATE department SET headcount = (
+        SELECT COUNT(*) FROM employee WHERE employee.department = department.name
+    )
+    ''')
+    print("Department headcounts updated")
+
+    conn.commit()
+    conn.close()
+    return True
+
+if __name__ == "__main__":
+    print("Running database migration for departments...")
+
+    # Use the path given on the command line, or try both possible database locations
+    db_paths = sys.argv[1:] or ['employees.db', 'instance/employees.db']
+
+    for db_path in db_paths:
+        if os.path.exists(db_path) and migrate_departments(db_path):
+            print("Migration completed successfully!")
+            print("Note: SQLite cannot add the employee.department foreign key to an existing table; "
+                  "it applies to databases created from the models.")
+            break
+    else:
+        print("Could not find a valid database file")
+        sys.exit(1)
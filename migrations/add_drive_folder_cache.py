@@ -0,0 +1,41 @@
+import os
+import sys
+import sqlite3
+
+def add_drive_folder_cache(db_path):
+    print(f"Using database at {db_path}")
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    # Google Drive folder IDs by parent folder and name, shared by all app processes
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS drive_folder (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        parent_id VARCHAR(255) NOT NULL DEFAULT '',
+        name VARCHAR(255) NOT NULL,
+        folder_id VARCHAR(255) NOT NULL,
+        created_at DATETIME,
+        CONSTRAINT uq_drive_folder_parent_id_name UNIQUE (parent_id, name)
+    )
+    ''')
+    print("drive_folder table is in place")
+
+    # Employees keep their drive_folder_id; the table fills up as folders are looked up
+    conn.commit()
+    conn.close()
+    return True
+
+if __name__ == "__main__":
+    print("Running database migration for the Google Drive folder cache...")
+
+    # Use the path given on the command line, or try both possible database locations
+    db_paths = sys.argv[1:] or ['employees.db', 'instance/employees.db']
+
+    for db_path in db_paths:
+        if os.path.exists(db_path):
+            add_drive_folder_cache(db_path)
+            print("Migration completed successfully!")
+            break
+    else:
+        print("Could not find a valid database file")
+        sys.exit(1)
@@ -0,0 +1,75 @@
+import os
+import sys
+import sqlite3
+
+# Columns tracking the Google Drive copy of each upload: (table, column, definition)
+COLUMNS = [
+    ('document', 'sync_status', 'VARCHAR(20)'),
+    ('document', 'sync_attempts', 'INTEGER NOT NULL DEFAULT 0'),
+    ('employee', 'profile_picture_sync_status', 'VARCHAR(20)'),
+    ('employee', 'profile_picture_sync_attempts', 'INTEGER NOT NULL DEFAULT 0'),
+]
+
+def add_drive_sync(db_path):
+    print(f"Using database at {db_path}")
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    # Get table names
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    table_names = [table[0] for table in cursor.fetchall()]
+
+    for table, column, definition in COLUMNS:
+        if table not in table_names:
+            print(f"Table {table} not found, skipping {column}")
+            continue
+        cursor.execute(f"PRAGMA table_info(\"{table}\")")
+        column_names = [row[1] for row in cursor.fetchall()]
+        if column not in column_names:
+            cursor.execute(f"ALTER TABLE \"{table}\" ADD COLUMN {column} {definition}")
+            print(f"Added {column} column to {table} table")
+        else:
+            print(f"{column} column already exists in {table} table")
+
+    # Durable queue of uploads waiting to be copied to Google Drive
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS drive_upload_job (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        employee_id INTEGER NOT NULL REFERENCES employee (id) ON DELETE CASCADE,
+        document_id INTEGER REFERENCES document (id) ON DELETE CASCADE,
+        file_path VARCHAR(500) NOT NULL,
+        file_name VARCHAR(255) NOT NULL,
+        mime_type VARCHAR(100),
+        status VARCHAR(20) NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at DATETIME NOT NULL,
+        locked_at DATETIME,
+        last_error VARCHAR(500),
+        created_at DATETIME
+    )
+    ''')
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_drive_upload_job_status_next_attempt_at "
+        "ON drive_upload_job (status, next_attempt_at)"
+    )
+    print("drive_upload_job table is in place")
+
+    # Existing rows keep an empty sync status: served from Drive when they have a Drive ID
+    conn.commit()
+    conn.close()
+    return True
+
+if __name__ == "__main__":
+    print("Running database migration for Google Drive sync status...")
+
+    # Use the path given on the command line, or try both possible database locations
+    db_paths = sys.argv[1:] or ['employees.db', 'instance/employees.db']
+
+    for db_path in db_paths:
+        if os.path.exists(db_path):
+            add_drive_sync(db_path)
+            print("Migration completed successfully!")
+            break
+    else:
+        print("Could not find a valid database file")
+        sys.exit(1)
@@ -0,0 +1,64 @@
+import os
+import sys
+import sqlite3
+
+# Indexes declared on the models in app.py: (index name, table, columns)
+INDEXES = [
+    ('ix_education_employee_id', 'education', ['employee_id']),
+    ('ix_certification_employee_id', 'certification', ['employee_id']),
+    ('ix_document_employee_id', 'document', ['employee_id']),
+    ('ix_document_blob_id', 'document', ['blob_id']),
+    ('ix_document_drive_file_id', 'document', ['drive_file_id']),
+    ('ix_drive_upload_job_status_next_attempt_at', 'drive_upload_job', ['status', 'next_attempt_at']),
+    ('ix_employee_position', 'employee', ['position']),
+    ('ix_employee_drive_profile_pic_id', 'employee', ['drive_profile_pic_id']),
+    ('ix_employee_last_name_id', 'employee', ['last_name', 'id']),
+    ('ix_employee_department_last_name_id', 'employee', ['department', 'last_name', 'id']),
+    ('ix_user_employee_code', 'user', ['employee_code']),
+    ('ix_user_employee_id', 'user', ['employee_id']),
+]
+
+def add_indexes(db_path):
+    print(f"Using database at {db_path}")
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    # Get table names
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    table_names = [table[0] for table in cursor.fetchall()]
+
+    for index_name, table, columns in INDEXES:
+        if table not in table_names:
+            print(f"Table {table} not found, skipping {index_name}")
+            continue
+
+        cursor.execute(f"PRAGMA table_info(\"{table}\")")
+        column_names = [column[1] for column in cursor.fetchall()]
+        missing = [column for column in columns if column not in column_names]
+        if missing:
+            print(f"Columns {missing} not found in {table}, skipping {index_name}")
+            continue
+
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {index_name} ON \"{table}\" ({', '.join(columns)})"
+        )
+        print(f"Index {index_name} on {table}({', '.join(columns)}) is in place")
+
+    conn.commit()
+    conn.close()
+    return True
+
+if __name__ == "__main__":
+    print("Running database migration for indexes...")
+
+    # Use the path given on the command line, or try both possible database locations
+    db_paths = sys.argv[1:] or ['employees.db', 'instance/employees.db']
+
+    for db_path in db_paths:
+        if os.path.exists(db_path):
+            add_indexes(db_path)
+            print("Migration completed successfully!")
+            break
+    else:
+        print("Could not find a valid database file")
+        sys.exit(1)
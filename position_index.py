@@ -0,0 +1,101 @@
+import bisect
+import threading
+import time
+
+
+class PositionPrefixIndex:
+    def __init__(self, loader, ttl=300):
+        """
+        In-process prefix index of job positions for the /positions typeahead.
+
+        Args:
+            loader: Callable returning an iterable of position names.
+                    Called lazily on first use and whenever the index expires.
+            ttl: Seconds before the index is rebuilt from the loader, so
+                 positions added by other worker processes show up. Use 0 to
+                 never expire.
+        """
+        self.loader = loader
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._positions = None
+        self._full_keys = []  # (lowercased position, position)
+        self._word_keys = []  # (lowercased position from its second word on, position)
+        self._built_at = 0.0
+
+    @staticmethod
+    def _normalize(text):
+        return ' '.join(text.lower().split())
+
+    def _word_keys_for(self, position):
+        words = self._normalize(position).split(' ')
+        return [(' '.join(words[i:]), position) for i in range(1, len(words))]
+
+    def _build(self):
+        positions = {position for position in self.loader() if position}
+        self._full_keys = sorted((self._normalize(position), position) for position in positions)
+        self._word_keys = sorted(key for position in positions for key in self._word_keys_for(position))
+        self._positions = positions
+        self._built_at = time.monotonic()
+
+    def _ensure_built(self):
+        expired = self.ttl and time.monotonic() - self._built_at > self.ttl
+        if self._positions is None or expired:
+            self._build()
+
+    def add(self, position):
+        """
+        Add a position to the index if it isn't there yet.
+
+        Args:
+            position: Position name
+        """
+        if not position:
+            return
+        with self._lock:
+            # Not built yet: the position will be picked up by the lazy build
+            if self._positions is None or position in self._positions:
+                return
+            self._positions.add(position)
+            bisect.insort(self._full_keys, (self._normalize(position), position))
+            for key in self._word_keys_for(position):
+                bisect.insort(self._word_keys, key)
+
+    def invalidate(self):
+        """Drop the index so the next search rebuilds it from the loader."""
+        with self._lock:
+            self._positions = None
+
+    @staticmethod
+    def _scan(keys, prefix, limit, seen, results):
+        i = bisect.bisect_left(keys, (prefix,))
+        while i < len(keys) and len(results) < limit and keys[i][0].startswith(prefix):
+            position = keys[i][1]
+            if position not in seen:
+                seen.add(position)
+                results.append(position)
+            i += 1
+
+    def search(self, query, limit=10):
+        """
+        Find positions matching the typed text.
+
+        Positions that start with the text come first, followed by positions
+        with a later word starting with it (e.g. "eng" -> "Software Engineer").
+
+        Args:
+            query: Text typed so far
+            limit: Maximum number of results
+
+        Returns:
+            List of at most limit position names
+        """
+        prefix = self._normalize(query)
+        results = []
+        seen = set()
+        with self._lock:
+            self._ensure_built()
+            self._scan(self._full_keys, prefix, limit, seen, results)
+            if prefix and len(results) < limit:
+                self._scan(self._word_keys, prefix, limit, seen, results)
+        return results
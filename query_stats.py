@@ -0,0 +1,156 @@
+import re
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import event
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+# Collectors receiving queries run on the current thread, innermost last
+_local = threading.local()
+
+
+def normalize_statement(statement):
+    """
+    Reduce a SQL statement to its shape, so statements that differ only by
+    parameters, inline literals or the length of an IN list compare equal.
+    """
+    statement = _LITERALS.sub('?', statement)
+    statement = _PLACEHOLDER_LISTS.sub('(?)', statement)
+    return _WHITESPACE.sub(' ', statement).strip()
+
+
+class QueryStats:
+    def __init__(self, repeat_threshold=5):
+        """
+        Queries recorded while a collector is active.
+
+        Args:
+            repeat_threshold: Times a statement shape has to run before it is
+                              reported as a likely N+1 pattern
+        """
+        self.repeat_threshold = repeat_threshold
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+        self.statements = {}  # statement text -> times executed
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.total_time += duration
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+        if duration > self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+
+    def repeated(self):
+        """
+        Statement shapes executed at least repeat_threshold times.
+
+        Returns:
+            List of (normalized statement, count), most frequent first
+        """
+        shapes = {}
+        for statement, count in self.statements.items():
+            shape = normalize_statement(statement)
+            shapes[shape] = shapes.get(shape, 0) + count
+        repeated = [(shape, count) for shape, count in shapes.items() if count >= self.repeat_threshold]
+        return sorted(repeated, key=lambda item: -item[1])
+
+    def as_dict(self):
+        return {
+            'queries': self.count,
+            'db_time_ms': round(self.total_time * 1000, 2),
+            'slowest_ms': round(self.slowest_time * 1000, 2),
+            'slowest_statement': normalize_statement(self.slowest_statement) if self.slowest_statement else None,
+            'repeated': [{'statement': shape, 'count': count} for shape, count in self.repeated()],
+        }
+
+
+def _collectors():
+    if not hasattr(_local, 'collectors'):
+        _local.collectors = []
+    return _local.collectors
+
+
+def start_collecting(repeat_threshold=5):
+    """Start recording queries run on this thread into a new QueryStats."""
+    stats = QueryStats(repeat_threshold)
+    _collectors().append(stats)
+    return stats
+
+
+def stop_collecting(stats):
+    """Stop recording into a QueryStats returned by start_collecting."""
+    collectors = _collectors()
+    if stats in collectors:
+        collectors.remove(stats)
+
+
+@contextmanager
+def collect_queries(repeat_threshold=5):
+    """
+    Record the queries run inside the block.
+
+    Example:
+        with collect_queries() as stats:
+            client.get('/all-employees')
+        print(stats.count)
+    """
+    stats = start_collecting(repeat_threshold)
+    try:
+        yield stats
+    finally:
+        stop_collecting(stats)
+
+
+@contextmanager
+def assert_max_queries(limit):
+    """
+    Fail if the block runs more than limit queries.
+
+    Example:
+        with assert_max_queries(4):
+            client.get('/employee/1')
+
+    Raises:
+        AssertionError: Listing the statements that ran
+    """
+    with collect_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        statements = '\n'.join(f'  {count}x {normalize_statement(statement)}'
+                               for statement, count in stats.statements.items())
+        raise AssertionError(f'Expected at most {limit} queries, {stats.count} ran:\n{statements}')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _collectors():
+        conn.info['query_start_time'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_time = conn.info.pop('query_start_time', None)
+    collectors = _collectors()
+    if start_time is None or not collectors:
+        return
+    duration = time.perf_counter() - start_time
+    for stats in collectors:
+        stats.record(statement, duration)
+
+
+def install_query_tracking(engine):
+    """
+    Hook an engine so active collectors see its queries.
+
+    Queries run while no collector is active only cost an empty-list check.
+
+    Args:
+        engine: SQLAlchemy engine (db.engine)
+    """
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
@@ -0,0 +1,165 @@
+import re
+from sqlalchemy.exc import OperationalError
+
+# FTS5 virtual table mirroring the searchable employee columns.
+# It is an external-content table, so the text lives only in the employee
+# table and the triggers below keep the index in sync with every write.
+FTS_TABLE = 'employee_fts'
+FTS_COLUMNS = ('first_name', 'last_name', 'position', 'department', 'email', 'employee_id')
+
+# bm25 weights, in FTS_COLUMNS order: names and employee ID rank highest
+FTS_WEIGHTS = (10.0, 10.0, 5.0, 2.0, 3.0, 8.0)
+
+_columns = ', '.join(FTS_COLUMNS)
+_new_values = ', '.join(f'new.{column}' for column in FTS_COLUMNS)
+_old_values = ', '.join(f'old.{column}' for column in FTS_COLUMNS)
+
+CREATE_STATEMENTS = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {_columns},
+        content='employee',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON employee BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON employee BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {_columns} ON employee BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+        INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END""",
+)
+
+
+def fts5_available(engine):
+    """
+    Check whether the database behind the engine supports FTS5.
+
+    Args:
+        engine: SQLAlchemy engine
+
+    Returns:
+        True if FTS5 virtual tables can be created, False otherwise
+    """
+    if engine.dialect.name != 'sqlite':
+        return False
+
+    try:
+        with engine.connect() as conn:
+            conn.exec_driver_sql("CREATE VIRTUAL TABLE IF NOT EXISTS temp.fts5_probe USING fts5(x)")
+            conn.exec_driver_sql("DROP TABLE temp.fts5_probe")
+        return True
+    except OperationalError:
+        return False
+
+
+def rebuild_search_index(engine):
+    """
+    Create the search index if needed and repopulate it from the employee table.
+
+    Args:
+        engine: SQLAlchemy engine
+
+    Returns:
+        Number of indexed employees, or None if FTS5 is unavailable
+    """
+    if not fts5_available(engine):
+        return None
+
+    with engine.begin() as conn:
+        for statement in CREATE_STATEMENTS:
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        return conn.exec_driver_sql("SELECT COUNT(*) FROM employee").scalar()
+
+
+def search_index_exists(engine):
+    """
+    Check whether the search index table has been created.
+
+    Args:
+        engine: SQLAlchemy engine
+
+    Returns:
+        True if the index table exists
+    """
+    if engine.dialect.name != 'sqlite':
+        return False
+
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (FTS_TABLE,)
+        ).first() is not None
+
+
+def ensure_search_index(engine):
+    """
+    Make sure the search index and its sync triggers exist.
+
+    The index is built from existing rows the first time it is created, so
+    databases that predate the index are populated automatically.
+
+    Args:
+        engine: SQLAlchemy engine
+
+    Returns:
+        True if the search index is usable, False if searches should fall back to LIKE
+    """
+    if not fts5_available(engine):
+        return False
+
+    if not search_index_exists(engine):
+        rebuild_search_index(engine)
+    else:
+        with engine.begin() as conn:
+            for statement in CREATE_STATEMENTS[1:]:
+                conn.exec_driver_sql(statement)
+    return True
+
+
+def build_match_query(text):
+    """
+    Turn free-form search text into an FTS5 MATCH expression.
+
+    Each word becomes a quoted prefix term and all terms must match, so
+    partially typed input still finds results.
+
+    Args:
+        text: User-supplied search text
+
+    Returns:
+        MATCH expression, or None if the text has no searchable words
+    """
+    terms = re.findall(r'\w+', text)
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_employee_ids(connection, text, limit=100):
+    """
+    Search the index and return matching employee IDs in ranked order.
+
+    Args:
+        connection: SQLAlchemy connection, e.g. db.session.connection()
+        text: User-supplied search text
+        limit: Maximum number of results
+
+    Returns:
+        List of employee primary keys, best match first
+    """
+    match = build_match_query(text)
+    if not match:
+        return []
+
+    weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+    rows = connection.exec_driver_sql(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ? "
+        f"ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT ?",
+        (match, limit)
+    ).all()
+    return [row[0] for row in rows]
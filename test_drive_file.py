@@ -17,24 +17,24 @@ def test_file_access():
     
     # List files in the folder
     print("\nListing files in folder:")
-    files = drive_helper.list_files_in_folder(folder_id)
-    if files:
-        for file in files:
-            file_id = file.get('id')
-            name = file.get('name')
-            mime_type = file.get('mimeType')
-            print(f"- {name} (ID: {file_id}, Type: {mime_type})")
-            
-            # Get file URLs
-            view_url = drive_helper.get_file_url(file_id)
-            download_url = drive_helper.get_download_url(file_id)
-            print(f"  View URL: {view_url}")
-            print(f"  Download URL: {download_url}")
-            
-            # Make file public
-            if drive_helper.make_file_public(file_id):
-                print(f"  File {file_id} is now publicly accessible")
-    else:
+    found = False
+    for file in drive_helper.iter_files_in_folder(folder_id, fields='id, name, mimeType'):
+        found = True
+        file_id = file.get('id')
+        name = file.get('name')
+        mime_type = file.get('mimeType')
+        print(f"- {name} (ID: {file_id}, Type: {mime_type})")
+        
+        # Get file URLs
+        view_url = drive_helper.get_file_url(file_id)
+        download_url = drive_helper.get_download_url(file_id)
+        print(f"  View URL: {view_url}")
+        print(f"  Download URL: {download_url}")
+        
+        # Make file public
+        if drive_helper.make_file_public(file_id):
+            print(f"  File {file_id} is now publicly accessible")
+    if not found:
         print("No files found in the folder or folder not found")
     
     # Make the folder public
@@ -0,0 +1,80 @@
+from datetime import date
+
+import pytest
+
+import app as app_module
+from app import create_app, db, init_db, init_storage, ensure_department, Employee, Education, Certification, Document, User
+
+
+@pytest.fixture
+def app(tmp_path):
+    """App with an empty SQLite database and upload folders under tmp_path, Google Drive off."""
+    upload_folder = tmp_path / 'uploads'
+    app = create_app(test_config={
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'GOOGLE_DRIVE_ENABLED': False,
+        'METRICS_ENABLED': False,
+        'UPLOAD_FOLDER': str(upload_folder),
+        'PROFILE_PICTURES_FOLDER': str(upload_folder / 'profile_pictures'),
+        'DOCUMENTS_FOLDER': str(upload_folder / 'documents'),
+    })
+    init_db(app)
+    init_storage(app)
+
+    # Process-wide caches outlive a single app
+    app_module.dashboard_cache.invalidate()
+    app_module.position_index.invalidate()
+    app_module.user_identity_cache.clear()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def create_employee(index, children=0, user=None):
+    """
+    Add an employee with the given number of education, certification and
+    document rows, linked to user if given. Call inside an app context.
+    """
+    employee = Employee(
+        employee_id=f'EMP{index:04d}',
+        first_name=f'First{index}',
+        last_name=f'Last{index}',
+        email=f'employee{index}@example.com',
+        phone='555-0100',
+        department=ensure_department('Engineering').name,
+        position='Engineer',
+        current_address='1 Main St',
+    )
+    db.session.add(employee)
+    db.session.flush()
+    for child in range(children):
+        db.session.add(Education(employee_id=employee.id, institution=f'University {child}', degree='BSc',
+                                 field_of_study='Physics', start_date=date(2000 + child, 9, 1)))
+        db.session.add(Certification(employee_id=employee.id, name=f'Certificate {child}',
+                                     issuing_organization='Board', issue_date=date(2010 + child, 1, 1)))
+        db.session.add(Document(employee_id=employee.id, filename=f'doc{child}.pdf',
+                                original_filename=f'doc{child}.pdf', document_type='certificate'))
+    if user is not None:
+        user.employee_id = employee.id
+    db.session.commit()
+    return employee.id
+
+
+def create_user(username, is_admin=False):
+    """Add a user and return it. Call inside an app context."""
+    user = User(username=username, is_admin=is_admin)
+    user.set_password('password')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def login(client, user_id, username, is_admin=False):
+    """Log a test client in without going through the login form."""
+    with client.session_transaction() as session:
+        session['logged_in'] = True
+        session['user_id'] = user_id
+        session['username'] = username
+        session['is_admin'] = is_admin
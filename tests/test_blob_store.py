@@ -0,0 +1,66 @@
+import io
+import os
+
+from werkzeug.datastructures import FileStorage
+
+from conftest import create_employee
+from app import db, Document, FileBlob, remove_released_blobs, store_document_blob
+
+
+class ReleasedBlobs:
+    """Stands in for another request's session that just dropped a blob's last reference."""
+    def __init__(self, blob_id, path):
+        self.info = {'released_blobs': {blob_id: path}}
+
+
+def upload(content, filename='scan.pdf'):
+    return FileStorage(stream=io.BytesIO(content), filename=filename, content_type='application/pdf')
+
+
+def add_document(employee_id, blob):
+    db.session.add(Document(employee_id=employee_id, filename=blob.path, original_filename='scan.pdf',
+                            document_type='certificate', blob_id=blob.id, blob=blob))
+
+
+def test_same_content_is_stored_once(app):
+    with app.test_request_context():
+        employee_id = create_employee(1)
+        for _ in range(2):
+            blob, _, _ = store_document_blob(upload(b'same content'))
+            add_document(employee_id, blob)
+            db.session.commit()
+
+        blobs = FileBlob.query.all()
+        assert [blob.ref_count for blob in blobs] == [2]
+        assert os.path.exists(os.path.join(app.config['DOCUMENTS_FOLDER'], blobs[0].path))
+
+
+def test_upload_keeps_a_blob_removed_while_it_was_in_progress(app):
+    with app.test_request_context():
+        documents_folder = app.config['DOCUMENTS_FOLDER']
+        employee_id = create_employee(1)
+        blob, _, _ = store_document_blob(upload(b'shared content'))
+        add_document(employee_id, blob)
+        db.session.commit()
+        document = Document.query.one()
+        blob_id, path = document.blob_id, document.blob.path
+
+        # The last document goes, but its blob is only removed after the next upload found it
+        db.session.delete(document)
+        db.session.flush()
+        db.session.info.pop('released_blobs')
+        db.session.commit()
+        db.session.expire_all()
+
+        blob, created, _ = store_document_blob(upload(b'shared content'))
+        assert not created and blob.id == blob_id
+        remove_released_blobs(ReleasedBlobs(blob_id, path))
+        assert db.session.connection().execute(db.select(FileBlob.id)).all() == []
+        assert not os.path.exists(os.path.join(documents_folder, path))
+
+        add_document(employee_id, blob)
+        db.session.commit()
+
+        blob = db.session.get(FileBlob, blob_id)
+        assert blob.ref_count == 1
+        assert os.path.exists(os.path.join(documents_folder, blob.path))
@@ -0,0 +1,47 @@
+import io
+import json
+
+from sqlalchemy.exc import OperationalError
+
+from conftest import create_employee
+from app import db, Employee
+from bulk_import import EmployeeImporter, iter_records
+
+
+def jsonl(*emails):
+    lines = [json.dumps({
+        'first_name': 'Imported', 'last_name': f'Employee{i}', 'email': email, 'phone': '555-0100',
+        'department': 'Engineering', 'position': 'Engineer', 'current_address': '1 Main St',
+    }) for i, email in enumerate(emails)]
+    return iter_records(io.BytesIO('\n'.join(lines).encode()), 'jsonl')
+
+
+def test_existing_email_is_matched_case_insensitively(app):
+    with app.app_context():
+        create_employee(1)
+        report = EmployeeImporter(db.session, db.metadata).run(jsonl('Employee1@Example.COM', 'new@example.com'))
+
+        assert report.imported == 1
+        assert report.errors == [(1, 'Email already exists: Employee1@Example.COM')]
+
+
+def test_rows_of_a_rolled_back_batch_can_be_imported_later(app, monkeypatch):
+    with app.app_context():
+        importer = EmployeeImporter(db.session, db.metadata, batch_size=1)
+        insert_rows = importer._insert_rows
+        calls = []
+
+        def fail_first_batch(rows):
+            calls.append(rows)
+            if len(calls) == 1:
+                raise OperationalError('INSERT', {}, Exception('database is locked'))
+            insert_rows(rows)
+
+        monkeypatch.setattr(importer, '_insert_rows', fail_first_batch)
+        report = importer.run(jsonl('retry@example.com', 'Retry@example.com', 'retry@example.com'))
+
+        assert report.imported == 1
+        assert [line_no for line_no, _ in report.errors] == [1, 3]
+        assert report.errors[0][1].startswith('Batch failed and was rolled back')
+        assert report.errors[1][1] == 'Duplicate email in file: retry@example.com'
+        assert Employee.query.filter_by(email='Retry@example.com').count() == 1
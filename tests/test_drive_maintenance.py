@@ -0,0 +1,47 @@
+import threading
+
+from drive_maintenance import Checkpoint, MaintenanceRunner
+
+
+def succeed(client, item_ids):
+    return {item_id: True for item_id in item_ids}
+
+
+def run_in_thread(runner, item_ids, timeout=10):
+    """Run the runner, failing the test instead of hanging if it deadlocks."""
+    outcome = {}
+
+    def target():
+        try:
+            outcome['summary'] = runner.run(item_ids)
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), 'MaintenanceRunner.run() did not return'
+    return outcome
+
+
+def test_checkpoint_write_errors_do_not_stop_the_workers(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / 'gone' / 'progress.jsonl'))
+    # The checkpoint directory can't be created, as a file has its name
+    (tmp_path / 'gone').write_text('')
+    runner = MaintenanceRunner(succeed, object, workers=2, rate=0, batch_size=5, checkpoint=checkpoint)
+
+    outcome = run_in_thread(runner, range(100))
+
+    summary = outcome['summary']
+    assert summary['succeeded'] == 100
+    assert summary['failed'] == 0
+
+
+def test_run_stops_when_every_worker_has_died():
+    runner = MaintenanceRunner(succeed, object, workers=2, rate=0, batch_size=1)
+    runner._work = lambda batches: None
+
+    outcome = run_in_thread(runner, range(100))
+
+    assert isinstance(outcome['error'], RuntimeError)
+    assert 'workers stopped' in str(outcome['error'])
@@ -0,0 +1,87 @@
+import pytest
+
+from conftest import create_employee, create_user, login
+from app import db, Employee
+
+EMPLOYEE_FORM = {
+    'first_name': 'Ada', 'last_name': 'Lovelace', 'email': 'ada@example.com', 'phone': '555-0100',
+    'department': 'Engineering', 'position': 'Engineer', 'hire_date': '2020-01-06',
+    'current_address': '1 Main St',
+}
+
+
+def education(index, institution, education_id=None):
+    fields = {f'institution_{index}': institution, f'degree_{index}': 'BSc',
+              f'field_of_study_{index}': 'Mathematics', f'edu_start_date_{index}': '2001-09-01'}
+    if education_id is not None:
+        fields[f'education_id_{index}'] = education_id
+    return fields
+
+
+def certification(index, name, certification_id=None):
+    fields = {f'cert_name_{index}': name, f'issuing_organization_{index}': 'Board',
+              f'issue_date_{index}': '2010-01-01'}
+    if certification_id is not None:
+        fields[f'certification_id_{index}'] = certification_id
+    return fields
+
+
+def assert_row_indexes_only_grow(page):
+    # New rows are named with these counters, so resetting them would reuse a posted index
+    for counter in ('educationCount', 'certificationCount'):
+        assert f'{counter}++' in page
+        assert f'{counter} = entries.length' not in page
+
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    with app.app_context():
+        admin = create_user('reviewer', is_admin=True)
+        login(client, admin.id, admin.username, is_admin=True)
+    return client
+
+
+def test_add_keeps_rows_with_gaps_in_their_indexes(app, admin_client):
+    assert_row_indexes_only_grow(admin_client.get('/add').get_data(as_text=True))
+
+    # Rows 0 and 2 were added and then removed in the browser
+    form = dict(EMPLOYEE_FORM, education_count='4', certification_count='3',
+                **education(1, 'Cambridge'), **education(3, 'Oxford'),
+                **certification(0, 'First aid'), **certification(2, 'Forklift'))
+    response = admin_client.post('/add', data=form)
+    assert response.status_code == 302
+
+    with app.app_context():
+        employee = Employee.query.filter_by(email='ada@example.com').one()
+        assert sorted(e.institution for e in employee.educations) == ['Cambridge', 'Oxford']
+        assert sorted(c.name for c in employee.certifications) == ['First aid', 'Forklift']
+
+
+def test_edit_keeps_new_rows_added_around_a_removed_one(app, admin_client):
+    with app.app_context():
+        employee_id = create_employee(1, children=3)
+        employee = db.session.get(Employee, employee_id)
+        educations = sorted(employee.educations, key=lambda e: e.institution)
+        certifications = sorted(employee.certifications, key=lambda c: c.name)
+
+    page = admin_client.get(f'/employee/{employee_id}/edit').get_data(as_text=True)
+    assert_row_indexes_only_grow(page)
+    assert 'let educationCount = 3;' in page
+
+    # Existing rows are 0-2; a row was added (3), row 1 removed, and another row added (4)
+    form = dict(EMPLOYEE_FORM, education_count='5', certification_count='5')
+    for index in (0, 2):
+        form.update(education(index, educations[index].institution, educations[index].id))
+        form.update(certification(index, certifications[index].name, certifications[index].id))
+    form.update(education(3, 'Oxford'), **education(4, 'Cambridge'))
+    form.update(certification(3, 'First aid'), **certification(4, 'Forklift'))
+    response = admin_client.post(f'/employee/{employee_id}/edit', data=form)
+    assert response.status_code == 302
+
+    with app.app_context():
+        employee = db.session.get(Employee, employee_id)
+        assert sorted(e.institution for e in employee.educations) == [
+            'Cambridge', 'Oxford', 'University 0', 'University 2']
+        assert sorted(c.name for c in employee.certifications) == [
+            'Certificate 0', 'Certificate 2', 'First aid', 'Forklift']
@@ -0,0 +1,23 @@
+import json
+
+from metrics import MetricsRegistry
+
+
+def write_snapshot(directory, pid, value):
+    snapshot = {'pid': pid, 'counters': [['requests_total', [], value]], 'gauges': [], 'histograms': []}
+    (directory / f'metrics_{pid}.json').write_text(json.dumps(snapshot))
+
+
+def test_exited_workers_count_until_cleared(tmp_path):
+    # A PID no process has, standing in for a worker of an earlier run
+    write_snapshot(tmp_path, 2 ** 22 + 1, 7)
+    registry = MetricsRegistry(str(tmp_path))
+    registry.inc('requests_total')
+
+    counters, _, _ = registry.collect()
+    assert counters[('requests_total', ())] == 8
+
+    registry.clear()
+    assert list(tmp_path.iterdir()) == []
+    counters, _, _ = registry.collect()
+    assert counters[('requests_total', ())] == 1
@@ -0,0 +1,45 @@
+from conftest import create_employee, create_user, login
+from app import db, load_employee_profile
+from query_stats import assert_max_queries, collect_queries
+
+# One query for the employee plus one selectinload query per child collection
+PROFILE_QUERIES = 4
+
+
+def load_profile_counting_queries(employee_id):
+    """Queries run by load_employee_profile(), queries run reading the children afterwards, and the child count."""
+    db.session.expire_all()
+    with collect_queries() as load_stats:
+        employee = load_employee_profile(employee_id)
+    with collect_queries() as access_stats:
+        rows = len(employee.educations) + len(employee.certifications) + len(employee.documents)
+        for document in employee.documents:
+            document.get_url()
+    return load_stats.count, access_stats.count, rows
+
+
+def test_profile_loads_in_a_fixed_number_of_queries(app):
+    with app.test_request_context():
+        small = create_employee(1, children=1)
+        large = create_employee(2, children=6)
+
+        small_load, small_access, small_rows = load_profile_counting_queries(small)
+        large_load, large_access, large_rows = load_profile_counting_queries(large)
+
+    assert (small_rows, large_rows) == (3, 18)
+    assert small_load == large_load == PROFILE_QUERIES
+    # The children came with the profile: reading them doesn't go back to the database
+    assert small_access == large_access == 0
+
+
+def test_employee_details_page_does_not_lazy_load_children(app):
+    client = app.test_client()
+    with app.app_context():
+        admin = create_user('reviewer', is_admin=True)
+        login(client, admin.id, admin.username, is_admin=True)
+        employee_id = create_employee(1, children=6)
+
+    with assert_max_queries(PROFILE_QUERIES):
+        response = client.get(f'/employee/{employee_id}')
+    assert response.status_code == 200
+    assert b'University 5' in response.data
@@ -0,0 +1,82 @@
+import logging
+
+import pytest
+
+from conftest import create_employee, create_user, login
+from app import Employee
+from query_stats import assert_max_queries
+
+# Employees in the test database, each with a few education, certification
+# and document rows. The limits below must hold however many there are.
+EMPLOYEES = 30
+CHILDREN = 3
+
+
+@pytest.fixture
+def clients(app):
+    """Test clients logged in as an admin and as an employee with a profile."""
+    employee_client = app.test_client()
+    admin_client = app.test_client()
+    with app.app_context():
+        user = create_user('employee')
+        employee_ids = [create_employee(index, children=CHILDREN, user=user if index == 0 else None)
+                        for index in range(EMPLOYEES)]
+        admin = create_user('reviewer', is_admin=True)
+        login(employee_client, user.id, user.username)
+        login(admin_client, admin.id, admin.username, is_admin=True)
+    return {'employee': employee_client, 'admin': admin_client, 'employee_ids': employee_ids}
+
+
+@pytest.mark.parametrize('role, path, limit', [
+    # Identity lookup (user and employee) plus the four profile queries
+    ('employee', '/', 6),
+    ('employee', '/self-onboarding', 6),
+    # Department aggregates, rebuilt on a cold cache
+    ('admin', '/', 1),
+    # One page of employees plus the cached total
+    ('admin', '/all-employees', 2),
+    ('admin', '/all-employees?format=json', 2),
+    ('admin', '/department/Engineering', 2),
+    # Full-text match plus one query for the matching rows
+    ('admin', '/search?query=Last1', 2),
+])
+def test_hot_routes_stay_within_their_query_budget(clients, role, path, limit):
+    with assert_max_queries(limit):
+        response = clients[role].get(path)
+    assert response.status_code == 200
+
+
+def test_employee_details_stays_within_its_query_budget(clients):
+    employee_id = clients['employee_ids'][3]
+    with assert_max_queries(4):
+        response = clients['admin'].get(f'/employee/{employee_id}')
+    assert response.status_code == 200
+
+
+def add_lazy_loading_route(app):
+    # Reads every employee's educations through the lazy relationship: one query per employee
+    def lazy_educations():
+        employees = Employee.query.all()
+        return str(sum(len(employee.educations) for employee in employees))
+    app.add_url_rule('/test/lazy-educations', view_func=lazy_educations)
+
+
+def test_repeated_queries_are_logged_as_a_warning(app, clients, caplog):
+    add_lazy_loading_route(app)
+
+    with caplog.at_level(logging.INFO):
+        response = clients['employee'].get('/test/lazy-educations')
+
+    assert response.data == str(EMPLOYEES * CHILDREN).encode()
+    warnings = [record.getMessage() for record in caplog.records
+                if record.levelno == logging.WARNING and record.getMessage().startswith('query_stats')]
+    assert len(warnings) == 1
+    assert f'"count": {EMPLOYEES}' in warnings[0]
+    assert 'FROM education WHERE' in warnings[0]
+
+
+def test_assert_max_queries_fails_on_an_n_plus_one(app, clients):
+    add_lazy_loading_route(app)
+    with pytest.raises(AssertionError, match=f'{EMPLOYEES + 1} ran'):
+        with assert_max_queries(2):
+            clients['employee'].get('/test/lazy-educations')
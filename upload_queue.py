@@ -0,0 +1,217 @@
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def retry_delay(attempts, base=5, cap=3600, rng=random):
+    """
+    Exponential backoff with jitter.
+
+    Args:
+        attempts: Attempts made so far (1 after the first failure)
+        base: Delay in seconds after the first failure
+        cap: Maximum delay in seconds
+        rng: Random source, for repeatable delays in tests
+
+    Returns:
+        Seconds to wait before the next attempt: between half and all of
+        min(cap, base * 2 ** (attempts - 1))
+    """
+    delay = min(cap, base * 2 ** max(0, attempts - 1))
+    return delay * rng.uniform(0.5, 1.0)
+
+
+class PendingContent:
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=60, clock=time.monotonic):
+        """
+        Upload content kept in memory until a worker in this process picks up its job.
+
+        Lets a worker send a small upload it received moments ago without
+        reading the saved copy back. Jobs picked up by another process, or
+        retried, read the file instead. Their content is never popped here,
+        so entries expire after ttl seconds, and the oldest entries are
+        dropped when a new one doesn't fit in max_bytes.
+
+        Args:
+            max_bytes: Total bytes to hold
+            ttl: Seconds an entry is kept, 0 to keep entries until they're evicted
+            clock: Monotonic clock, for tests
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._content = OrderedDict()  # key -> (expires_at, content), oldest first
+        self._size = 0
+
+    def put(self, key, content):
+        if content is None or len(content) > self.max_bytes:
+            return False
+        with self._lock:
+            self._remove(key)
+            self._expire()
+            while self._content and self._size + len(content) > self.max_bytes:
+                self._remove(next(iter(self._content)))
+            expires_at = self.clock() + self.ttl if self.ttl else None
+            self._content[key] = (expires_at, content)
+            self._size += len(content)
+            return True
+
+    def pop(self, key):
+        with self._lock:
+            self._expire()
+            return self._remove(key)
+
+    def __len__(self):
+        return len(self._content)
+
+    @property
+    def size(self):
+        """Bytes held."""
+        return self._size
+
+    def _remove(self, key):
+        entry = self._content.pop(key, None)
+        if entry is None:
+            return None
+        self._size -= len(entry[1])
+        return entry[1]
+
+    def _expire(self):
+        # Entries are in insertion order and share one TTL, so expired ones come first
+        now = self.clock()
+        while self._content:
+            key, (expires_at, _) = next(iter(self._content.items()))
+            if expires_at is None or expires_at > now:
+                break
+            self._remove(key)
+
+
+class UploadWorkerPool:
+    def __init__(self, claim_job, run_job, client_factory=None, workers=2, poll_interval=5):
+        """
+        Threads draining a durable job queue, one client per thread.
+
+        The queue itself lives in the database: claim_job() atomically takes
+        the next due job and run_job() processes it and records the outcome
+        (including retries). Several processes can run pools against the same
+        queue. Each process starts its own threads, so forked workers don't
+        share threads or clients with their parent.
+
+        Args:
+            claim_job: Callable returning the ID of the next due job, or None
+            run_job: Callable taking (job ID, client)
+            client_factory: Callable returning a client for the calling thread, or
+                            None when the service is unavailable (retried later)
+            workers: Number of threads, 0 to disable
+            poll_interval: Seconds between checks for due jobs when idle
+        """
+        self.claim_job = claim_job
+        self.run_job = run_job
+        self.client_factory = client_factory
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._pid = None
+
+    def configure(self, claim_job=None, run_job=None, client_factory=None, workers=None, poll_interval=None):
+        """Replace the callables or settings; takes effect for threads started afterwards."""
+        if claim_job is not None:
+            self.claim_job = claim_job
+        if run_job is not None:
+            self.run_job = run_job
+        if client_factory is not None:
+            self.client_factory = client_factory
+        if workers is not None:
+            self.workers = workers
+        if poll_interval is not None:
+            self.poll_interval = poll_interval
+
+    def start(self):
+        """Start the worker threads, once per process."""
+        if self._pid == os.getpid() or self.workers <= 0:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._threads = [
+                threading.Thread(target=self._work, name=f'upload-worker-{index}', daemon=True)
+                for index in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    @property
+    def running(self):
+        """True if this process has started its worker threads."""
+        return self._pid == os.getpid() and bool(self._threads)
+
+    def notify(self):
+        """Wake idle workers, e.g. after committing a new job."""
+        self._wakeup.set()
+
+    def stop(self, timeout=None):
+        """Stop the worker threads after their current job."""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        with self._lock:
+            self._threads = []
+            self._pid = None
+
+    def _work(self):
+        client = None
+        while not self._stopping.is_set():
+            try:
+                if client is None and self.client_factory is not None:
+                    client = self.client_factory()
+                    if client is None:
+                        self._idle()
+                        continue
+                job_id = self.claim_job()
+            except Exception as e:
+                logger.error(f"Upload worker failed to claim a job: {str(e)}")
+                self._idle()
+                continue
+            if job_id is None:
+                self._idle()
+                continue
+            try:
+                self.run_job(job_id, client)
+            except Exception as e:
+                logger.error(f"Upload job {job_id} failed: {str(e)}")
+
+    def _idle(self):
+        self._wakeup.wait(self.poll_interval)
+        self._wakeup.clear()
+
+    def drain(self, client, limit=None):
+        """
+        Run due jobs on the calling thread until none are left.
+
+        Args:
+            client: Client passed to run_job
+            limit: Maximum number of jobs to run (optional)
+
+        Returns:
+            Number of jobs run
+        """
+        count = 0
+        while limit is None or count < limit:
+            job_id = self.claim_job()
+            if job_id is None:
+                break
+            self.run_job(job_id, client)
+            count += 1
+        return count
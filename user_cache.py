@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import namedtuple
+
+# Read-only view of the logged-in user and their employee profile, used for
+# authorization checks. Safe to share between requests, unlike ORM objects.
+CurrentIdentity = namedtuple('CurrentIdentity', [
+    'user_id', 'username', 'is_admin', 'employee_pk', 'employee_code',
+    'employee_id', 'first_name', 'last_name', 'drive_folder_id', 'drive_profile_pic_id'
+])
+
+
+def identity_from(user, employee=None):
+    """
+    Build a CurrentIdentity from a User and their Employee (if any).
+
+    Args:
+        user: User model instance
+        employee: Employee model instance linked to the user (optional)
+
+    Returns:
+        CurrentIdentity
+    """
+    return CurrentIdentity(
+        user_id=user.id,
+        username=user.username,
+        is_admin=bool(user.is_admin),
+        employee_pk=employee.id if employee else None,
+        employee_code=user.employee_code,
+        employee_id=employee.employee_id if employee else None,
+        first_name=employee.first_name if employee else None,
+        last_name=employee.last_name if employee else None,
+        drive_folder_id=employee.drive_folder_id if employee else None,
+        drive_profile_pic_id=employee.drive_profile_pic_id if employee else None,
+    )
+
+
+class UserIdentityCache:
+    def __init__(self, ttl=30):
+        """
+        Short-lived process cache of CurrentIdentity keyed by user id.
+
+        Args:
+            ttl: Seconds an entry stays valid. Invalidation is local to the
+                 process, so this bounds staleness in other workers. Use 0 to
+                 disable the cache.
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}  # user_id -> (expires_at, identity)
+
+    def get(self, user_id):
+        if not self.ttl:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[user_id]
+                return None
+            return entry[1]
+
+    def set(self, identity):
+        if not self.ttl:
+            return
+        with self._lock:
+            self._entries[identity.user_id] = (time.monotonic() + self.ttl, identity)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def invalidate_employee(self, employee_pk):
+        with self._lock:
+            stale = [user_id for user_id, (_, identity) in self._entries.items() if identity.employee_pk == employee_pk]
+            for user_id in stale:
+                del self._entries[user_id]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()